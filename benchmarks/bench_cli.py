@@ -0,0 +1,189 @@
+"""
+CLI startup time and shell prompt latency, against a synthetic JDK tree in a
+throwaway HOME (discovery index already warm, as on a real machine).
+
+    python benchmarks/bench_cli.py [--jdks 50] [--runs 10] [--prompts 200] [--leaves 3000] [--json] [--check]
+
+commands  wall time of `coffeebar <command>` as a new process, next to a bare
+          `python -c pass`; plus import time (python -X importtime) and how
+          many heavy modules (typer, rich, requests, Tk) the command loaded.
+          Read-only commands are meant to stay on the fast path with none.
+prompt    per-prompt cost of the bash integration's auto-switch hook, in a
+          project that didn't change and when alternating between two
+          projects; and `coffeebar use 17` through the shell function.
+          Then in a monorepo of several thousand directories (make_monorepo),
+          15 levels below its version files: warm (same directory again),
+          cold (the hook's memo cleared, so the marker is found, read and
+          resolved again) and walk (a different deep directory every prompt,
+          crossing projects). The target is PROMPT_TARGET_MS per prompt;
+          --check exits 1 if a prompt case misses it. Directories are in the
+          OS cache either way, as they are in a shell someone works in.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from synthetic import isolated_home, make_jdk_tree, make_monorepo
+
+COMMANDS = [
+    ("python -c pass", None),
+    ("current", ["current"]),
+    ("which 17", ["which", "17"]),
+    ("list (piped)", ["list"]),
+    ("resolve-dir", ["resolve-dir"]),
+    ("exec 17 -- true", ["exec", "17", "--", "true"]),
+    ("use 17", ["use", "17"]),
+    ("--help", ["--help"]),
+]
+HEAVY_MODULES = ("typer", "rich", "requests", "tkinter", "customtkinter")
+PROMPT_TARGET_MS = 5
+# Distinct deep directories the walk case cycles through
+WALK_DIRS = 200
+
+def run_command(argv, env, cwd):
+    return subprocess.run(argv, env=env, cwd=cwd, stdin=subprocess.DEVNULL, capture_output=True, text=True)
+
+def python_argv(args):
+    return [sys.executable, "-c", "pass"] if args is None else [sys.executable, "-m", "coffeebar.main"] + args
+
+def import_profile(args, env, cwd):
+    """(total import time in ms, heavy top-level packages imported) from -X importtime."""
+    argv = python_argv(args)
+    stderr = run_command(argv[:1] + ["-X", "importtime"] + argv[1:], env, cwd).stderr
+    total_us, heavy = 0, set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = [part.strip() for part in line[len("import time:"):].split("|")]
+        total_us += int(self_us)
+        top = name.split(".")[0]
+        if top in HEAVY_MODULES:
+            heavy.add(top)
+    return total_us / 1000, sorted(heavy)
+
+def measure_commands(env, cwd, runs):
+    results = []
+    for label, args in COMMANDS:
+        argv = python_argv(args)
+        run_command(argv, env, cwd)  # warm the page cache and __pycache__
+        best = None
+        for _ in range(runs):
+            started = time.perf_counter()
+            run_command(argv, env, cwd)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        import_ms, heavy = import_profile(args, env, cwd)
+        results.append({"command": label, "startup_ms": best * 1000, "import_ms": import_ms,
+                        "heavy_import_count": len(heavy), "heavy_imports": heavy})
+    return results
+
+def measure_prompt(env, home, prompts, leaves):
+    """Per-prompt cost of _coffeebar_auto, and of `coffeebar use 17` in an initialized shell."""
+    bash = shutil.which("bash")
+    if not bash:
+        return []
+    projects = []
+    for name, spec in (("a", "17"), ("b", "21")):
+        project = os.path.join(home, "projects", name)
+        os.makedirs(os.path.join(project, "src"), exist_ok=True)
+        with open(os.path.join(project, ".java-version"), "w") as f:
+            f.write(spec + "\n")
+        projects.append(project)
+    monorepo = os.path.join(home, "monorepo")
+    os.makedirs(monorepo)
+    deep = make_monorepo(monorepo, leaves)
+    walk_file = os.path.join(home, "walk.txt")
+    with open(walk_file, "w") as f:
+        # Spread over the tree, so consecutive prompts are in different modules
+        f.write("\n".join(deep[i * len(deep) // WALK_DIRS] for i in range(min(WALK_DIRS, len(deep)))) + "\n")
+    init = run_command(python_argv(["shell-init", "bash"]), env, home).stdout
+    init_file = os.path.join(home, "init.bash")
+    with open(init_file, "w") as f:
+        f.write(init)
+
+    # case -> (directory to start in, loop body, its baseline: the same loop without the hook)
+    walk = 'cd "${W[i % ${#W[@]}]}"'
+    loops = {
+        "unchanged": ("$A", '_coffeebar_auto', ':'),
+        "alternating": ("$A", 'if [ $((i % 2)) = 0 ]; then cd "$A"; else cd "$B"; fi; _coffeebar_auto', ':'),
+        "use": ("$A", 'coffeebar use 17 >/dev/null', ':'),
+        "monorepo warm": ("$D", '_coffeebar_auto', ':'),
+        "monorepo cold": ("$D", '_coffeebar_auto_key=; _coffeebar_auto', '_coffeebar_auto_key='),
+        "monorepo walk": ("$D", walk + '; _coffeebar_auto', walk),
+    }
+    def best_time(start, body):
+        script = (f'. "{init_file}"; A="{projects[0]}/src"; B="{projects[1]}"; D="{deep[-1]}"\n'
+                  f'mapfile -t W < "{walk_file}"; cd "{start}"; _coffeebar_auto\n'
+                  f'i=0; while [ $i -lt {prompts} ]; do {body}; i=$((i+1)); done\n')
+        best = None
+        for _ in range(3):
+            started = time.perf_counter()
+            subprocess.run([bash, "--noprofile", "--norc", "-c", script], env=env, check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    results = []
+    for name, (start, body, baseline) in loops.items():
+        per_prompt_us = max(0.0, best_time(start, body) - best_time(start, baseline)) / prompts * 1e6
+        row = {"case": name, "per_prompt_us": per_prompt_us}
+        if name.startswith("monorepo"):
+            row["depth"] = deep[-1].count(os.sep) - monorepo.count(os.sep)
+        results.append(row)
+    return results
+
+def missed_target(prompt):
+    """Prompt cases (not `use`, a command) slower than PROMPT_TARGET_MS."""
+    return [r for r in prompt if r["case"] != "use" and r["per_prompt_us"] > PROMPT_TARGET_MS * 1000]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--jdks", type=int, default=50, help="Size of the synthetic JDK tree")
+    parser.add_argument("--runs", type=int, default=10, help="Runs per command (the fastest is kept)")
+    parser.add_argument("--prompts", type=int, default=200, help="Prompts simulated per case")
+    parser.add_argument("--leaves", type=int, default=3000, help="Deepest directories of the synthetic monorepo")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--check", action="store_true",
+                        help=f"Exit with status 1 if a prompt case takes over {PROMPT_TARGET_MS}ms")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as home, isolated_home(home) as env:
+        # ~/.jdks is a default discovery root, so the CLI finds the tree on its own
+        make_jdk_tree(os.path.join(home, ".jdks"), args.jdks)
+        env["PYTHONPATH"] = ROOT + os.pathsep + env.get("PYTHONPATH", "")
+        project = os.path.join(home, "project")
+        os.makedirs(project)
+        with open(os.path.join(project, ".java-version"), "w") as f:
+            f.write("21\n")
+        run_command(python_argv(["list"]), env, project)  # builds the discovery index
+        commands = measure_commands(env, project, args.runs)
+        prompt = measure_prompt(env, home, args.prompts, args.leaves)
+    status = 1 if args.check and missed_target(prompt) else 0
+
+    if args.json:
+        print(json.dumps({"commands": commands, "prompt": prompt}, indent=2))
+        return status
+
+    print(f"{'command':>22} {'startup':>10} {'imports':>10}  heavy modules")
+    for r in commands:
+        print(f"{r['command']:>22} {r['startup_ms']:>8.1f}ms {r['import_ms']:>8.1f}ms  {' '.join(r['heavy_imports']) or '-'}")
+    if prompt:
+        print()
+        missed = missed_target(prompt)
+        for r in prompt:
+            where = f"  (depth {r['depth']})" if "depth" in r else ""
+            flag = f"  over the {PROMPT_TARGET_MS}ms target" if r in missed else ""
+            print(f"{'prompt ' + r['case']:>22} {r['per_prompt_us']:>8.0f}us{where}{flag}")
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""
+JDK discovery (JdkManager.find_jdks) on synthetic trees of fake JDK homes.
+
+    python benchmarks/bench_discovery.py [--sizes 10 100 1000] [--repeat 3] [--json]
+
+Per tree size:
+  cold     no discovery index: scan every root, probe every home
+  warm     index on disk, nothing changed (what every CLI start pays)
+  changed  one home upgraded in place since the index was written
+  rescan   `coffeebar rescan`: index ignored and rebuilt
+  resolve  JdkManager.resolve for a version query and a name, per call
+
+"cold" is cold for CoffeeBar, not for the OS: the tree was just written, so
+its directory entries are in the page cache either way.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import isolated_home, make_jdk_tree
+
+def new_manager(home, root):
+    from coffeebar.core.jdk_index import DiscoveryIndex
+    from coffeebar.core.jdk_manager import JdkManager
+    index = DiscoveryIndex(os.path.join(home, "index.json"))
+    manager = JdkManager(index=index, config={"search_paths": [], "scan_depth": 2})
+    # Only the synthetic tree: system JDKs would make runs incomparable across machines
+    manager.common_paths = [root]
+    return manager
+
+def best_of(repeat, setup, action):
+    """Minimum wall time of action() over `repeat` runs, each after an untimed setup(), and the last result."""
+    best, result = None, None
+    for _ in range(repeat):
+        setup()
+        started = time.perf_counter()
+        result = action()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def measure(size, repeat):
+    with tempfile.TemporaryDirectory() as home, isolated_home(home):
+        root = os.path.join(home, "jdks")
+        homes = make_jdk_tree(root, size)
+        index_file = os.path.join(home, "index.json")
+
+        # Timed from loading the index, as a CLI start would
+        discover = lambda: new_manager(home, root).find_jdks()
+
+        def drop_index():
+            if os.path.exists(index_file):
+                os.remove(index_file)
+
+        cold, jdks = best_of(repeat, drop_index, discover)
+        assert len(jdks) == size, f"found {len(jdks)} of {size} JDKs"
+        warm, _ = best_of(repeat, lambda: None, discover)
+
+        def upgrade_one():
+            # What a package manager does: replace the release file by rename
+            release = os.path.join(homes[len(homes) // 2], "release")
+            shutil.copy(release, release + ".new")
+            time.sleep(0.01)  # mtime granularity
+            os.replace(release + ".new", release)
+
+        changed, _ = best_of(repeat, upgrade_one, discover)
+        rescan, _ = best_of(repeat, lambda: None, lambda: new_manager(home, root).find_jdks(refresh=True))
+
+        manager = new_manager(home, root)
+        jdks = manager.find_jdks()
+        queries = ["17", ">=11,<21", "vendor:zulu@lts", jdks[-1].name]
+        calls = 200
+        started = time.perf_counter()
+        for _ in range(calls):
+            for query in queries:
+                manager.resolve(query, jdks)
+        resolve = (time.perf_counter() - started) / (calls * len(queries))
+
+    return {"jdks": size, "cold_seconds": cold, "warm_seconds": warm, "changed_seconds": changed,
+            "rescan_seconds": rescan, "resolve_us": resolve * 1e6}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (the fastest is kept)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = [measure(size, args.repeat) for size in args.sizes]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print(f"{'JDKs':>6} {'cold':>10} {'warm':>10} {'1 changed':>10} {'rescan':>10} {'resolve':>10}")
+    for r in results:
+        print(f"{r['jdks']:>6} " + " ".join(f"{r[key] * 1000:>8.1f}ms" for key in
+                                           ("cold_seconds", "warm_seconds", "changed_seconds", "rescan_seconds"))
+              + f" {r['resolve_us']:>8.1f}us")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
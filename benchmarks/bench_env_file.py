@@ -0,0 +1,96 @@
+"""
+Cost of re-sourcing ~/.coffeebar_env: PATH growth, time per source and
+command lookup time after N re-sources (nested shells, tmux panes, `source ~/.bashrc`).
+
+Compares the current env file (coffeebar.core.shell_utils.render_env_file)
+with the previous one (`export PATH=$JAVA_HOME/bin:$PATH`, which prepends
+another copy every time).
+
+    python benchmarks/bench_env_file.py [--sources 1 10 100 500] [--shells bash dash zsh] [--json]
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+LEGACY = 'export JAVA_HOME="{home}"\nexport PATH=$JAVA_HOME/bin:$PATH\n'
+BASE_PATH = "/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin"
+LOOKUPS = 200
+
+def write_env_files(directory):
+    from coffeebar.core.shell_utils import render_env_file
+    home = "/opt/jdks/jdk-21.0.2"
+    files = {"legacy": LEGACY.format(home=home), "current": render_env_file({"JAVA_HOME": home})}
+    result = {}
+    for name, text in files.items():
+        path = os.path.join(directory, name + ".env")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        result[name] = path
+    return result
+
+def run(shell, env_file, sources, lookups):
+    """Wall time of a shell sourcing env_file `sources` times, then doing `lookups` uncached PATH misses."""
+    script = (
+        f'i=0; while [ $i -lt {sources} ]; do . "{env_file}"; i=$((i+1)); done\n'
+        f'i=0; while [ $i -lt {lookups} ]; do hash -r; command -v coffeebar-no-such-command >/dev/null; i=$((i+1)); done\n'
+        'echo "$PATH"\n'
+    )
+    env = {"PATH": BASE_PATH, "HOME": os.environ.get("HOME", "/tmp"), "JAVA_HOME": "/opt/jdks/jdk-17.0.10"}
+    best, path = None, ""
+    for _ in range(3):
+        started = time.perf_counter()
+        out = subprocess.run([shell, "-c", script], env=env, capture_output=True, text=True, check=True).stdout
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+        path = out.strip()
+    return best, path
+
+def measure(shell, env_file, sources):
+    baseline, _ = run(shell, env_file, 0, 0)
+    sourced, path = run(shell, env_file, sources, 0)
+    looked_up, _ = run(shell, env_file, sources, LOOKUPS)
+    return {
+        "path_entries": len(path.split(":")),
+        "source_ms": max(0.0, sourced - baseline) / sources * 1000,
+        "lookup_us": max(0.0, looked_up - sourced) / LOOKUPS * 1e6,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sources", type=int, nargs="+", default=[1, 10, 100, 500])
+    parser.add_argument("--shells", nargs="+", default=["bash", "dash", "zsh"])
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    shells = [shell for shell in args.shells if shutil.which(shell)]
+    if not shells:
+        print("none of the requested shells are installed", file=sys.stderr)
+        return 1
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        env_files = write_env_files(directory)
+        for shell in shells:
+            for sources in args.sources:
+                for name, path in env_files.items():
+                    results.append(dict(measure(shell, path, sources), shell=shell, format=name, sources=sources))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print(f"{'shell':>6} {'format':>8} {'sources':>8} {'PATH entries':>13} {'per source':>11} {'lookup':>10}")
+    for r in results:
+        print(f"{r['shell']:>6} {r['format']:>8} {r['sources']:>8} {r['path_entries']:>13} "
+              f"{r['source_ms']:>9.3f}ms {r['lookup_us']:>8.1f}us")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
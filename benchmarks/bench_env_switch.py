@@ -0,0 +1,115 @@
+"""
+Latency of switching the active JDK (JdkManager.set_jdk) per environment backend.
+
+"separate" replays the old sequence: JAVA_HOME and PATH written and
+announced one after the other. "transaction" is the current set_jdk: one
+write, one notification.
+
+    python benchmarks/bench_env_switch.py [--switches 20] [--write-ms 5] [--notify-ms 200] [--registry] [--json]
+
+The memory backend simulates the registry with --write-ms / --notify-ms
+(a WM_SETTINGCHANGE broadcast takes up to 5 s per hung window). The shell
+backend is measured for real, against a throwaway HOME. --registry measures
+the real Windows registry of the current user (it rewrites JAVA_HOME).
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+HOMES = ["/opt/jdks/jdk-17.0.10", "/opt/jdks/jdk-21.0.2"]
+
+def switch_separate(env, home):
+    # What set_jdk did before: JAVA_HOME written and always announced, then
+    # Path written and announced again if the entry was missing
+    env.apply({"JAVA_HOME": home}, [])
+    env.notify()
+    if env.apply({}, [env.java_bin_entry]):
+        env.notify()
+
+def switch_transaction(env, home):
+    from coffeebar.core.jdk_manager import JdkManager
+    manager = JdkManager(index=_NoIndex(), config={"search_paths": []}, env=env)
+    with contextlib.redirect_stdout(io.StringIO()):
+        manager.set_jdk(home)
+
+class _NoIndex:
+    """set_jdk never touches the discovery index; avoid loading the real one."""
+
+def measure(env, switch, switches):
+    """First switch (PATH not set up yet), then alternating switches, then re-selecting the active JDK."""
+    result = {}
+    for phase, homes in (("first", [HOMES[0]]), ("switch", [HOMES[(i + 1) % 2] for i in range(switches)]),
+                         ("same", [HOMES[switches % 2]] * switches)):
+        notifications = getattr(env, "notifications", 0)
+        started = time.perf_counter()
+        for home in homes:
+            switch(env, home)
+        result[f"{phase}_ms"] = (time.perf_counter() - started) / len(homes) * 1000
+        if hasattr(env, "notifications"):
+            result[f"{phase}_notifications"] = (env.notifications - notifications) / len(homes)
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--switches", type=int, default=20)
+    parser.add_argument("--write-ms", type=float, default=5.0, help="Simulated cost of a registry write")
+    parser.add_argument("--notify-ms", type=float, default=200.0, help="Simulated cost of the change broadcast")
+    parser.add_argument("--registry", action="store_true", help="Also measure the real Windows registry")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    from coffeebar.core.env_backend import MemoryEnvBackend, RegistryEnvBackend, ShellEnvBackend
+
+    results = []
+    for name, switch in (("separate", switch_separate), ("transaction", switch_transaction)):
+        env = MemoryEnvBackend(write_delay=args.write_ms / 1000, notify_delay=args.notify_ms / 1000)
+        results.append(dict(measure(env, switch, args.switches), backend="memory", sequence=name))
+
+    with tempfile.TemporaryDirectory() as home:
+        saved = {key: os.environ.get(key) for key in ("HOME", "SHELL", "JAVA_HOME")}
+        os.environ.update(HOME=home, SHELL="/bin/bash")
+        os.environ.pop("JAVA_HOME", None)
+        try:
+            for name, switch in (("separate", switch_separate), ("transaction", switch_transaction)):
+                results.append(dict(measure(ShellEnvBackend(), switch, args.switches), backend="shell", sequence=name))
+        finally:
+            for key, value in saved.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+
+    if args.registry:
+        env = RegistryEnvBackend()
+        original = env.get("JAVA_HOME")
+        try:
+            for name, switch in (("separate", switch_separate), ("transaction", switch_transaction)):
+                results.append(dict(measure(env, switch, args.switches), backend="registry", sequence=name))
+        finally:
+            if original:
+                with env.transaction() as tx:
+                    tx.set("JAVA_HOME", original)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print(f"{'backend':>9} {'sequence':>12} {'first use':>16} {'switch':>16} {'same JDK again':>16}")
+    for r in results:
+        cells = []
+        for phase in ("first", "switch", "same"):
+            notes = f" ({r[phase + '_notifications']:.0f}n)" if phase + "_notifications" in r else ""
+            cells.append(f"{r[phase + '_ms']:.2f}ms{notes}")
+        print(f"{r['backend']:>9} {r['sequence']:>12} " + " ".join(f"{cell:>16}" for cell in cells))
+    print("(n = change notifications per switch)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
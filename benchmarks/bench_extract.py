@@ -0,0 +1,71 @@
+"""
+Zip extraction wall time against the number of extraction threads, on a
+generated JDK-shaped archive (one large lib/modules plus many small files).
+
+    python benchmarks/bench_extract.py [--mb 200] [--files 3000] [--workers 1 2 4 8] [--repeat 3] [--json]
+
+Each run extracts with stream_extract.extract_zip_file into an empty
+folder on the same filesystem as the archive. lib/modules is a single
+deflate stream that only one thread can inflate, so it bounds the speedup
+however many threads are added; the rest scales with the cores available.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import write_zip
+
+MB = 1024 * 1024
+MODULES_SHARE = 0.65
+
+def measure(archive, work, workers, repeat):
+    from coffeebar.core import stream_extract
+    best = None
+    for _ in range(repeat):
+        target = os.path.join(work, "extracted")
+        os.makedirs(target)
+        started = time.perf_counter()
+        stream_extract.extract_zip_file(archive, target, workers=workers)
+        elapsed = time.perf_counter() - started
+        shutil.rmtree(target)
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--mb", type=int, default=200, help="Uncompressed size of the generated JDK")
+    parser.add_argument("--files", type=int, default=3000, help="Files besides lib/modules")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (the fastest is kept)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as work:
+        archive = os.path.join(work, "jdk.zip")
+        write_zip(archive, args.files, args.mb * MB, modules_share=MODULES_SHARE)
+        size = os.path.getsize(archive)
+        for workers in args.workers:
+            seconds = measure(archive, work, workers, args.repeat)
+            results.append({"workers": workers, "archive_size": size, "uncompressed_mb": args.mb,
+                            "files": args.files, "extract_seconds": seconds, "extract_mbps": args.mb / seconds})
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print(f"{args.mb} MB in {args.files + 3} files, {results[0]['archive_size'] / MB:.0f} MB zip, {os.cpu_count()} CPUs")
+    print(f"{'workers':>8} {'extract':>10} {'throughput':>12} {'speedup':>8}")
+    for r in results:
+        print(f"{r['workers']:>8} {r['extract_seconds'] * 1000:>8.0f}ms {r['extract_mbps']:>8.0f}MB/s "
+              f"{results[0]['extract_seconds'] / r['extract_seconds']:>7.2f}x")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+Time-to-first-paint and memory of the JDK list for synthetic inventories.
+
+Compares the virtualized list (coffeebar.ui.jdk_list.VirtualJdkList) with the
+previous layout (one JdkFrame per JDK in a CTkScrollableFrame).
+
+    python benchmarks/bench_gui_list.py [--sizes 10 100 1000] [--json]
+
+The widget measurements need a display (headless Linux: xvfb-run python
+benchmarks/...); the list model (filtering, grouping) is timed either way.
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def synthetic_jdks(count):
+    from coffeebar.core.jdk_probe import JdkInfo
+    features = (8, 11, 17, 21, 22)
+    vendors = ("Eclipse Adoptium", "Azul Systems, Inc.", "Amazon.com Inc.", "Oracle Corporation")
+    return [
+        JdkInfo(name=f"jdk-{features[i % 5]}.0.{i}", path=f"/synthetic/jdk-{features[i % 5]}.0.{i}",
+                version_string=f"{features[i % 5]}.0.{i}", feature=features[i % 5], update=i,
+                vendor=vendors[i % 4])
+        for i in range(count)
+    ]
+
+def count_widgets(widget):
+    return 1 + sum(count_widgets(child) for child in widget.winfo_children())
+
+def build_virtual(root, jdks):
+    from coffeebar.ui.jdk_list import VirtualJdkList
+    view = VirtualJdkList(root, on_select=lambda path: None)
+    view.pack(fill="both", expand=True)
+    view.set_jdks(jdks)
+    return view
+
+def build_eager(root, jdks):
+    import customtkinter as ctk
+    from coffeebar.ui.jdk_list import JdkFrame
+    view = ctk.CTkScrollableFrame(root)
+    view.pack(fill="both", expand=True)
+    for jdk in jdks:
+        JdkFrame(view, jdk, False, lambda path: None).pack(fill="x", expand=True, padx=5, pady=5)
+    return view
+
+def measure(builder, count):
+    import customtkinter as ctk
+    jdks = synthetic_jdks(count)
+    root = ctk.CTk()
+    root.geometry("600x500")
+    root.update()
+    gc.collect()
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    view = builder(root, jdks)
+    # First paint: every pending geometry/redraw event processed
+    root.update()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = {"seconds": elapsed, "peak_python_bytes": peak, "widgets": count_widgets(view)}
+    root.destroy()
+    return result
+
+def measure_model(count):
+    """Widget-free part of the virtual list: runs without a display."""
+    from coffeebar.ui.jdk_list import JdkListModel
+    jdks = synthetic_jdks(count)
+    model = JdkListModel()
+    started = time.perf_counter()
+    model.set_jdks(jdks)
+    load = time.perf_counter() - started
+
+    # Type-ahead: each keystroke of "17 azul" refilters
+    started = time.perf_counter()
+    query = ""
+    for char in "17 azul":
+        query += char
+        model.set_query(query)
+    typing = time.perf_counter() - started
+
+    started = time.perf_counter()
+    model.set_query("")
+    model.set_grouped(True)
+    model.visible(model.total_height // 2, 500)
+    grouping = time.perf_counter() - started
+    return {"load_seconds": load, "typing_seconds": typing, "grouping_seconds": grouping}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    model_results = [dict(measure_model(size), entries=size) for size in args.sizes]
+
+    results = []
+    try:
+        import tkinter
+        tkinter.Tk().destroy()
+        has_display = True
+    except Exception as e:
+        print(f"widget benchmarks skipped: no display available ({e})", file=sys.stderr)
+        has_display = False
+    if has_display:
+        for size in args.sizes:
+            for name, builder in (("virtual", build_virtual), ("eager", build_eager)):
+                results.append(dict(measure(builder, size), layout=name, entries=size))
+
+    if args.json:
+        print(json.dumps({"model": model_results, "widgets": results}, indent=2))
+        return 0
+
+    print(f"{'entries':>8} {'load':>10} {'typing':>10} {'grouping':>10}")
+    for r in model_results:
+        print(f"{r['entries']:>8} {r['load_seconds'] * 1000:>8.2f}ms {r['typing_seconds'] * 1000:>8.2f}ms "
+              f"{r['grouping_seconds'] * 1000:>8.2f}ms")
+    if results:
+        print()
+        print(f"{'entries':>8} {'layout':>8} {'first paint':>12} {'peak py mem':>12} {'widgets':>8}")
+        for r in results:
+            print(f"{r['entries']:>8} {r['layout']:>8} {r['seconds'] * 1000:>10.1f}ms "
+                  f"{r['peak_python_bytes'] / 1024:>10.0f}KB {r['widgets']:>8}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
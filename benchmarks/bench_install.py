@@ -0,0 +1,125 @@
+"""
+Download throughput and extraction speed against a local HTTP server
+serving generated JDK-shaped archives.
+
+    python benchmarks/bench_install.py [--mb 64] [--files 2000] [--formats zip tar.gz] [--repeat 3] [--json]
+
+Per archive format:
+  download   JdkDownloader.download_file, segmented (server honours Range)
+             and single-stream (server ignores Range)
+  extract    JdkDownloader.install_jdk on the downloaded archive
+  install    JdkDownloader.install_streaming: download and extract in one pass
+  dedupe     the same install with dedupe on ("auto"), next to an identical
+             JDK so every file is shared: the cost of the extra hashing pass
+
+Loopback has no latency or bandwidth limit, so the numbers show CoffeeBar's
+own overhead (hashing, writes, extraction), not what a real mirror would give.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import file_server, isolated_home, write_tar_gz, write_zip
+
+WRITERS = {"zip": write_zip, "tar.gz": write_tar_gz}
+MB = 1024 * 1024
+
+def timed(repeat, action, cleanup, setup=None):
+    """Fastest of `repeat` runs of action(); setup() and cleanup() around each run aren't timed."""
+    best = None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        action()
+        elapsed = time.perf_counter() - started
+        cleanup()
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def measure(fmt, served, work, args):
+    from coffeebar.core.dedupe import dedupe_homes
+    from coffeebar.core.jdk_downloader import JdkDownloader
+    filename = "jdk." + fmt
+    archive = os.path.join(served, filename)
+    size = os.path.getsize(archive)
+    downloaded = os.path.join(work, "download-" + filename)
+    target = os.path.join(work, "jdks")
+    os.makedirs(target, exist_ok=True)
+
+    def remove(path):
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+    result = {"format": fmt, "archive_size": size, "files": args.files}
+    for mode, ranges in (("segmented", True), ("single", False)):
+        with file_server(served, ranges=ranges) as url:
+            seconds = timed(args.repeat, lambda: JdkDownloader(dedupe="off").download_file(f"{url}/{filename}", downloaded),
+                            lambda: None)
+        result[f"download_{mode}_mbps"] = size / MB / seconds
+
+    # install_jdk deletes the archive it was given, so each run gets a copy
+    copy = os.path.join(work, "copy-" + filename)
+    seconds = timed(args.repeat, lambda: JdkDownloader(dedupe="off").install_jdk(copy, target, "extracted"),
+                    lambda: remove(os.path.join(target, "extracted")), lambda: shutil.copy(downloaded, copy))
+    result["extract_seconds"] = seconds
+    result["extract_mbps"] = size / MB / seconds
+
+    # An identical JDK already installed and in the store, which every file of a deduplicated install matches
+    shutil.copy(downloaded, copy)
+    JdkDownloader(dedupe="off").install_jdk(copy, target, "installed")
+    dedupe_homes([os.path.join(target, "installed")])
+    with file_server(served) as url:
+        for dedupe, key in (("off", "install"), ("auto", "install_dedupe")):
+            install = JdkDownloader(dedupe=dedupe).install_streaming
+            seconds = timed(args.repeat, lambda: install(f"{url}/{filename}", target, "streamed", filename),
+                            lambda: remove(os.path.join(target, "streamed")))
+            result[f"{key}_seconds"] = seconds
+            result[f"{key}_mbps"] = size / MB / seconds
+    remove(os.path.join(target, "installed"))
+    remove(os.path.join(target, ".coffeebar-store"))
+    remove(downloaded)
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--mb", type=int, default=64, help="Uncompressed size of the generated JDK")
+    parser.add_argument("--files", type=int, default=2000, help="Files in the generated JDK")
+    parser.add_argument("--formats", nargs="+", default=list(WRITERS), choices=list(WRITERS))
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (the fastest is kept)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as home, isolated_home(home):
+        served = os.path.join(home, "served")
+        work = os.path.join(home, "work")
+        os.makedirs(served)
+        os.makedirs(work)
+        for fmt in args.formats:
+            WRITERS[fmt](os.path.join(served, "jdk." + fmt), args.files, args.mb * MB)
+            results.append(measure(fmt, served, work, args))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print(f"{'format':>7} {'archive':>9} {'segmented':>12} {'single':>12} {'extract':>16} {'streamed install':>18} "
+          f"{'with dedupe':>18}")
+    for r in results:
+        print(f"{r['format']:>7} {r['archive_size'] / MB:>7.1f}MB {r['download_segmented_mbps']:>8.0f}MB/s "
+              f"{r['download_single_mbps']:>8.0f}MB/s {r['extract_seconds'] * 1000:>7.0f}ms "
+              f"({r['extract_mbps']:>3.0f}MB/s) {r['install_seconds'] * 1000:>7.0f}ms ({r['install_mbps']:>3.0f}MB/s) "
+              f"{r['install_dedupe_seconds'] * 1000:>7.0f}ms ({r['install_dedupe_mbps']:>3.0f}MB/s)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
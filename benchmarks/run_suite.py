@@ -0,0 +1,161 @@
+"""
+Runs every benchmark and saves the results as one JSON file, or compares two
+such files and flags regressions.
+
+    python benchmarks/run_suite.py [--quick] [--only discovery cli ...] [--out results.json]
+    python benchmarks/run_suite.py --compare baseline.json results.json [--threshold 10]
+
+Each benchmark is a standalone script run with --json; its output is stored
+under its name, next to some metadata (commit, Python, machine). --quick
+uses smaller inputs, for a check before committing rather than a report.
+
+Comparison matches rows on their non-metric fields (tree size, command,
+format, ...) and checks every metric, going by the name's suffix:
+*seconds, *_ms, *_us, *_bytes, *_count and *_notifications should not go up,
+*_mbps should not go down. A change beyond the threshold (percent) in the
+wrong direction is a regression, and the exit status is 1.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# name -> (script, extra arguments for --quick)
+BENCHMARKS = {
+    "discovery": ("bench_discovery.py", ["--sizes", "10", "100", "--repeat", "2"]),
+    "cli": ("bench_cli.py", ["--runs", "3", "--prompts", "50", "--leaves", "500"]),
+    "install": ("bench_install.py", ["--mb", "16", "--files", "500", "--repeat", "1"]),
+    "extract": ("bench_extract.py", ["--mb", "32", "--files", "500", "--workers", "1", "4", "--repeat", "1"]),
+    "env_switch": ("bench_env_switch.py", ["--switches", "5", "--notify-ms", "50"]),
+    "env_file": ("bench_env_file.py", ["--sources", "1", "100", "--shells", "bash", "dash"]),
+    "gui_list": ("bench_gui_list.py", ["--sizes", "10", "100"]),
+}
+
+LOWER_IS_BETTER = ("seconds", "_ms", "_us", "_bytes", "_count", "_notifications")
+HIGHER_IS_BETTER = ("_mbps",)
+
+def metadata(quick):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "commit": commit,
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "quick": quick,
+    }
+
+def run_benchmark(name, quick):
+    script, quick_args = BENCHMARKS[name]
+    argv = [sys.executable, os.path.join(HERE, script), "--json"] + (quick_args if quick else [])
+    started = time.perf_counter()
+    process = subprocess.run(argv, capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    if process.returncode != 0:
+        error = process.stderr.strip().splitlines()[-1:] or [f"exit status {process.returncode}"]
+        print(f"  {name}: failed ({error[0]})", file=sys.stderr)
+        return {"error": error[0]}
+    print(f"  {name}: {elapsed:.1f}s", file=sys.stderr)
+    return json.loads(process.stdout)
+
+# Comparison
+
+def direction(field, value):
+    """-1 if smaller is better, +1 if larger is better, None for fields that describe the row."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    if field.endswith(LOWER_IS_BETTER):
+        return -1
+    if field.endswith(HIGHER_IS_BETTER):
+        return 1
+    return None
+
+def flatten(results):
+    """{(benchmark, group, row description): {metric: value}} for every row of every benchmark."""
+    rows = {}
+    for name, data in results.items():
+        if isinstance(data, dict) and "error" in data:
+            continue
+        groups = data.items() if isinstance(data, dict) else [("", data)]
+        for group, entries in groups:
+            for entry in entries:
+                # Lists (e.g. which modules were imported) are details, not part of the row's identity
+                described = ", ".join(f"{k}={v}" for k, v in sorted(entry.items())
+                                      if direction(k, v) is None and not isinstance(v, list))
+                rows[(name, group, described)] = {k: v for k, v in entry.items() if direction(k, v) is not None}
+    return rows
+
+def compare(old_doc, new_doc, threshold):
+    """Prints the metrics that moved by more than threshold percent. Returns the number of regressions."""
+    old, new = flatten(old_doc["results"]), flatten(new_doc["results"])
+    for key in ("machine", "cpus", "python"):
+        if old_doc["meta"].get(key) != new_doc["meta"].get(key):
+            print(f"note: {key} differs ({old_doc['meta'].get(key)} vs {new_doc['meta'].get(key)})")
+    if old_doc["meta"].get("quick") != new_doc["meta"].get("quick"):
+        print("note: one run used --quick; only rows present in both are compared")
+
+    regressions, improvements, compared = [], [], 0
+    for key in sorted(set(old) & set(new)):
+        for metric, before in old[key].items():
+            after = new[key].get(metric)
+            if after is None or not before:
+                continue
+            compared += 1
+            change = (after - before) / before * 100
+            worse = change * direction(metric, before) < 0
+            if abs(change) > threshold:
+                (regressions if worse else improvements).append((key, metric, before, after, change))
+
+    for title, items in (("Regressions", regressions), ("Improvements", improvements)):
+        if not items:
+            continue
+        print(f"{title} (beyond {threshold:g}%):")
+        for (name, group, described), metric, before, after, change in items:
+            where = "/".join(part for part in (name, group) if part)
+            print(f"  {where} [{described}] {metric}: {before:.4g} -> {after:.4g} ({change:+.1f}%)")
+    both = set(old_doc["results"]) & set(new_doc["results"])
+    missing = len([key for key in set(old) ^ set(new) if key[0] in both])
+    print(f"{compared} metrics compared, {len(regressions)} regressions, {len(improvements)} improvements"
+          + (f", {missing} rows only in one run" if missing else ""))
+    return len(regressions)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="Smaller inputs, fewer repetitions")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="Run only these benchmarks")
+    parser.add_argument("--out", help="Write the results here (default: stdout)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two results files")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Percent change that counts (default 10)")
+    args = parser.parse_args()
+
+    if args.compare:
+        docs = []
+        for path in args.compare:
+            with open(path, "r", encoding="utf-8") as f:
+                docs.append(json.load(f))
+        return 1 if compare(docs[0], docs[1], args.threshold) else 0
+
+    names = args.only or list(BENCHMARKS)
+    print(f"Running {len(names)} benchmarks{' (quick)' if args.quick else ''}...", file=sys.stderr)
+    doc = {"meta": metadata(args.quick), "results": {name: run_benchmark(name, args.quick) for name in names}}
+    text = json.dumps(doc, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"Results written to {args.out}", file=sys.stderr)
+    else:
+        print(text)
+    return 1 if any(isinstance(r, dict) and "error" in r for r in doc["results"].values()) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
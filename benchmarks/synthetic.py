@@ -0,0 +1,340 @@
+"""
+Synthetic fixtures shared by the benchmarks: fake JDK homes, archives of
+them, a monorepo with project version files, a throwaway HOME, a local
+HTTP server for downloads and a stub of the Adoptium v3 API.
+
+A fake home has what discovery and probing look at (bin/java, bin/javac,
+a release file) and nothing else, so timings measure CoffeeBar rather than
+the disk. bin/java is a shell script that prints a version, so nothing
+spawns a real JVM.
+"""
+import contextlib
+import hashlib
+import io
+import json
+import os
+import random
+import tarfile
+import threading
+import zipfile
+from typing import Any, Dict, Iterator, List, Optional
+
+FEATURES = (8, 11, 17, 21, 22)
+VENDORS = (("temurin", "Eclipse Adoptium"), ("zulu", "Azul Systems, Inc."),
+           ("corretto", "Amazon.com Inc."), ("graalvm", "GraalVM Community"))
+
+FAKE_JAVA = '#!/bin/sh\necho \'openjdk version "{version}"\' >&2\n'
+
+def home_spec(i: int) -> Dict[str, str]:
+    """Name, version and vendor of the i-th synthetic JDK (deterministic)."""
+    feature = FEATURES[i % len(FEATURES)]
+    vendor_id, implementor = VENDORS[(i // len(FEATURES)) % len(VENDORS)]
+    update = i // (len(FEATURES) * len(VENDORS))
+    if feature == 8:
+        version, runtime = "1.8.0_%d" % update, "1.8.0_%d-b%02d" % (update, i % 20)
+    else:
+        version, runtime = f"{feature}.0.{update}", f"{feature}.0.{update}+{i % 20}"
+    return {"name": f"{vendor_id}-{version}", "version": version, "runtime": runtime, "vendor": implementor}
+
+def make_home(home: str, spec: Dict[str, str]):
+    bin_dir = os.path.join(home, "bin")
+    os.makedirs(bin_dir, exist_ok=True)
+    for exe in ("java", "javac"):
+        path = os.path.join(bin_dir, exe)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(FAKE_JAVA.format(version=spec["version"]))
+        os.chmod(path, 0o755)
+    with open(os.path.join(home, "release"), "w", encoding="utf-8") as f:
+        f.write(f'IMPLEMENTOR="{spec["vendor"]}"\nJAVA_VERSION="{spec["version"]}"\n'
+                f'JAVA_RUNTIME_VERSION="{spec["runtime"]}"\nOS_NAME="Linux"\nOS_ARCH="x86_64"\nIMAGE_TYPE="JDK"\n')
+
+def make_jdk_tree(root: str, count: int) -> List[str]:
+    """Creates `count` fake JDK homes directly under root. Returns their paths."""
+    homes = []
+    for i in range(count):
+        spec = home_spec(i)
+        home = os.path.join(root, spec["name"])
+        make_home(home, spec)
+        homes.append(home)
+    return homes
+
+# Project version files of make_monorepo: the root's, then one module each
+MONOREPO_MARKERS = ((".java-version", "17\n"), (".sdkmanrc", "# sdkman\njava=21.0.0-tem\n"),
+                    (".java-version", "11\n"))
+
+def module_pom(name: str, dependencies: int = 40) -> str:
+    """A Maven module's pom.xml with no toolchains requirement (which doesn't select a JDK)."""
+    deps = "".join(f"""
+    <dependency>
+      <groupId>org.example.lib{i}</groupId>
+      <artifactId>lib{i}</artifactId>
+      <version>1.{i}.0</version>
+    </dependency>""" for i in range(dependencies))
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<project xmlns="http://maven.apache.org/POM/4.0.0">
+  <modelVersion>4.0.0</modelVersion>
+  <parent>
+    <groupId>org.example</groupId>
+    <artifactId>monorepo</artifactId>
+    <version>1.0.0-SNAPSHOT</version>
+  </parent>
+  <artifactId>{name}</artifactId>
+  <dependencies>{deps}
+  </dependencies>
+</project>
+"""
+
+def make_monorepo(root: str, leaves: int, modules: int = 8, depth: int = 10, fanout: int = 4) -> List[str]:
+    """
+    A monorepo with `leaves` source directories `depth` levels below
+    services/m<i>/src/main/java (several thousand directories in all). The
+    root and the first modules have version files (MONOREPO_MARKERS), the other
+    modules inherit the root's. Every module and the root are Maven projects
+    whose pom.xml has no toolchains, so they don't stop the walk up.
+    Returns the deepest directories.
+    """
+    with open(os.path.join(root, MONOREPO_MARKERS[0][0]), "w", encoding="utf-8") as f:
+        f.write(MONOREPO_MARKERS[0][1])
+    with open(os.path.join(root, "pom.xml"), "w", encoding="utf-8") as f:
+        f.write(module_pom("monorepo"))
+    for i in range(modules):
+        module = os.path.join(root, "services", f"m{i}")
+        os.makedirs(module, exist_ok=True)
+        with open(os.path.join(module, "pom.xml"), "w", encoding="utf-8") as f:
+            f.write(module_pom(f"m{i}"))
+        if i + 1 < len(MONOREPO_MARKERS):
+            name, content = MONOREPO_MARKERS[i + 1]
+            with open(os.path.join(module, name), "w", encoding="utf-8") as f:
+                f.write(content)
+    found = []
+    for j in range(leaves):
+        digits = [(j // fanout ** k) % fanout for k in range(depth)]
+        leaf = os.path.join(root, "services", f"m{j % modules}", "src", "main", "java",
+                            *(f"p{digit}" for digit in reversed(digits)))
+        os.makedirs(leaf, exist_ok=True)
+        found.append(leaf)
+    return found
+
+@contextlib.contextmanager
+def isolated_home(home: str) -> Iterator[Dict[str, str]]:
+    """
+    Points HOME and CoffeeBar's cache/config dirs at `home` for the duration,
+    so nothing touches the real user's index, config or env file. Yields the
+    environment to pass to subprocesses.
+    """
+    overrides = {
+        "HOME": home,
+        "SHELL": "/bin/bash",
+        "COFFEEBAR_CACHE_DIR": os.path.join(home, ".cache", "coffeebar"),
+        "COFFEEBAR_CONFIG_DIR": os.path.join(home, ".config", "coffeebar"),
+        "COFFEEBAR_NO_AGENT": "1",
+    }
+    saved = {key: os.environ.get(key) for key in list(overrides) + ["JAVA_HOME"]}
+    os.environ.update(overrides)
+    os.environ.pop("JAVA_HOME", None)
+    try:
+        yield dict(os.environ)
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+def _payload(size: int, rng: random.Random) -> bytes:
+    # Half random, half repetitive: compresses roughly like class files and native libs
+    half = size // 2
+    return rng.randbytes(half) + bytes(size - half)
+
+def archive_members(files: int, total_bytes: int, seed: int = 0, modules_share: float = 0.0):
+    """
+    (relative path, data, mode) for a JDK-shaped archive with a single top-level folder.
+
+    modules_share puts that fraction of total_bytes in one lib/modules file, as
+    in a real JDK (about two thirds); the rest is spread over `files` files.
+    """
+    rng = random.Random(seed)
+    spec = home_spec(2)
+    top = "jdk-" + spec["runtime"]
+    yield f"{top}/bin/java", FAKE_JAVA.format(version=spec["version"]).encode(), 0o755
+    yield f"{top}/release", f'JAVA_VERSION="{spec["version"]}"\n'.encode(), 0o644
+    modules = int(total_bytes * modules_share)
+    if modules:
+        yield f"{top}/lib/modules", _payload(modules, rng), 0o644
+    size = max(1, (total_bytes - modules) // max(1, files))
+    for i in range(files):
+        yield f"{top}/lib/module{i // 100}/file{i}.bin", _payload(size, rng), 0o644
+
+def write_zip(path: str, files: int, total_bytes: int, modules_share: float = 0.0):
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as archive:
+        for name, data, mode in archive_members(files, total_bytes, modules_share=modules_share):
+            info = zipfile.ZipInfo(name, date_time=(2024, 1, 1, 0, 0, 0))
+            info.external_attr = (0o100000 | mode) << 16
+            info.compress_type = zipfile.ZIP_DEFLATED
+            archive.writestr(info, data)
+
+def write_tar_gz(path: str, files: int, total_bytes: int):
+    with tarfile.open(path, "w:gz", compresslevel=1) as archive:
+        for name, data, mode in archive_members(files, total_bytes):
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mode = mode
+            archive.addfile(info, io.BytesIO(data))
+
+@contextlib.contextmanager
+def file_server(directory: str, ranges: bool = True, flaky: int = 0) -> Iterator[str]:
+    """
+    Serves `directory` on a free localhost port, with Range support unless
+    ranges=False (segmented vs single-stream downloads). Yields the base URL.
+    The first `flaky` responses with a body (the 1-byte Range probe aside)
+    break off halfway through, as a dropped connection would.
+    """
+    from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+    broken = {"left": flaky}
+    lock = threading.Lock()
+
+    class Handler(SimpleHTTPRequestHandler):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=directory, **kwargs)
+
+        def log_message(self, format, *args):
+            pass
+
+        def send_head(self):
+            range_header = self.headers.get("Range", "")
+            path = self.translate_path(self.path)
+            if not ranges or not range_header.startswith("bytes=") or not os.path.isfile(path):
+                f = super().send_head()
+                with lock:
+                    if f is not None and self.command == "GET" and broken["left"] and os.path.isfile(path) and os.path.getsize(path) > 1:
+                        broken["left"] -= 1
+                        return _Slice(f, os.path.getsize(path) // 2)
+                return f
+            size = os.path.getsize(path)
+            first, _, last = range_header[len("bytes="):].partition("-")
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+            f = open(path, "rb")
+            f.seek(start)
+            self.send_response(206)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            self.send_header("Content-Length", str(end - start + 1))
+            self.send_header("Accept-Ranges", "bytes")
+            self.end_headers()
+            length = end - start + 1
+            with lock:
+                if broken["left"] and length > 1:
+                    broken["left"] -= 1
+                    length //= 2  # fewer bytes than Content-Length, then the connection closes
+            return _Slice(f, length)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+class AdoptiumStub:
+    """
+    State of a running adoptium_stub: what it serves, and every request it got.
+
+    releases maps feature versions to release names (change them to publish
+    a new build). log has one (path, status, request headers) per request.
+    """
+
+    def __init__(self, releases: Dict[int, str], etags: bool):
+        self.url = ""
+        self.releases = dict(releases)
+        self.etags = etags
+        self.log: List[Any] = []
+
+    def document(self, version: int) -> Optional[Dict[str, Any]]:
+        """Body, ETag and Last-Modified of /v3/assets/latest/<version>/hotspot."""
+        name = self.releases.get(version)
+        if name is None:
+            return None
+        filename = f"OpenJDK{version}U-jdk_x64_linux_hotspot_{name.split('-', 1)[-1]}.tar.gz"
+        body = json.dumps([{"release_name": name, "binary": {"package": {
+            "link": f"{self.url}/downloads/{filename}", "name": filename, "size": 190 * 1024 * 1024,
+            "checksum": hashlib.sha256(name.encode()).hexdigest()}}}]).encode()
+        digest = hashlib.sha256(body).hexdigest()
+        # A different date per body, as a real server's would be
+        from email.utils import formatdate
+        return {"body": body, "etag": f'"{digest[:16]}"' if self.etags else None,
+                "last_modified": formatdate(1700000000 + int(digest[:6], 16), usegmt=True)}
+
+@contextlib.contextmanager
+def adoptium_stub(releases: Dict[int, str], etags: bool = True) -> Iterator[AdoptiumStub]:
+    """
+    Serves /v3/assets/latest/<version>/hotspot for the given releases on a
+    free localhost port, like api.adoptium.net: with ETag (unless etags=False)
+    and Last-Modified, and a 304 for a matching If-None-Match or
+    If-Modified-Since. Yields the AdoptiumStub; its url is the API base URL.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    stub = AdoptiumStub(releases, etags)
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            path = self.path.split("?", 1)[0]
+            parts = path.strip("/").split("/")
+            document = None
+            if len(parts) == 5 and parts[:3] == ["v3", "assets", "latest"] and parts[3].isdigit():
+                document = stub.document(int(parts[3]))
+            if document is None:
+                status = 404
+            elif document["etag"] and "If-None-Match" in self.headers:
+                status = 304 if self.headers["If-None-Match"] == document["etag"] else 200
+            else:
+                status = 304 if self.headers.get("If-Modified-Since") == document["last_modified"] else 200
+            stub.log.append((path, status, dict(self.headers)))
+            self.send_response(status)
+            if document:
+                if document["etag"]:
+                    self.send_header("ETag", document["etag"])
+                self.send_header("Last-Modified", document["last_modified"])
+            if status == 200:
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(document["body"])))
+                self.end_headers()
+                self.wfile.write(document["body"])
+            else:
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    stub.url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield stub
+    finally:
+        server.shutdown()
+        server.server_close()
+
+class _Slice:
+    """First `length` bytes of an open file, for copyfile() in the range handler."""
+
+    def __init__(self, f, length):
+        self._f = f
+        self._left = length
+
+    def read(self, size=-1):
+        if self._left <= 0:
+            return b""
+        size = self._left if size < 0 else min(size, self._left)
+        data = self._f.read(size)
+        self._left -= len(data)
+        return data
+
+    def close(self):
+        self._f.close()
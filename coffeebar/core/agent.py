@@ -0,0 +1,336 @@
+"""
+Resident agent: keeps the JDK inventory in memory and answers JSON queries
+over a local socket, so build wrappers and editor plugins don't pay for a
+Python start, imports and a discovery pass on every lookup.
+
+Protocol: one JSON object per request, one per response, any number per
+connection. On Unix it's newline-delimited over a Unix domain socket that
+only the owner can open, and the client only talks to a socket the user
+owns (another user could otherwise answer with their own JAVA_HOME); on Windows it's a named pipe through
+multiprocessing.connection (with an authkey, since pipes aren't private).
+
+    {"op": "ping"}                          -> {"ok": true, "pid": ..., "jdks": N}
+    {"op": "list"}                          -> {"ok": true, "jdks": [...], "current": path}
+    {"op": "current"}                       -> {"ok": true, "current": path}
+    {"op": "resolve", "query": "17"}        -> {"ok": true, "matches": [...]}
+    {"op": "resolve_project", "directory": d} -> {"ok": true, "jdk": {...} or null}
+    {"op": "install", "versions": [17]}     -> {"ok": true}
+    {"op": "status"}                        -> {"ok": true, "installs": {"17": {...}}}
+    {"op": "shutdown"}                      -> {"ok": true}
+
+The client half (query) only imports socket, and skips even that when no
+agent socket exists, so the fast CLI path stays fast without an agent.
+"""
+import json
+import os
+import sys
+from typing import Any, Dict, Optional
+from . import trace
+
+PROTOCOL = 1
+# Unix socket paths are limited to ~104-108 bytes
+_MAX_SOCKET_PATH = 100
+# An install in one of these is still running (a new request for it is ignored)
+_ACTIVE_PHASES = ("queued", "metadata", "download", "verify", "extract", "finalize")
+
+def agent_address() -> str:
+    """Where the agent listens: a Unix socket in the cache dir, or a per-user named pipe."""
+    if os.name == "nt":
+        import getpass
+        return r"\\.\pipe\coffeebar-agent-" + getpass.getuser()
+    from . import paths
+    path = str(paths.cache_dir() / "agent.sock")
+    if len(path) > _MAX_SOCKET_PATH:
+        # Somewhere private and short: the session's runtime dir (0700 by spec), else our own dir in /tmp
+        runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+        path = os.path.join(runtime_dir, "coffeebar-agent.sock") if runtime_dir else ""
+        if not path or len(path) > _MAX_SOCKET_PATH:
+            import tempfile
+            path = os.path.join(tempfile.gettempdir(), f"coffeebar-{os.getuid()}", "agent.sock")
+    return path
+
+def _owned_socket(path: str) -> bool:
+    """True if path is a socket (not a symlink to one) owned by this user. Raises OSError if it doesn't exist."""
+    import stat
+    st = os.lstat(path)
+    return stat.S_ISSOCK(st.st_mode) and st.st_uid == os.getuid()
+
+def _private_dir(path: str):
+    """Creates path with mode 0700, or checks that an existing one is ours and closed to others."""
+    import stat
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid():
+        raise RuntimeError(f"{path} is not a directory owned by this user; not putting the agent socket there")
+    if st.st_mode & 0o077:
+        os.chmod(path, 0o700)
+
+def _authkey() -> bytes:
+    """Shared secret for the Windows pipe, readable only by the user."""
+    from . import paths
+    key_file = paths.cache_dir() / "agent.key"
+    try:
+        return key_file.read_bytes()
+    except OSError:
+        key = os.urandom(32)
+        key_file.parent.mkdir(parents=True, exist_ok=True)
+        key_file.write_bytes(key)
+        return key
+
+def disabled() -> bool:
+    return os.environ.get("COFFEEBAR_NO_AGENT", "") not in ("", "0")
+
+def query(request: Dict[str, Any], timeout: float = 2.0) -> Optional[Dict[str, Any]]:
+    """
+    Sends one request to the running agent. Returns its response, or None if
+    no agent is running (or it didn't answer), in which case callers do the work themselves.
+    """
+    if disabled():
+        return None
+    with trace.span("agent.query", op=request.get("op")) as span:
+        response = _query(request, timeout)
+        span.set(answered=response is not None)
+        return response
+
+def _query(request, timeout):
+    address = agent_address()
+    try:
+        if os.name == "nt":
+            from multiprocessing.connection import Client
+            with Client(address, family="AF_PIPE", authkey=_authkey()) as conn:
+                conn.send_bytes(json.dumps(request).encode("utf-8"))
+                return json.loads(conn.recv_bytes())
+
+        if not _owned_socket(address):
+            return None
+        import socket
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(address)
+            sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+            data = b""
+            while not data.endswith(b"\n"):
+                chunk = sock.recv(256 * 1024)
+                if not chunk:
+                    return None
+                data += chunk
+        return json.loads(data)
+    except (OSError, EOFError, ValueError):
+        # Not running (no socket), stale socket, or killed mid-answer: fall back to direct mode
+        return None
+
+class AgentServer:
+    """
+    Serves queries from an in-memory inventory that an InventoryWatcher keeps
+    current. Each connection gets a thread; requests never scan or probe.
+    """
+
+    def __init__(self, manager=None, address: Optional[str] = None, watch: bool = True):
+        import threading
+        from .jdk_manager import JdkManager
+        self.manager = manager or JdkManager()
+        self.address = address or agent_address()
+        self.watch = watch
+        self.watcher = None
+        self.jdks = []
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._listener = None
+        self.installs: Dict[int, Dict[str, Any]] = {}
+        self._install_bus = None
+
+    # Inventory
+
+    def load(self):
+        jdks = self.manager.find_jdks()
+        with self._lock:
+            self.jdks = jdks
+
+    def _on_change(self, change):
+        with self._lock:
+            self.jdks = change.jdks
+
+    def current(self) -> Optional[str]:
+        # Read every time: `coffeebar use` in any terminal changes it
+        return self.manager.get_current_jdk()
+
+    # Requests
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        op = request.get("op")
+        try:
+            if op == "ping":
+                return {"ok": True, "pid": os.getpid(), "protocol": PROTOCOL, "jdks": len(self.jdks),
+                        "watcher": self.watcher.kind if self.watcher else None}
+            if op == "list":
+                return {"ok": True, "jdks": [jdk.to_dict() for jdk in self.jdks], "current": self.current()}
+            if op == "current":
+                return {"ok": True, "current": self.current()}
+            if op == "resolve":
+                matches = self.manager.resolve(str(request["query"]), self.jdks)
+                return {"ok": True, "matches": [jdk.to_dict() for jdk in matches]}
+            if op == "resolve_project":
+                jdk = self.manager.resolve_project(request["directory"], self.jdks)
+                return {"ok": True, "jdk": jdk.to_dict() if jdk else None}
+            if op == "install":
+                self.start_install([int(v) for v in request["versions"]])
+                return {"ok": True}
+            if op == "status":
+                with self._lock:
+                    return {"ok": True, "installs": {str(v): dict(s) for v, s in self.installs.items()}}
+            if op == "shutdown":
+                self._stopping.set()
+                return {"ok": True}
+        except (KeyError, TypeError, ValueError) as e:
+            return {"ok": False, "error": f"bad request: {e}"}
+        return {"ok": False, "error": f"unknown op {op!r}"}
+
+    def start_install(self, versions):
+        """Installs in the background; progress shows up in `status`."""
+        import threading
+        from .progress import ProgressBus
+        versions = [v for v in versions if self.installs.get(v, {}).get("phase") not in _ACTIVE_PHASES]
+        if not versions:
+            return
+        with self._lock:
+            for version in versions:
+                self.installs[version] = {"phase": "queued"}
+        if self._install_bus is None:
+            self._install_bus = ProgressBus(min_interval=0.25)
+            self._install_bus.subscribe(self._on_progress)
+        threading.Thread(target=self._run_install, args=(versions,), daemon=True).start()
+
+    def _run_install(self, versions):
+        from . import paths
+        from .install_scheduler import InstallScheduler
+        from .jdk_downloader import JdkDownloader
+
+        def on_done(result):
+            with self._lock:
+                self.installs[result.version].update(path=result.path, error=result.error,
+                                                     warnings=result.report.warnings)
+
+        InstallScheduler(JdkDownloader()).install_many(versions, str(paths.jdks_dir()), self._install_bus, on_done)
+
+    def _on_progress(self, event):
+        with self._lock:
+            self.installs[event.key] = dict(self.installs.get(event.key, {}), phase=event.phase, done=event.done,
+                                            total=event.total, fraction=event.fraction, eta=event.eta)
+
+    # Serving
+
+    def serve_forever(self):
+        """Loads the inventory, starts watching, and answers requests until shutdown."""
+        # The agent's own environment is whatever it was started from, not what
+        # `coffeebar use` has configured since: always read the persisted value
+        os.environ.pop("JAVA_HOME", None)
+        self.load()
+        if self.watch:
+            from .watcher import InventoryWatcher
+            self.watcher = InventoryWatcher(self.manager, self._on_change)
+            self.watcher.start()
+        try:
+            if os.name == "nt":
+                self._serve_pipe()
+            else:
+                self._serve_unix()
+        finally:
+            if self.watcher:
+                self.watcher.stop()
+
+    def _serve_unix(self):
+        import socket
+        import threading
+        if query({"op": "ping"}, timeout=0.5) is not None:
+            raise RuntimeError(f"An agent is already running on {self.address}")
+        directory = os.path.dirname(self.address)
+        os.makedirs(os.path.dirname(directory), exist_ok=True)
+        _private_dir(directory)
+        try:
+            if not _owned_socket(self.address):
+                raise RuntimeError(f"{self.address} exists and is not this user's agent socket")
+            os.remove(self.address)  # left behind by an agent that didn't shut down cleanly
+        except FileNotFoundError:
+            pass
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)  # owner-only from the moment it exists
+        try:
+            sock.bind(self.address)
+        finally:
+            os.umask(old_umask)
+        os.chmod(self.address, 0o600)  # umask isn't honoured for sockets everywhere
+        sock.listen(32)
+        sock.settimeout(0.5)
+        self._listener = sock
+        try:
+            while not self._stopping.is_set():
+                try:
+                    conn, _ = sock.accept()
+                except socket.timeout:
+                    continue
+                conn.settimeout(None)
+                threading.Thread(target=self._handle_unix, args=(conn,), daemon=True).start()
+        finally:
+            sock.close()
+            try:
+                if _owned_socket(self.address):
+                    os.remove(self.address)
+            except OSError:
+                pass
+
+    def _handle_unix(self, conn):
+        with conn, conn.makefile("rwb") as stream:
+            for line in stream:
+                try:
+                    response = self.handle(json.loads(line))
+                except ValueError:
+                    response = {"ok": False, "error": "invalid JSON"}
+                stream.write(json.dumps(response).encode("utf-8") + b"\n")
+                stream.flush()
+                if self._stopping.is_set():
+                    return
+
+    def _serve_pipe(self):
+        import threading
+        from multiprocessing.connection import Listener
+        if query({"op": "ping"}, timeout=0.5) is not None:
+            raise RuntimeError(f"An agent is already running on {self.address}")
+        with Listener(self.address, family="AF_PIPE", authkey=_authkey()) as listener:
+            self._listener = listener
+            while not self._stopping.is_set():
+                try:
+                    conn = listener.accept()
+                except (OSError, EOFError):
+                    continue
+                threading.Thread(target=self._handle_pipe, args=(conn,), daemon=True).start()
+
+    def _handle_pipe(self, conn):
+        with conn:
+            while True:
+                try:
+                    data = conn.recv_bytes()
+                except (EOFError, OSError):
+                    return
+                try:
+                    response = self.handle(json.loads(data))
+                except ValueError:
+                    response = {"ok": False, "error": "invalid JSON"}
+                conn.send_bytes(json.dumps(response).encode("utf-8"))
+                if self._stopping.is_set():
+                    # accept() has no timeout on pipes: one more connection lets the loop see the flag
+                    query({"op": "ping"}, timeout=0.5)
+                    return
+
+def spawn_detached() -> int:
+    """Starts `coffeebar agent` in the background, detached from this terminal. Returns its pid."""
+    import subprocess
+    kwargs: Dict[str, Any] = {"stdin": subprocess.DEVNULL, "stdout": subprocess.DEVNULL, "stderr": subprocess.DEVNULL}
+    if os.name == "nt":
+        kwargs["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs["start_new_session"] = True
+    process = subprocess.Popen([sys.executable, "-m", "coffeebar.main", "agent"], **kwargs)
+    return process.pid
@@ -0,0 +1,127 @@
+import hashlib
+import os
+import time
+from typing import List, Optional, Tuple
+from . import paths
+
+MB = 1024 * 1024
+DEFAULT_MAX_MB = 2048
+# Leftover partial downloads (resumable .part files) are dropped after a week
+STALE_TEMP_SECONDS = 7 * 24 * 3600
+
+def file_sha256(path: str) -> str:
+    """SHA-256 of a file on disk (only for archives that didn't come through a hashed stream)."""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(MB), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+class ArchiveCache:
+    """
+    Content-addressed store of downloaded JDK archives.
+
+    Archives live at <root>/<sha256> and are only ever added after their hash
+    has been computed from the bytes actually received, so a cache hit is the
+    exact archive the checksum names. The total size is capped; the least
+    recently used archives (by mtime, bumped on every hit) are evicted first.
+    """
+
+    def __init__(self, root: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.root = root or str(paths.cache_dir() / "archives")
+        if max_bytes is None:
+            from .config import load_config
+            max_bytes = int(load_config().get("archive_cache_mb", DEFAULT_MAX_MB)) * MB
+        self.max_bytes = max_bytes
+
+    def path_for(self, sha256: str) -> str:
+        return os.path.join(self.root, sha256.lower())
+
+    def get(self, sha256: Optional[str]) -> Optional[str]:
+        """Path of the cached archive with this checksum, or None."""
+        if not sha256:
+            return None
+        path = self.path_for(sha256)
+        try:
+            os.utime(path)  # LRU: a hit makes it the most recent
+        except OSError:
+            return None
+        return path
+
+    def temp_path(self, name: str) -> str:
+        """A scratch path inside the cache, on the same filesystem, so put() is a rename."""
+        temp_dir = os.path.join(self.root, "tmp")
+        os.makedirs(temp_dir, exist_ok=True)
+        return os.path.join(temp_dir, name)
+
+    def put(self, sha256: str, source_path: str) -> Optional[str]:
+        """
+        Moves a verified archive into the cache. Returns its cached path, or None
+        if it doesn't fit under the size cap (the source is removed either way).
+        """
+        path = self.path_for(sha256)
+        if os.path.getsize(source_path) > self.max_bytes:
+            os.remove(source_path)
+            return None
+        os.makedirs(self.root, exist_ok=True)
+        os.replace(source_path, path)
+        os.utime(path)
+        self.evict(keep=path)
+        return path
+
+    def entries(self) -> List[Tuple[str, int, float]]:
+        """(path, size, last_used) of every cached archive, least recently used first."""
+        entries = []
+        try:
+            with os.scandir(self.root) as it:
+                for entry in it:
+                    if entry.is_file(follow_symlinks=False) and len(entry.name) == 64:
+                        st = entry.stat()
+                        entries.append((entry.path, st.st_size, st.st_mtime))
+        except OSError:
+            return []
+        entries.sort(key=lambda e: e[2])
+        return entries
+
+    def total_size(self) -> int:
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """Removes least recently used archives until the cache fits its cap. Returns bytes freed."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        freed = 0
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            freed += size
+        self._clean_temp()
+        return freed
+
+    def clear(self) -> int:
+        freed = 0
+        for path, size, _ in self.entries():
+            try:
+                os.remove(path)
+                freed += size
+            except OSError:
+                pass
+        return freed
+
+    def _clean_temp(self):
+        temp_dir = os.path.join(self.root, "tmp")
+        cutoff = time.time() - STALE_TEMP_SECONDS
+        try:
+            with os.scandir(temp_dir) as it:
+                for entry in it:
+                    if entry.is_file(follow_symlinks=False) and entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+        except OSError:
+            pass
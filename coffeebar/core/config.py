@@ -0,0 +1,40 @@
+import json
+from typing import Any, Dict
+from . import paths
+
+DEFAULTS: Dict[str, Any] = {
+    # Extra discovery roots added by the user (coffeebar add-root / GUI "Add search path")
+    "search_paths": [],
+    # How many directory levels below each root are searched for JDK homes
+    "scan_depth": 2,
+    # Size cap of the downloaded-archive cache (least recently used archives are evicted)
+    "archive_cache_mb": 2048,
+    # Keep the GUI list live: watch the search paths for JDKs being added or removed
+    "watch_inventory": True,
+    # Share identical files between new installs and the JDKs already installed: "off", "auto" (reflink,
+    # else hardlink), "reflink" or "hardlink". Off by default: it hashes every file of the new JDK once more
+    "dedupe": "off",
+    # `coffeebar prune` retention: newest builds kept per Java version, days a used JDK is kept,
+    # cap on the install root's total size (0: none), and whether to prune after every install
+    "prune_keep_per_version": 2,
+    "prune_keep_used_days": 30,
+    "prune_max_total_mb": 0,
+    "prune_after_install": False,
+}
+
+def config_file():
+    return paths.config_dir() / "config.json"
+
+def load_config() -> Dict[str, Any]:
+    """Loads the user configuration, filling in defaults for missing keys."""
+    config = {key: (list(value) if isinstance(value, list) else value) for key, value in DEFAULTS.items()}
+    try:
+        with open(config_file(), "r", encoding="utf-8") as f:
+            config.update(json.load(f))
+    except (OSError, ValueError):
+        pass
+    return config
+
+def save_config(config: Dict[str, Any]):
+    """Persists the user configuration."""
+    paths.atomic_write_text(config_file(), json.dumps(config, indent=2))
@@ -0,0 +1,263 @@
+"""
+Content-addressed deduplication of JDK homes.
+
+Patch releases of one JDK share most of their bytes (lib/modules, legal/,
+native libraries). Every file is hashed and looked up in a store holding
+one hardlink per distinct content, <root>/.coffeebar-store/<sha256[:2]>/<sha256>,
+kept next to the homes because links and clones only work within one
+filesystem (discovery skips dot folders). A file whose content is already
+stored is replaced by a reflink of the stored copy (copy-on-write clone:
+Btrfs, XFS, APFS) or, where the filesystem can't clone, a hardlink to it.
+New content is hardlinked into the store, which takes no space.
+
+Hardlinked files share an inode, so an in-place write to one shows up in
+all of them: the files JDK tools edit (cacerts, conf/) are never touched.
+Stored objects nothing links to any more are removed by ContentStore.prune.
+"""
+import errno
+import os
+import stat
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+from .archive_cache import file_sha256
+
+STORE_DIR = ".coffeebar-store"
+MODES = ("auto", "reflink", "hardlink")
+# Smaller files save less than the inode and hashing they cost
+MIN_SIZE = 4096
+# Edited in place (keytool, admins): a shared inode would leak the edit into every JDK
+_MUTABLE_DIRS = tuple(os.path.join(*parts) + os.sep for parts in (
+    ("conf",), ("lib", "security"), ("lib", "management"), ("jre", "lib", "security"), ("jre", "lib", "management"),
+))
+# linux/fs.h: _IOW(0x94, 9, int)
+_FICLONE = 0x40049409
+_NO_REFLINK = (errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.EXDEV, errno.ENOSYS)
+
+@dataclass
+class DedupeStats:
+    """What deduplicating one home did (or, in a dry run, would do)."""
+    home: str
+    files: int = 0          # files large enough to consider
+    scanned_bytes: int = 0
+    linked: int = 0         # files now sharing storage with another copy
+    saved_bytes: int = 0
+    shared_bytes: int = 0   # already shared before this run
+    method: str = ""        # "reflink" or "hardlink", whichever was used
+    seconds: float = 0.0
+
+def reflink(src: str, dst: str):
+    """Creates dst as a copy-on-write clone of src. Raises OSError if the filesystem can't clone."""
+    if sys.platform == "darwin":
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+        if libc.clonefile(os.fsencode(src), os.fsencode(dst), 0) != 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code), dst)
+        return
+    if not sys.platform.startswith("linux"):
+        raise OSError(errno.EOPNOTSUPP, "reflinks are not supported on this platform", dst)
+    import fcntl
+    with open(src, "rb") as source:
+        fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        try:
+            fcntl.ioctl(fd, _FICLONE, source.fileno())
+        except OSError:
+            os.close(fd)
+            os.remove(dst)
+            raise
+        os.close(fd)
+
+class ContentStore:
+    """Hardlinks to one copy of each distinct file content, named by SHA-256."""
+
+    def __init__(self, root: str):
+        self.root = os.path.join(root, STORE_DIR)
+
+    @classmethod
+    def for_home(cls, home: str) -> "ContentStore":
+        """The store shared by the homes in home's parent folder."""
+        return cls(os.path.dirname(os.path.abspath(home)))
+
+    def path_for(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest)
+
+    def add(self, path: str, digest: str) -> bool:
+        """Records path as the copy of its content. Returns False if it can't be linked (other filesystem, ...)."""
+        target = self.path_for(digest)
+        try:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.link(path, target)
+            return True
+        except FileExistsError:
+            return True
+        except OSError:
+            return False
+
+    def objects(self) -> Iterator[Tuple[str, os.stat_result]]:
+        try:
+            buckets = os.scandir(self.root)
+        except OSError:
+            return
+        with buckets:
+            for bucket in buckets:
+                if not bucket.is_dir(follow_symlinks=False):
+                    continue
+                with os.scandir(bucket.path) as it:
+                    for entry in it:
+                        yield entry.path, entry.stat(follow_symlinks=False)
+
+    def prune(self) -> Tuple[int, int]:
+        """Removes objects no JDK links to any more. Returns (objects, bytes) removed."""
+        removed = freed = 0
+        for path, st in list(self.objects()):
+            if st.st_nlink <= 1:
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                removed += 1
+                freed += st.st_size
+        return removed, freed
+
+class Deduplicator:
+    """
+    Shares identical files between a home and the store.
+
+    mode "auto" clones where the filesystem supports it and hardlinks
+    otherwise; "reflink" and "hardlink" use only that method. With
+    dry_run=True nothing is written and the stats say what would be saved.
+    """
+
+    def __init__(self, store: ContentStore, mode: str = "auto", min_size: int = MIN_SIZE,
+                 dry_run: bool = False, workers: Optional[int] = None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown dedupe mode '{mode}'. Choose one of: {', '.join(MODES)}")
+        self.store = store
+        self.mode = mode
+        self.min_size = min_size
+        self.dry_run = dry_run
+        self.workers = workers or min(8, os.cpu_count() or 1)
+        self._can_reflink: Optional[bool] = False if mode == "hardlink" else None
+        # Dry runs: contents seen so far, as if they had been added to the store
+        self._seen: Dict[str, int] = {}
+
+    def candidates(self, home: str) -> List[Tuple[str, os.stat_result]]:
+        files = []
+        for directory, dirs, names in os.walk(home):
+            relative = os.path.relpath(directory, home) + os.sep
+            if relative.startswith(_MUTABLE_DIRS):
+                dirs[:] = []
+                continue
+            for name in names:
+                if name.endswith(".coffeebar-dedupe"):
+                    continue  # left over by an interrupted run
+                path = os.path.join(directory, name)
+                try:
+                    st = os.lstat(path)
+                except OSError:
+                    continue
+                if stat.S_ISREG(st.st_mode) and st.st_size >= self.min_size:
+                    files.append((path, st))
+        return files
+
+    def run(self, home: str) -> DedupeStats:
+        started = time.perf_counter()
+        stats = DedupeStats(home)
+        files = self.candidates(home)
+        stats.files = len(files)
+        stats.scanned_bytes = sum(st.st_size for _, st in files)
+
+        # Hashing dominates; hashlib releases the GIL on large reads
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            digests = pool.map(lambda item: _hash(item[0]), files)
+            for (path, st), digest in zip(files, digests):
+                if digest is None:
+                    continue
+                self._dedupe_file(path, st, digest, stats)
+
+        stats.seconds = time.perf_counter() - started
+        return stats
+
+    def _dedupe_file(self, path, st, digest, stats):
+        stored = self.store.path_for(digest)
+        try:
+            existing = os.stat(stored)
+        except OSError:
+            existing = None
+        if existing is None:
+            if self.dry_run:
+                if digest in self._seen:
+                    stats.linked += 1
+                    stats.saved_bytes += st.st_size
+                else:
+                    self._seen[digest] = st.st_size
+            else:
+                self.store.add(path, digest)
+            return
+        if (existing.st_ino, existing.st_dev) == (st.st_ino, st.st_dev):
+            stats.shared_bytes += st.st_size
+            return
+        if existing.st_size != st.st_size:
+            return  # damaged store object; leave the file alone
+        if self.dry_run or self._replace(path, st, stored, existing, stats):
+            stats.linked += 1
+            stats.saved_bytes += st.st_size
+
+    def _replace(self, path, st, stored, existing, stats) -> bool:
+        """Swaps path for a clone of / link to stored. The file is replaced by a rename, never half-written."""
+        temp = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.coffeebar-dedupe")
+        if self._can_reflink is not False:
+            try:
+                reflink(stored, temp)
+                os.chmod(temp, stat.S_IMODE(st.st_mode))
+                os.utime(temp, ns=(st.st_atime_ns, st.st_mtime_ns))
+                os.replace(temp, path)
+                self._can_reflink = True
+                stats.method = "reflink"
+                return True
+            except OSError as e:
+                _remove(temp)
+                if self._can_reflink is None and e.errno in _NO_REFLINK:
+                    self._can_reflink = False  # this filesystem can't; stop trying
+                if self.mode == "reflink" or self._can_reflink:
+                    return False
+        if stat.S_IMODE(existing.st_mode) != stat.S_IMODE(st.st_mode):
+            return False  # a shared inode has one set of permissions
+        try:
+            os.link(stored, temp)
+            os.replace(temp, path)
+        except OSError:
+            # EMLINK (link count limit), read-only home, ...
+            _remove(temp)
+            return False
+        stats.method = "hardlink"
+        return True
+
+def _hash(path: str) -> Optional[str]:
+    try:
+        return file_sha256(path)
+    except OSError:
+        return None
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def dedupe_homes(homes: List[str], mode: str = "auto", dry_run: bool = False) -> List[DedupeStats]:
+    """Deduplicates homes against each other, one store per parent folder. Prunes unused objects afterwards."""
+    stores: Dict[str, Deduplicator] = {}
+    results = []
+    for home in homes:
+        parent = os.path.dirname(os.path.abspath(home))
+        if parent not in stores:
+            stores[parent] = Deduplicator(ContentStore(parent), mode, dry_run=dry_run)
+        results.append(stores[parent].run(home))
+    if not dry_run:
+        for deduplicator in stores.values():
+            deduplicator.store.prune()
+    return results
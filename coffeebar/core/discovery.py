@@ -0,0 +1,171 @@
+import os
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from .jdk_index import dir_signature
+from .jdk_probe import java_executable
+from . import paths
+
+DEFAULT_DEPTH = 2
+# Directory listings are I/O bound (and very latency bound on NFS), so oversubscribe the CPUs
+DEFAULT_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+# Hidden folders and in-progress installs (e.g. _temp_extract) are never JDK homes
+SKIP_PREFIXES = (".", "_temp")
+
+def default_roots() -> List[str]:
+    """Well-known JDK install locations for the current OS."""
+    home = str(Path.home())
+    roots = [
+        str(paths.jdks_dir()),                                   # IntelliJ / CoffeeBar installs
+        os.path.join(home, ".sdkman", "candidates", "java"),      # SDKMAN
+        os.path.join(home, ".asdf", "installs", "java"),          # asdf-java
+        os.path.join(home, ".jabba", "jdk"),                      # jabba
+    ]
+
+    if os.name == "nt":
+        for env_var, default in (("ProgramFiles", "C:\\Program Files"), ("ProgramFiles(x86)", "C:\\Program Files (x86)")):
+            program_files = os.environ.get(env_var, default)
+            for vendor in ("Java", "Eclipse Adoptium", "Zulu", "Microsoft", "Amazon Corretto", "BellSoft"):
+                roots.append(os.path.join(program_files, vendor))
+    elif sys.platform == "darwin":
+        roots += [
+            "/Library/Java/JavaVirtualMachines",
+            os.path.join(home, "Library", "Java", "JavaVirtualMachines"),
+        ]
+    else:
+        roots += ["/usr/lib/jvm", "/usr/java", "/opt/java", "/opt/jdk"]
+        alternative = _alternatives_home()
+        if alternative:
+            roots.append(alternative)
+
+    return roots
+
+def _alternatives_home() -> Optional[str]:
+    """JDK home selected by update-alternatives (/etc/alternatives/java -> .../bin/java)."""
+    link = "/etc/alternatives/java"
+    if not os.path.islink(link):
+        return None
+    home = os.path.dirname(os.path.dirname(os.path.realpath(link)))
+    # JDK 8 points at <home>/jre/bin/java
+    if os.path.basename(home) == "jre" and java_executable(os.path.dirname(home)):
+        home = os.path.dirname(home)
+    return home
+
+def find_home(path: str) -> Optional[str]:
+    """
+    Returns the JDK home contained in `path` according to the per-OS layout rules,
+    or None if `path` is not a JDK.
+
+    - Plain layout: <path>/bin/java(.exe)
+    - macOS bundle: <path>/Contents/Home/bin/java
+    """
+    if java_executable(path):
+        return path
+    bundle_home = os.path.join(path, "Contents", "Home")
+    if java_executable(bundle_home):
+        return bundle_home
+    return None
+
+@dataclass
+class RootScan:
+    """Result of scanning one discovery root."""
+    root: str
+    homes: List[str] = field(default_factory=list)                 # real paths, no duplicates
+    aliases: Dict[str, List[str]] = field(default_factory=dict)    # real path -> symlinked paths
+    dirs: Dict[str, Optional[List[int]]] = field(default_factory=dict)  # visited dir -> signature
+
+    def add_home(self, home: str):
+        real = os.path.realpath(home)
+        if real not in self.homes:
+            self.homes.append(real)
+        if os.path.normcase(real) != os.path.normcase(home):
+            self.aliases.setdefault(real, [])
+            if home not in self.aliases[real]:
+                self.aliases[real].append(home)
+
+class DiscoveryScanner:
+    """
+    Scans discovery roots for JDK homes on a thread pool.
+
+    The scan is breadth-first and level-synchronous: every directory of the
+    current depth, across all roots, is listed concurrently, so a slow (cold
+    NFS) root does not serialize the others.
+    """
+
+    def __init__(self, max_depth: int = DEFAULT_DEPTH, max_workers: int = DEFAULT_WORKERS):
+        self.max_depth = max_depth
+        self.max_workers = max_workers
+
+    def scan(self, roots: List[str]) -> Dict[str, RootScan]:
+        results = {root: RootScan(root) for root in roots}
+        frontier = [(root, root, 0) for root in roots]
+        if not frontier:
+            return results
+
+        # Imported lazily: warm runs served from the index never need a thread pool
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while frontier:
+                next_frontier = []
+                for (root, path, depth), (signature, homes, subdirs) in zip(frontier, pool.map(self._visit, frontier)):
+                    scan = results[root]
+                    scan.dirs[path] = signature
+                    for home in homes:
+                        scan.add_home(home)
+                    if depth < self.max_depth:
+                        next_frontier.extend((root, subdir, depth + 1) for subdir in subdirs)
+                frontier = next_frontier
+        return results
+
+    def map(self, func: Callable, items: List) -> List:
+        """Runs func over items on a thread pool (used to probe freshly found homes)."""
+        if len(items) <= 1:
+            return [func(item) for item in items]
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items))) as pool:
+            return list(pool.map(func, items))
+
+    def imap(self, func: Callable, items: List) -> Iterator:
+        """Like map, but yields each result as soon as it is ready (completion order)."""
+        if len(items) <= 1:
+            for item in items:
+                yield func(item)
+            return
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items))) as pool:
+            for future in as_completed([pool.submit(func, item) for item in items]):
+                yield future.result()
+
+    def _visit(self, item: Tuple[str, str, int]):
+        """Lists one directory. Returns (signature, homes, subdirs to descend into)."""
+        root, path, depth = item
+        signature = dir_signature(path)
+        if signature is None:
+            return None, [], []
+
+        if depth == 0:
+            # A root may itself be a JDK home (e.g. a user-added path or the alternatives link)
+            home = find_home(path)
+            if home:
+                return signature, [home], []
+
+        homes, subdirs = [], []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.name.startswith(SKIP_PREFIXES) or not entry.is_dir():
+                            continue
+                        home = find_home(entry.path)
+                        if home:
+                            homes.append(home)
+                        elif not entry.is_symlink():
+                            # Never descend through symlinks: avoids loops and re-scanning
+                            # trees that are reachable through their real path anyway
+                            subdirs.append(entry.path)
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        return signature, homes, subdirs
@@ -0,0 +1,391 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Iterator, List, Optional
+import requests
+from requests.adapters import HTTPAdapter
+
+MB = 1024 * 1024
+
+@dataclass
+class DownloadStats:
+    """What a download cost; see JdkDownloader.download_file and InstallReport."""
+    total_bytes: int = 0
+    fetched_bytes: int = 0   # bytes transferred by this run (less than total when resuming)
+    resumed_bytes: int = 0   # bytes already on disk from an interrupted run
+    seconds: float = 0.0
+    segments: int = 1
+    retries: int = 0
+    ranged: bool = False     # False when the server refused Range and we streamed once
+    sha256: Optional[str] = None  # hex digest of the complete file, hashed as it arrived
+
+    @property
+    def throughput(self) -> float:
+        """Bytes per second actually transferred."""
+        return self.fetched_bytes / self.seconds if self.seconds > 0 else 0.0
+
+class DownloadError(Exception):
+    pass
+
+class RangeNotSupported(DownloadError):
+    pass
+
+class ChecksumMismatch(DownloadError):
+    pass
+
+class SegmentedDownloader:
+    """
+    Downloads a file as several HTTP Range segments fetched concurrently.
+
+    Data goes into `<dest>.part`, preallocated to the final size, with each
+    worker writing at its own offsets through its own file handle. Progress of
+    every segment is persisted to `<dest>.part.json`, so an interrupted download
+    resumes where it stopped (as long as the server still reports the same size
+    and validator). Servers that don't support ranges get a single stream.
+    """
+
+    def __init__(self, session: Optional[requests.Session] = None, segments: int = 4,
+                 min_segment_size: int = 8 * MB, chunk_size: int = 256 * 1024,
+                 max_retries: int = 5, timeout=(10, 60)):
+        self.segments = max(1, segments)
+        self.min_segment_size = min_segment_size
+        self.chunk_size = chunk_size
+        self.max_retries = max_retries
+        self.timeout = timeout
+        if session is None:
+            session = requests.Session()
+            # One pooled connection per segment, reused across retries
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.segments)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self.session = session
+
+    def download(self, url: str, dest_path: str,
+                 progress_callback: Optional[Callable[[int, int], None]] = None) -> DownloadStats:
+        started = time.monotonic()
+        stats = DownloadStats()
+
+        # A 1-byte range request tells us the size, range support and the final URL
+        # (Adoptium redirects to GitHub) in one round-trip
+        probe = self.session.get(url, headers={"Range": "bytes=0-0"}, stream=True,
+                                 timeout=self.timeout, allow_redirects=True)
+        if probe.status_code != 416:  # some servers refuse any range of an empty file
+            probe.raise_for_status()
+
+        total = _range_total(probe)
+        if not total:
+            # No range support, or an empty or unknown size (nothing to split): one stream
+            if probe.status_code != 200:
+                probe.close()
+                probe = self.session.get(url, stream=True, timeout=self.timeout)
+                probe.raise_for_status()
+            self._single_stream(probe, dest_path, stats, progress_callback)
+        else:
+            validator = probe.headers.get("ETag") or probe.headers.get("Last-Modified") or ""
+            final_url = probe.url
+            probe.close()
+            try:
+                self._segmented(final_url, dest_path, total, validator, stats, progress_callback)
+            except RangeNotSupported:
+                # Mirror changed its mind mid-way: start over as a single stream
+                for leftover in (dest_path + ".part", dest_path + ".part.json"):
+                    if os.path.exists(leftover):
+                        os.remove(leftover)
+                stats = DownloadStats(retries=stats.retries)
+                response = self.session.get(url, stream=True, timeout=self.timeout)
+                response.raise_for_status()
+                self._single_stream(response, dest_path, stats, progress_callback)
+
+        stats.seconds = time.monotonic() - started
+        return stats
+
+    # Single stream
+
+    def _single_stream(self, response, dest_path, stats, progress_callback):
+        total = int(response.headers.get("content-length", 0))
+        part_path = dest_path + ".part"
+        downloaded = 0
+        hasher = hashlib.sha256()
+        with response, open(part_path, "wb") as f:
+            for chunk in response.iter_content(chunk_size=self.chunk_size):
+                if chunk:
+                    f.write(chunk)
+                    hasher.update(chunk)
+                    downloaded += len(chunk)
+                    if progress_callback:
+                        progress_callback(downloaded, total)
+
+        if total and downloaded != total:
+            raise DownloadError(f"Incomplete download: got {downloaded} of {total} bytes")
+        os.replace(part_path, dest_path)
+        stats.total_bytes = stats.fetched_bytes = downloaded
+        stats.sha256 = hasher.hexdigest()
+
+    # Segmented
+
+    def _plan(self, total: int) -> List[List[int]]:
+        """Splits [0, total) into [start, end_inclusive, done] segments."""
+        count = max(1, min(self.segments, total // self.min_segment_size))
+        size = -(-total // count)
+        return [[start, min(start + size, total) - 1, 0] for start in range(0, total, size)]
+
+    def _load_state(self, state_path, part_path, total, validator) -> Optional[List[List[int]]]:
+        try:
+            with open(state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (state.get("total") != total or state.get("validator") != validator
+                or not os.path.exists(part_path) or os.path.getsize(part_path) != total):
+            return None
+        return state["segments"]
+
+    def _segmented(self, url, dest_path, total, validator, stats, progress_callback):
+        part_path = dest_path + ".part"
+        state_path = dest_path + ".part.json"
+
+        segments = self._load_state(state_path, part_path, total, validator)
+        if segments is None:
+            segments = self._plan(total)
+            with open(part_path, "wb") as f:
+                # Reserve the space up front: fails fast on a full disk and keeps the file contiguous
+                if hasattr(os, "posix_fallocate") and total:
+                    try:
+                        os.posix_fallocate(f.fileno(), 0, total)
+                    except OSError:
+                        f.truncate(total)
+                else:
+                    f.truncate(total)
+
+        stats.total_bytes = total
+        stats.ranged = True
+        stats.segments = len(segments)
+        stats.resumed_bytes = sum(seg[2] for seg in segments)
+
+        lock = threading.Lock()
+        progress = {"done": stats.resumed_bytes, "last_save": time.monotonic()}
+        hasher = _HashFrontier(part_path, segments)
+
+        def save_state():
+            state = {"url": url, "total": total, "validator": validator, "segments": segments}
+            tmp_path = state_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, state_path)
+
+        def on_bytes(segment, offset, chunk):
+            count = len(chunk)
+            with lock:
+                segment[2] += count
+                hasher.feed(offset, chunk)
+                progress["done"] += count
+                stats.fetched_bytes += count
+                now = time.monotonic()
+                if now - progress["last_save"] >= 1.0:
+                    progress["last_save"] = now
+                    save_state()
+                if progress_callback:
+                    progress_callback(progress["done"], total)
+
+        def on_retry():
+            with lock:
+                stats.retries += 1
+
+        with lock:
+            save_state()
+            hasher.catch_up()
+        if progress_callback and stats.resumed_bytes:
+            progress_callback(stats.resumed_bytes, total)
+
+        pending = [seg for seg in segments if seg[0] + seg[2] <= seg[1]]
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, len(pending))) as pool:
+                for future in [pool.submit(self._fetch_segment, url, part_path, seg, on_bytes, on_retry)
+                               for seg in pending]:
+                    future.result()
+        finally:
+            with lock:
+                save_state()
+
+        hasher.catch_up()
+        stats.sha256 = hasher.hexdigest()
+        os.replace(part_path, dest_path)
+        os.remove(state_path)
+
+    def _fetch_segment(self, url, part_path, segment, on_bytes, on_retry):
+        attempt = 0
+        # Unbuffered: bytes counted in the state file must already be in the OS,
+        # or a killed process would resume over a hole
+        with open(part_path, "r+b", buffering=0) as f:
+            while True:
+                start, end, done = segment
+                offset = start + done
+                if offset > end:
+                    return
+                try:
+                    headers = {"Range": f"bytes={offset}-{end}"}
+                    with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+                        response.raise_for_status()
+                        if response.status_code != 206:
+                            raise RangeNotSupported("Server stopped honouring Range requests")
+                        f.seek(offset)
+                        for chunk in response.iter_content(chunk_size=self.chunk_size):
+                            if not chunk:
+                                continue
+                            # Never write past the segment, even if the server over-delivers
+                            chunk = chunk[:end + 1 - (start + segment[2])]
+                            f.write(chunk)
+                            on_bytes(segment, start + segment[2], chunk)
+                            if start + segment[2] > end:
+                                break
+                    if start + segment[2] <= end:
+                        raise DownloadError("Connection closed before the segment was complete")
+                    return
+                except RangeNotSupported:
+                    raise
+                except (requests.RequestException, DownloadError, OSError):
+                    attempt += 1
+                    if attempt > self.max_retries:
+                        raise
+                    on_retry()
+                    time.sleep(min(2 ** attempt * 0.25, 5.0))
+
+def _range_total(response) -> int:
+    """The full size from a 206's Content-Range ("bytes 0-0/1234"); 0 if not a usable partial response."""
+    if response.status_code != 206:
+        return 0
+    size = response.headers.get("Content-Range", "").rpartition("/")[2]
+    return int(size) if size.isdigit() else 0
+
+class ResumableStream:
+    """
+    One streamed GET whose body survives dropped connections, for consumers
+    that need the bytes in order (streaming extraction). After an error the
+    rest is requested with Range from the last byte received, If-Range pinning
+    the same file, up to max_retries times; the caller just sees one stream.
+
+        with ResumableStream(url) as stream:
+            for chunk in stream.chunks(): ...
+
+    stats (a DownloadStats) counts bytes, retries and time. Servers without
+    Range support get no retries: the error is raised.
+    """
+
+    def __init__(self, url: str, session: Optional[requests.Session] = None, chunk_size: int = 256 * 1024,
+                 max_retries: int = 5, timeout=(10, 60)):
+        self.url = url
+        self._own_session = session is None
+        self.session = session or requests.Session()
+        self.chunk_size = chunk_size
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.total = 0  # 0 when the server doesn't say
+        self.stats = DownloadStats()
+        self._response = None
+        self._validator = ""
+        self._started = 0.0
+
+    def __enter__(self):
+        self._started = time.monotonic()
+        self._response = self.session.get(self.url, stream=True, timeout=self.timeout)
+        self._response.raise_for_status()
+        self.total = int(self._response.headers.get("content-length", 0))
+        self.stats.total_bytes = self.total
+        self.stats.ranged = self._response.headers.get("Accept-Ranges", "").lower() == "bytes"
+        self._validator = self._response.headers.get("ETag") or self._response.headers.get("Last-Modified") or ""
+        # Redirected (Adoptium -> GitHub): resume from where the bytes actually came from
+        self.url = self._response.url
+        return self
+
+    def __exit__(self, *exc):
+        if self._response is not None:
+            self._response.close()
+        if self._own_session:
+            self.session.close()
+        return False
+
+    def chunks(self) -> Iterator[bytes]:
+        attempt = 0
+        while True:
+            try:
+                if attempt:
+                    self._resume()
+                for chunk in self._response.iter_content(chunk_size=self.chunk_size):
+                    if chunk:
+                        self.stats.fetched_bytes += len(chunk)
+                        yield chunk
+                if self.total and self.stats.fetched_bytes < self.total:
+                    raise DownloadError("Connection closed before the download was complete")
+                self.stats.seconds = time.monotonic() - self._started
+                return
+            except RangeNotSupported:
+                raise
+            except (requests.RequestException, DownloadError):
+                attempt += 1
+                if not self.total or attempt > self.max_retries:
+                    raise
+                self.stats.retries += 1
+                time.sleep(min(2 ** attempt * 0.25, 5.0))
+
+    def _resume(self):
+        self._response.close()
+        offset = self.stats.fetched_bytes
+        headers = {"Range": f"bytes={offset}-"}
+        if self._validator:
+            headers["If-Range"] = self._validator
+        response = self.session.get(self.url, headers=headers, stream=True, timeout=self.timeout)
+        self._response = response
+        response.raise_for_status()
+        if response.status_code != 206 or not response.headers.get("Content-Range", "").startswith(f"bytes {offset}-"):
+            # No ranges, or the file changed (If-Range): the bytes already consumed can't be continued
+            raise RangeNotSupported("Server can't resume the download")
+
+class _HashFrontier:
+    """
+    SHA-256 of a file being written out of order by several segments.
+
+    Chunks that land exactly at the hashed frontier (the leading segment, and
+    each following one once the frontier reaches it) are hashed straight from
+    memory. Only bytes a later segment wrote before the frontier arrived are
+    read back, from the page cache, when the frontier crosses into it.
+    Callers serialize access (SegmentedDownloader holds its lock).
+    """
+
+    def __init__(self, path: str, segments: List[List[int]]):
+        self.path = path
+        self.segments = segments
+        self.position = 0
+        self._hasher = hashlib.sha256()
+
+    def feed(self, offset: int, chunk: bytes):
+        if offset != self.position:
+            return
+        self._hasher.update(chunk)
+        self.position += len(chunk)
+        if any(seg[1] + 1 == self.position for seg in self.segments):
+            self.catch_up()
+
+    def catch_up(self):
+        """Hashes whatever is already on disk contiguously after the frontier."""
+        with open(self.path, "rb") as f:
+            for start, end, done in self.segments:
+                written_end = start + done
+                if not start <= self.position < written_end:
+                    continue
+                f.seek(self.position)
+                while self.position < written_end:
+                    block = f.read(min(MB, written_end - self.position))
+                    if not block:
+                        return
+                    self._hasher.update(block)
+                    self.position += len(block)
+
+    def hexdigest(self) -> str:
+        total = self.segments[-1][1] + 1 if self.segments else 0
+        if self.position != total:
+            raise DownloadError(f"Hashed {self.position} of {total} bytes")
+        return self._hasher.hexdigest()
@@ -0,0 +1,156 @@
+"""
+Where JAVA_HOME and PATH live, per platform.
+
+Changes go through a transaction: variables and PATH entries are collected,
+then written in one go and announced once, and not at all if nothing
+changed. On Windows the announcement (WM_SETTINGCHANGE to every top-level
+window, up to 5 s per hung one) is the expensive part: the first switch
+used to pay for it twice (JAVA_HOME, then Path), every later one once, even
+when re-selecting the JDK that was already active.
+
+    with backend.transaction() as tx:
+        tx.set("JAVA_HOME", path)
+        tx.ensure_on_path(backend.java_bin_entry)
+"""
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+class EnvTransaction:
+    """Pending environment changes. Committed when the with-block exits normally, discarded on an error."""
+
+    def __init__(self, backend: "EnvBackend"):
+        self.backend = backend
+        self.values: Dict[str, Optional[str]] = {}
+        self.path_entries: List[str] = []
+        self.committed = False
+
+    def set(self, name: str, value: str):
+        self.values[name] = value
+
+    def unset(self, name: str):
+        self.values[name] = None
+
+    def ensure_on_path(self, entry: str):
+        """Adds entry to PATH unless it's already there."""
+        if entry not in self.path_entries:
+            self.path_entries.append(entry)
+
+    def commit(self) -> bool:
+        """Writes everything, then notifies once (only if something actually changed)."""
+        if self.committed:
+            return False
+        self.committed = True
+        changed = self.backend.apply(self.values, self.path_entries)
+        if changed:
+            self.backend.notify()
+        return changed
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        return False
+
+class EnvBackend(ABC):
+    """Persistent user environment. Subclasses implement get, apply and (optionally) notify."""
+
+    name = "base"
+    # How PATH refers to the active JDK's bin directory
+    java_bin_entry = ""
+
+    @abstractmethod
+    def get(self, name: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def apply(self, values: Dict[str, Optional[str]], path_entries: List[str]) -> bool:
+        """Persists the changes in one write. Returns True if anything changed."""
+
+    def notify(self):
+        """Tells the rest of the system the environment changed."""
+
+    def transaction(self) -> EnvTransaction:
+        return EnvTransaction(self)
+
+class RegistryEnvBackend(EnvBackend):
+    """HKCU\\Environment, announced with a single WM_SETTINGCHANGE broadcast."""
+
+    name = "registry"
+    java_bin_entry = r"%JAVA_HOME%\bin"
+
+    def get(self, name):
+        from . import registry_utils
+        return registry_utils.get_env_variable(name)
+
+    def apply(self, values, path_entries):
+        from . import registry_utils
+        return registry_utils.apply_env_changes(values, path_entries)
+
+    def notify(self):
+        from . import registry_utils
+        registry_utils.broadcast_settings_change()
+
+class ShellEnvBackend(EnvBackend):
+    """~/.coffeebar_env, sourced by .bashrc/.zshrc. New shells are the only audience, so there's nothing to notify."""
+
+    name = "shell"
+    java_bin_entry = "$JAVA_HOME/bin"
+
+    def get(self, name):
+        from . import shell_utils
+        return shell_utils.get_env_variable(name)
+
+    def apply(self, values, path_entries):
+        from . import shell_utils
+        # The env file's JAVA_HOME block already keeps $JAVA_HOME/bin at the front of PATH
+        entries = [entry for entry in path_entries if entry != self.java_bin_entry]
+        return shell_utils.set_env_variables(values, entries)
+
+class MemoryEnvBackend(EnvBackend):
+    """
+    In-process fake for tests and benchmarks. Counts writes and notifications;
+    write_delay / notify_delay (seconds) simulate a slow registry or broadcast.
+    """
+
+    name = "memory"
+    java_bin_entry = "$JAVA_HOME/bin"
+
+    def __init__(self, values: Optional[Dict[str, str]] = None, write_delay: float = 0.0,
+                 notify_delay: float = 0.0):
+        self.values: Dict[str, str] = dict(values or {})
+        self.path: List[str] = []
+        self.write_delay = write_delay
+        self.notify_delay = notify_delay
+        self.writes = 0
+        self.notifications = 0
+
+    def get(self, name):
+        return self.values.get(name)
+
+    def apply(self, values, path_entries):
+        before = (dict(self.values), list(self.path))
+        for name, value in values.items():
+            if value is None:
+                self.values.pop(name, None)
+            else:
+                self.values[name] = value
+        self.path += [entry for entry in path_entries if entry not in self.path]
+        if (self.values, self.path) == before:
+            return False
+        self.writes += 1
+        if self.write_delay:
+            time.sleep(self.write_delay)
+        return True
+
+    def notify(self):
+        self.notifications += 1
+        if self.notify_delay:
+            time.sleep(self.notify_delay)
+
+def default_backend() -> EnvBackend:
+    """The registry on Windows, the shell env file everywhere else."""
+    return RegistryEnvBackend() if os.name == "nt" else ShellEnvBackend()
@@ -0,0 +1,101 @@
+import os
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from .jdk_downloader import InstallReport
+from .progress import ProgressBus
+from . import trace
+
+@dataclass
+class InstallResult:
+    version: int
+    release: Optional[Dict[str, Any]] = None
+    path: Optional[str] = None
+    error: Optional[str] = None
+    report: Optional[InstallReport] = None  # download stats and the like, for this install only
+
+    @property
+    def ok(self) -> bool:
+        return self.path is not None
+
+class InstallSlots:
+    """
+    Concurrency limits shared by parallel installs.
+
+    Network transfers and extractions are capped separately: a streaming
+    install holds one of each, a cached archive only needs an extraction slot,
+    and a non-streamable archive downloads first and extracts afterwards. So
+    the CPU-bound unpacking of one JDK overlaps with the downloads of others
+    without either kind of work swamping the machine.
+    Slots are always taken network-first, so installs can't deadlock.
+    """
+
+    def __init__(self, max_downloads: int = 3, max_extracts: Optional[int] = None):
+        self.max_downloads = max(1, max_downloads)
+        self.max_extracts = max(1, max_extracts or min(4, (os.cpu_count() or 2) // 2 or 1))
+        self._network = threading.BoundedSemaphore(self.max_downloads)
+        self._extract = threading.BoundedSemaphore(self.max_extracts)
+
+    @contextmanager
+    def network(self):
+        with self._network:
+            yield
+
+    @contextmanager
+    def extract(self):
+        with self._extract:
+            yield
+
+class InstallScheduler:
+    """Installs several JDK versions at once through a JdkDownloader, isolating failures."""
+
+    def __init__(self, downloader, slots: Optional[InstallSlots] = None):
+        self.downloader = downloader
+        self.slots = slots or InstallSlots()
+
+    def install_many(self, versions: Iterable[int], target_root_dir: str,
+                     bus: Optional[ProgressBus] = None,
+                     on_done: Optional[Callable[[InstallResult], None]] = None,
+                     releases: Optional[Dict[int, Optional[Dict[str, Any]]]] = None) -> List[InstallResult]:
+        """
+        Installs every version concurrently (within the slot limits).
+
+        Progress goes to `bus`, one tracker per version (keyed by the version
+        number), from metadata lookup through to done/failed. Events and
+        on_done(result) come from worker threads. Results come back in the
+        order requested; a failed install has .error set and doesn't affect the others.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        versions = list(dict.fromkeys(versions))
+        if not versions:
+            return []
+        bus = bus or ProgressBus()
+        trackers = {version: bus.tracker(version) for version in versions}
+        for tracker in trackers.values():
+            tracker.phase("metadata")
+        if releases is None:
+            # One concurrent round of metadata lookups for all of them
+            with trace.span("metadata", versions=len(versions)):
+                releases = self.downloader.get_latest_releases(versions)
+        os.makedirs(target_root_dir, exist_ok=True)
+
+        def install_one(version):
+            result = InstallResult(version, releases.get(version), report=InstallReport())
+            tracker = trackers[version]
+            try:
+                if not result.release:
+                    raise LookupError(f"No release found for Java {version}")
+                with trace.span("install", version=version):
+                    result.path = self.downloader.install_release(result.release, target_root_dir, slots=self.slots,
+                                                                  tracker=tracker, report=result.report)
+            except Exception as e:
+                result.error = str(e) or type(e).__name__
+            tracker.finish(result.ok, result.error or "")
+            if on_done:
+                on_done(result)
+            return result
+
+        # Threads are cheap waiters here; the slots decide how much runs at once
+        with ThreadPoolExecutor(max_workers=len(versions)) as pool:
+            return list(pool.map(install_one, versions))
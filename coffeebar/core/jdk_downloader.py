@@ -1,104 +1,344 @@
+import contextlib
+import hashlib
 import os
-import requests
-import zipfile
 import shutil
+import threading
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import List, Optional
+from .archive_cache import ArchiveCache, file_sha256
+from .dedupe import DedupeStats
+from .release_metadata import AdoptiumClient
+from .download import ChecksumMismatch, DownloadError, DownloadStats, ResumableStream, SegmentedDownloader
+from .prune import make_staging_dir, release_staging_dir
+from . import progress, stream_extract, trace
+
+@dataclass
+class InstallReport:
+    """
+    What one install did, filled in as it runs. Each call gets its own, so
+    concurrent installs through one JdkDownloader don't see each other's.
+    """
+    # Bytes, retries and time of the transfer; None for an install from the archive cache
+    download: Optional[DownloadStats] = None
+    dedupe: Optional[DedupeStats] = None  # None when dedupe is off or was skipped
+    # Problems that didn't fail the install, for the UI to show once its progress display is done
+    warnings: List[str] = field(default_factory=list)
 
 class JdkDownloader:
-    BASE_URL = "https://api.adoptium.net/v3/assets/latest/{version}/hotspot"
+
+    def __init__(self, archive_cache=None, metadata=None, dedupe=None):
+        self._archive_cache = archive_cache
+        self._metadata = metadata
+        # Dedupe mode (see core.dedupe); None reads it from the config at install time
+        self.dedupe = dedupe
+
+    @property
+    def archive_cache(self):
+        # Built on first use: reads the config for the size cap
+        if self._archive_cache is None:
+            self._archive_cache = ArchiveCache()
+        return self._archive_cache
+
+    @property
+    def metadata(self):
+        if self._metadata is None:
+            self._metadata = AdoptiumClient()
+        return self._metadata
+
+    @property
+    def platform_label(self):
+        """e.g. 'linux x64': what get_latest_release looks up."""
+        return f"{self.metadata.os_name} {self.metadata.arch}"
     
     def get_supported_versions(self):
         # Common LTS versions
         return [8, 11, 17, 21]
 
     def get_latest_release(self, version):
-        """Fetches the download URL for the latest release of the given version (Windows x64 JDK)."""
-        params = {
-            "architecture": "x64",
-            "image_type": "jdk",
-            "os": "windows",
-            "vendor": "eclipse"
-        }
-        url = self.BASE_URL.format(version=version)
+        """Fetches the download info for the latest release of the given version (this OS/arch, cached)."""
         try:
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            if not data:
-                return None
-                
-            # data is a list of binaries (usually one for latest)
-            binary = data[0]["binary"]
-            release_name = data[0]["release_name"]
-            download_url = binary["package"]["link"]
-            size = binary["package"]["size"]
-            
-            return {
-                "version": version,
-                "name": release_name,
-                "url": download_url,
-                "size": size,
-                "filename": data[0]["binary"]["package"]["name"]
-            }
+            with trace.span("metadata", version=version):
+                release = self.metadata.latest_release(version)
+            self.metadata.cache.save()
+            return release
         except Exception as e:
             print(f"Error fetching release info: {e}")
             return None
 
-    def download_file(self, url, dest_path, progress_callback=None):
-        """Downloads file with progress callback (bytes_downloaded, total_bytes)."""
-        response = requests.get(url, stream=True)
-        total_size = int(response.headers.get('content-length', 0))
-        
-        mode = 'wb'
-        downloaded = 0
-        
-        with open(dest_path, mode) as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
-                    downloaded += len(chunk)
-                    if progress_callback:
-                        progress_callback(downloaded, total_size)
+    def get_latest_releases(self, versions=None):
+        """Release info for several versions (default: all supported ones), fetched concurrently."""
+        return self.metadata.latest_releases(versions or self.get_supported_versions())
+
+    def get_cached_releases(self, versions=None):
+        """Release info already on disk, possibly stale; no network access."""
+        return self.metadata.cached_releases(versions or self.get_supported_versions())
+
+    def download_file(self, url, dest_path, progress_callback=None, checksum=None, report=None):
+        """
+        Downloads file with progress callback (bytes_downloaded, total_bytes).
+
+        Large files are fetched as parallel Range segments and resume after an
+        interruption; see SegmentedDownloader. Stats end up in report.download
+        if an InstallReport is given. With a checksum, a file whose SHA-256
+        doesn't match is deleted and ChecksumMismatch is raised.
+        """
+        stats = self._download_verified(url, dest_path, progress_callback, checksum)
+        if report is not None:
+            report.download = stats
         return dest_path
 
-    def install_jdk(self, archive_path, target_root_dir, folder_name):
-        """Extracts the JDK and moves it to the target directory."""
-        # 1. Extract to a temp folder
-        temp_extract_dir = os.path.join(target_root_dir, "_temp_extract")
-        if os.path.exists(temp_extract_dir):
-            shutil.rmtree(temp_extract_dir)
-        os.makedirs(temp_extract_dir)
-        
+    def _download_verified(self, url, dest_path, progress_callback, checksum):
+        with trace.span("download", url=url) as span:
+            stats = SegmentedDownloader().download(url, dest_path, progress_callback)
+            span.set(bytes=os.path.getsize(dest_path))
+        with trace.span("verify"):
+            _verify(stats.sha256, checksum, dest_path)
+        return stats
+
+    def install_folder_name(self, release):
+        """Folder name under the JDK root for a release, e.g. temurin-jdk-17.0.10_7."""
+        # release['name'] often looks like 'jdk-17.0.10+7' which might be invalid chars for folder in some OS or just messy.
+        import re
+        safe_name = re.sub(r'[^a-zA-Z0-9\-\.]', '_', release['name'])
+        return f"temurin-{safe_name}"
+
+    def install_release(self, release, target_root_dir, progress_callback=None, slots=None, tracker=None,
+                        report=None):
+        """Installs a release dict from get_latest_release(s); returns the JDK path."""
+        return self.install_streaming(release['url'], target_root_dir, self.install_folder_name(release),
+                                      release['filename'], progress_callback, release.get('checksum'),
+                                      slots, tracker, report)
+
+    def install_streaming(self, url, target_root_dir, folder_name, filename, progress_callback=None,
+                          checksum=None, slots=None, tracker=None, report=None):
+        """
+        Downloads and extracts in one pass, with no second read of the archive.
+
+        Members are unpacked while later bytes are still arriving, and a
+        dropped connection carries on with a Range request from the last byte
+        received (download.ResumableStream); progress is
+        reported as (bytes_downloaded, total_bytes) like download_file, or
+        through `tracker` (a progress.ProgressTracker) with phases. The bytes
+        are hashed and spooled into the archive cache on the way through.
+        So network bytes are unpacked before their SHA-256 is known, but only
+        into a disposable staging folder (_temp_extract_*, which discovery
+        skips and prune leaves alone while this process runs): it is renamed
+        into place once the checksum matches and deleted otherwise. A cached archive with the same checksum is used instead of
+        the network; it is hashed before anything is extracted from it.
+        Archives that can't be read front-to-back fall back to download_file.
+        `slots` (an InstallSlots) limits concurrent transfers and extractions
+        when several installs run at once. Details of the install go into
+        `report` (an InstallReport), if given.
+        """
+        if tracker is None:
+            tracker = progress.callback_tracker(progress_callback)
+        if report is None:
+            report = InstallReport()
+        kind = stream_extract.archive_kind(filename)
+        cached = self.archive_cache.get(checksum)
+        if cached:
+            tracker.phase("verify", message="cached archive")
+            with trace.span("verify", cached=True):
+                if file_sha256(cached) != checksum.lower():
+                    # Damaged cache entry: never extract it, fetch a fresh copy instead
+                    os.remove(cached)
+                    cached = None
+        staging = make_staging_dir(target_root_dir)
+        spool_path = None
         try:
-            with zipfile.ZipFile(archive_path, 'r') as zip_ref:
-                zip_ref.extractall(temp_extract_dir)
-            
-            # The zip usually contains a single root folder (e.g. jdk-17.0.1+12)
-            extracted_items = os.listdir(temp_extract_dir)
-            if not extracted_items:
-                raise Exception("Empty zip file")
-                
-            jdk_root = os.path.join(temp_extract_dir, extracted_items[0])
-            
-            # Target path
-            final_target_path = os.path.join(target_root_dir, folder_name)
-            
-            if os.path.exists(final_target_path):
-                print(f"Target directory {final_target_path} already exists. Overwriting...")
-                # shutil.rmtree(final_target_path) # Risky to auto-delete? Let's just create unique name or fail
-                # For now, let's append a suffix if exists, to be safe
-                pass 
-
-            # Move logic
-            shutil.move(jdk_root, final_target_path)
-            
-            return final_target_path
-            
+            with contextlib.ExitStack() as held:
+                # Streaming needs both a transfer and an extraction slot; a cache hit only the latter
+                if slots and not cached:
+                    held.enter_context(slots.network())
+                if slots:
+                    held.enter_context(slots.extract())
+
+                if cached:
+                    total = os.path.getsize(cached)
+                    chunks = _file_chunks(cached)
+                    tracker.phase("extract", total, "from cache")
+                else:
+                    # A dropped connection resumes with a Range request; extraction doesn't notice
+                    stream = held.enter_context(ResumableStream(url))
+                    report.download = stream.stats
+                    total = stream.total
+                    chunks = stream.chunks()
+                    spool_path = self.archive_cache.temp_path(f"{os.getpid()}-{threading.get_ident()}.spool")
+                    tracker.phase("download", total)
+
+                if not cached:
+                    hasher = hashlib.sha256()
+                    spool = held.enter_context(open(spool_path, "wb"))
+                    # Hashing and spooling run on the reader's network thread, alongside extraction
+                    chunks = _tee(chunks, hasher, spool)
+                reader = stream_extract.PrefetchReader(chunks, tracker.update)
+                held.callback(reader.close)
+                on_member = lambda name, size: tracker.member(size)
+                # Download and extraction overlap, so this is one span
+                with trace.span("download+extract", kind=kind, cached=bool(cached)) as span:
+                    try:
+                        if kind == "tar.gz":
+                            stream_extract.extract_tar_stream(reader, staging, on_member)
+                        else:
+                            stream_extract.extract_zip_stream(reader, staging, on_member)
+                        # Trailing padding / zip comment: make sure the whole body arrived
+                        reader.drain()
+                        streamed = True
+                    except stream_extract.StreamingUnsupported:
+                        streamed = False
+                    span.set(bytes=reader.received, streamed=streamed)
+
+            if not streamed:
+                return self._install_unstreamable(url, cached, target_root_dir, folder_name,
+                                                  filename, kind, tracker, checksum, slots, report)
+            if total and reader.received != total:
+                raise DownloadError(f"Incomplete download: got {reader.received} of {total} bytes")
+            if not cached:
+                tracker.phase("verify")
+                digest = hasher.hexdigest()
+                _verify(digest, checksum)
+                self.archive_cache.put(digest, spool_path)
+            tracker.phase("finalize")
+            return self._finalize(staging, target_root_dir, folder_name, report)
+        finally:
+            if os.path.exists(staging):
+                shutil.rmtree(staging, ignore_errors=True)
+            if spool_path and os.path.exists(spool_path):
+                os.remove(spool_path)
+
+    def _install_unstreamable(self, url, cached, target_root_dir, folder_name, filename, kind,
+                              tracker, checksum, slots, report):
+        """Zip layouts the stream reader can't handle: whole archive first, then a seekable extract."""
+        if cached:  # already verified by install_streaming
+            archive_path = cached
+        else:
+            # Named after the install, not just the file, so concurrent installs never share a partial download
+            archive_path = self.archive_cache.temp_path(f"{folder_name}-{filename}")
+            with slots.network() if slots else contextlib.nullcontext():
+                tracker.phase("download")
+                stats = report.download = self._download_verified(url, archive_path, tracker.update, checksum)
+        with slots.extract() if slots else contextlib.nullcontext():
+            final_path = self._install_archive(archive_path, target_root_dir, folder_name, kind, tracker, report)
+        if not cached:
+            self.archive_cache.put(stats.sha256, archive_path)
+        return final_path
+
+    def install_jdk(self, archive_path, target_root_dir, folder_name, report=None):
+        """Extracts a downloaded .zip or .tar.gz and moves the JDK to the target directory."""
+        try:
+            return self._install_archive(archive_path, target_root_dir, folder_name,
+                                         stream_extract.archive_kind(archive_path), report=report)
         finally:
-            # Cleanup temp
-            if os.path.exists(temp_extract_dir):
-                shutil.rmtree(temp_extract_dir)
             # Cleanup archive
             if os.path.exists(archive_path):
                 os.remove(archive_path)
+
+    def _install_archive(self, archive_path, target_root_dir, folder_name, kind, tracker=None, report=None):
+        if tracker is None:
+            tracker = progress.callback_tracker(None)
+        if report is None:
+            report = InstallReport()
+        # 1. Extract to a temp folder (discovery skips _temp* directories)
+        temp_extract_dir = make_staging_dir(target_root_dir)
+        on_member = lambda name, size: tracker.member(size)
+        try:
+            if kind == "tar.gz":
+                # tar.gz has no index: progress follows the compressed bytes read
+                tracker.phase("extract", os.path.getsize(archive_path))
+                with trace.span("extract", kind=kind), open(archive_path, "rb") as f:
+                    stream_extract.extract_tar_stream(_CountingReader(f, tracker.update), temp_extract_dir, on_member)
+            else:
+                # zip lists every member's size up front
+                tracker.expect_extracted(stream_extract.zip_uncompressed_size(archive_path))
+                tracker.phase("extract")
+                with trace.span("extract", kind=kind):
+                    stream_extract.extract_zip_file(archive_path, temp_extract_dir, on_member)
+
+            tracker.phase("finalize")
+            return self._finalize(temp_extract_dir, target_root_dir, folder_name, report)
+        finally:
+            # Cleanup temp
+            if os.path.exists(temp_extract_dir):
+                shutil.rmtree(temp_extract_dir)
+
+    def _finalize(self, extract_dir, target_root_dir, folder_name, report):
+        """Moves the extracted JDK into place with a single rename, so it is never seen half-written."""
+        # Not part of the JDK. Removing it freshens the folder's mtime, which keeps prune off it until the rename
+        release_staging_dir(extract_dir)
+        # The archive usually contains a single root folder (e.g. jdk-17.0.1+12)
+        extracted_items = os.listdir(extract_dir)
+        if not extracted_items:
+            raise Exception("Empty archive")
+        jdk_root = os.path.join(extract_dir, extracted_items[0]) if len(extracted_items) == 1 else extract_dir
+        with trace.span("dedupe") as span:
+            report.dedupe = self._dedupe(jdk_root, target_root_dir, report)
+            if report.dedupe:
+                span.set(linked=report.dedupe.linked, saved_bytes=report.dedupe.saved_bytes)
+
+        # Never overwrite an existing install: pick a free name instead
+        final_target_path = os.path.join(target_root_dir, folder_name)
+        suffix = 1
+        while True:
+            if not os.path.exists(final_target_path):
+                try:
+                    # Same filesystem (staging lives under target_root_dir), so this is a rename
+                    os.rename(jdk_root, final_target_path)
+                    if report.dedupe:
+                        report.dedupe.home = final_target_path
+                    return final_target_path
+                except OSError:
+                    # A concurrent install took the name between the check and the rename
+                    if not os.path.exists(final_target_path):
+                        raise
+            final_target_path = os.path.join(target_root_dir, f"{folder_name}-{suffix}")
+            suffix += 1
+
+    def _dedupe(self, home, target_root_dir, report):
+        """
+        Shares files identical to those of JDKs already installed here; returns
+        the DedupeStats. Never fails the install: a problem becomes a warning on the report.
+        """
+        mode = self.dedupe
+        if mode is None:
+            from .config import load_config
+            mode = load_config().get("dedupe", "off")
+        if not mode or mode == "off":
+            return None
+        from .dedupe import ContentStore, Deduplicator
+        try:
+            return Deduplicator(ContentStore(target_root_dir), mode).run(home)
+        except (OSError, ValueError) as e:
+            report.warnings.append(f"skipped deduplication: {e}")
+            return None
+
+class _CountingReader:
+    """File wrapper reporting how far into the file reads have got."""
+
+    def __init__(self, f, on_position):
+        self._f = f
+        self._on_position = on_position
+
+    def read(self, size=-1):
+        data = self._f.read(size)
+        self._on_position(self._f.tell())
+        return data
+
+def _tee(chunks, hasher, spool):
+    for chunk in chunks:
+        hasher.update(chunk)
+        if spool:
+            spool.write(chunk)
+        yield chunk
+
+def _file_chunks(path, size=1024 * 1024):
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(size), b""):
+            yield block
+
+def _verify(actual, expected, path=None):
+    """Raises ChecksumMismatch (deleting `path` if given) when the digests differ."""
+    if expected and actual != expected.lower():
+        if path and os.path.exists(path):
+            os.remove(path)
+        raise ChecksumMismatch(f"SHA-256 mismatch: expected {expected}, got {actual}")
@@ -0,0 +1,105 @@
+"""
+Running commands under a JDK without switching the global one.
+
+JAVA_HOME and PATH are set in the child's environment only, so concurrent
+jobs on one machine (a CI matrix, two terminals) can each use their own JDK.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional, Sequence
+from .jdk_probe import JdkInfo
+from . import trace, usage
+
+def resolve_home(manager, query: str, jdks: List[JdkInfo]) -> str:
+    """
+    The JAVA_HOME a name, version query or path selects, matched like
+    `coffeebar use` (so '17' is the newest 17), falling back to an existing
+    JDK directory. Raises LookupError.
+    """
+    matches = manager.resolve(query, jdks)
+    if len(matches) == 1:
+        return matches[0].path
+    if matches:
+        raise LookupError(f"Ambiguous name '{query}'. Matches: {', '.join(jdk.name for jdk in matches)}")
+    if os.path.isdir(query) and manager._is_valid_jdk(query):
+        from .discovery import find_home
+        return find_home(os.path.abspath(query))
+    raise LookupError(f"Could not find JDK matching '{query}'")
+
+def child_env(home: str, base: Optional[Mapping[str, str]] = None) -> Dict[str, str]:
+    """A copy of the environment with JAVA_HOME set to home and its bin/ first on PATH."""
+    env = dict(os.environ if base is None else base)
+    bin_dir = os.path.join(home, "bin")
+    # Drop the bin/ of whatever JDK the parent had, so `java` can't come from two places
+    stale = {os.path.normcase(bin_dir)}
+    if env.get("JAVA_HOME"):
+        stale.add(os.path.normcase(os.path.join(env["JAVA_HOME"], "bin")))
+    path_key = next((key for key in env if key.upper() == "PATH"), "PATH")
+    entries = [e for e in env.get(path_key, "").split(os.pathsep) if e and os.path.normcase(e) not in stale]
+    env[path_key] = os.pathsep.join([bin_dir] + entries)
+    env["JAVA_HOME"] = home
+    return env
+
+def exec_in(home: str, argv: Sequence[str]):
+    """Replaces this process with argv running under the JDK at home (never returns)."""
+    env = child_env(home)
+    usage.append_use(home)
+    if os.name == "nt":
+        # exec* on Windows starts a new process and exits this one, losing the exit code
+        # and the console; wait for the child instead
+        sys.exit(subprocess.call(list(argv), env=env))
+    # exec skips atexit: write the --profile / --trace-file output now
+    trace.finish()
+    os.execvpe(argv[0], list(argv), env)
+
+@dataclass
+class MatrixResult:
+    query: str
+    home: Optional[str]
+    returncode: Optional[int] = None
+    seconds: float = 0.0
+    output: str = ""
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0
+
+def run_matrix(targets: Dict[str, Optional[str]], argv: Sequence[str], jobs: Optional[int] = None,
+               on_done=None) -> List[MatrixResult]:
+    """
+    Runs argv once per JDK ({query: home}, None for one that didn't resolve),
+    at most `jobs` at a time. Each run's stdout and stderr are collected (in a
+    temp file, builds can be chatty) and handed to on_done(result) as it
+    finishes. Results come back in the order given.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    queries = list(targets)
+    usage.append_use(*(home for home in targets.values() if home))
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(queries) or 1))
+
+    def run_one(query):
+        result = MatrixResult(query, targets[query])
+        if result.home is None:
+            result.error = "no matching JDK"
+        else:
+            started = time.perf_counter()
+            try:
+                with tempfile.TemporaryFile() as log:
+                    result.returncode = subprocess.call(list(argv), env=child_env(result.home),
+                                                        stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT)
+                    log.seek(0)
+                    result.output = log.read().decode("utf-8", "replace")
+            except OSError as e:
+                result.error = str(e)
+            result.seconds = time.perf_counter() - started
+        if on_done:
+            on_done(result)
+        return result
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(run_one, queries))
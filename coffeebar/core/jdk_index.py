@@ -0,0 +1,131 @@
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+from . import paths, trace
+
+INDEX_FORMAT = 3
+
+def dir_signature(path: str) -> Optional[List[int]]:
+    """Cheap change detector for a directory: (mtime_ns, inode, device), or None if missing."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_ino, st.st_dev]
+
+def home_signature(home: str) -> Dict[str, Optional[List[int]]]:
+    """Signature of a JDK home.
+
+    Package managers replace files by renaming, so a JDK upgraded in place bumps
+    the mtime of the home (release file) or of bin/ (java executable).
+    """
+    return {
+        home: dir_signature(home),
+        os.path.join(home, "bin"): dir_signature(os.path.join(home, "bin")),
+    }
+
+def _is_fresh(signatures: Dict[str, Optional[List[int]]]) -> bool:
+    for path, sig in signatures.items():
+        if dir_signature(path) != sig:
+            return False
+    return True
+
+class DiscoveryIndex:
+    """
+    On-disk cache of JDK discovery results.
+
+    Layout of the JSON file:
+      roots: {search_root: {"dirs": {dir: signature}, "homes": [jdk_home, ...],
+                            "aliases": {jdk_home: [symlinked path, ...]}}}
+      homes: {jdk_home: {"dirs": {dir: signature}, "data": {...probe results...}}}
+
+    A root is reused as long as every directory visited while scanning it still
+    has the same signature; a home is reused (no re-probe) while its own
+    signature is unchanged.
+    """
+
+    def __init__(self, index_file: Optional[str] = None):
+        self.index_file = Path(index_file) if index_file else paths.cache_dir() / "index.json"
+        self.roots: Dict[str, dict] = {}
+        self.homes: Dict[str, dict] = {}
+        self.dirty = False
+        self.load()
+
+    def load(self):
+        try:
+            with trace.span("index.load"), open(self.index_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("format") != INDEX_FORMAT:
+            # Unknown layout, start from scratch and overwrite on next save
+            return
+        self.roots = data.get("roots", {})
+        self.homes = data.get("homes", {})
+
+    def save(self) -> bool:
+        """Writes the index if anything changed. Returns True if the file was rewritten."""
+        if not self.dirty:
+            return False
+        data = {"format": INDEX_FORMAT, "roots": self.roots, "homes": self.homes}
+        try:
+            paths.atomic_write_text(self.index_file, json.dumps(data, indent=1))
+        except OSError:
+            # The cache is an optimization; never fail discovery because of it
+            return False
+        self.dirty = False
+        return True
+
+    def clear(self):
+        self.roots = {}
+        self.homes = {}
+        self.dirty = True
+
+    # Roots
+
+    def root_is_fresh(self, root: str) -> bool:
+        entry = self.roots.get(root)
+        return entry is not None and _is_fresh(entry["dirs"])
+
+    def root_homes(self, root: str) -> List[str]:
+        entry = self.roots.get(root)
+        return list(entry["homes"]) if entry else []
+
+    def root_aliases(self, root: str) -> Dict[str, List[str]]:
+        entry = self.roots.get(root)
+        return dict(entry.get("aliases", {})) if entry else {}
+
+    def update_root(self, root: str, dirs: Dict[str, Optional[List[int]]], homes: List[str],
+                    aliases: Optional[Dict[str, List[str]]] = None):
+        self.roots[root] = {"dirs": dirs, "homes": list(homes), "aliases": aliases or {}}
+        self.dirty = True
+
+    # Homes
+
+    def get_home(self, home: str) -> Optional[dict]:
+        """Returns the cached probe data for a home, or None if missing or stale."""
+        entry = self.homes.get(home)
+        if entry is None or not _is_fresh(entry["dirs"]):
+            return None
+        return entry["data"]
+
+    def peek_home(self, home: str) -> Optional[dict]:
+        """Cached probe data for a home without checking freshness (for painting a UI instantly)."""
+        entry = self.homes.get(home)
+        return entry["data"] if entry else None
+
+    def update_home(self, home: str, data: dict):
+        self.homes[home] = {"dirs": home_signature(home), "data": data}
+        self.dirty = True
+
+    def prune(self, active_roots: List[str]):
+        """Drops roots that are no longer searched and homes no root refers to."""
+        for root in [r for r in self.roots if r not in active_roots]:
+            del self.roots[root]
+            self.dirty = True
+
+        referenced = {home for entry in self.roots.values() for home in entry["homes"]}
+        for home in [h for h in self.homes if h not in referenced]:
+            del self.homes[home]
+            self.dirty = True
@@ -1,90 +1,237 @@
 import os
-import subprocess
+import threading
 from pathlib import Path
-from typing import List, Optional, Dict
-from . import registry_utils
+from typing import Callable, Dict, List, Optional, Tuple
+from .jdk_index import DiscoveryIndex
+from .jdk_probe import JdkInfo, probe_jdk
+from .version_index import VersionIndex, parse_query
+from .discovery import DEFAULT_DEPTH, DiscoveryScanner, default_roots, find_home
+from .config import load_config, save_config
+from . import trace
 
 class JdkManager:
-    def __init__(self):
-        self.common_paths = [
-            os.path.join(os.environ.get("ProgramFiles", "C:\\Program Files"), "Java"),
-            os.path.join(os.environ.get("ProgramFiles(x86)", "C:\\Program Files (x86)"), "Java"),
-            os.path.join(os.environ.get("USERPROFILE"), ".jdks"),
-            # Add Eclipse Adoptium / Temurin specific if needed, usually under Program Files/Eclipse Adoptium
-            os.path.join(os.environ.get("ProgramFiles", "C:\\Program Files"), "Eclipse Adoptium"),
-        ]
-
-    def find_jdks(self) -> List[Dict[str, str]]:
-        """Scans common directories for JDK installations."""
+    def __init__(self, index: Optional[DiscoveryIndex] = None, config: Optional[dict] = None, env=None):
+        self.index = index if index is not None else DiscoveryIndex()
+        self.config = config if config is not None else load_config()
+        self.scanner = DiscoveryScanner(max_depth=self.config.get("scan_depth", DEFAULT_DEPTH))
+        self.common_paths = default_roots()
+        for path in self.config.get("search_paths", []):
+            if path not in self.common_paths:
+                self.common_paths.append(path)
+        self._env = env
+        # find_jdks may run on several threads at once (GUI discovery, the inventory watcher)
+        self.lock = threading.RLock()
+        self._version_index: Optional[VersionIndex] = None
+
+    @property
+    def env(self):
+        """The environment backend (registry / shell env file); created on first use."""
+        if self._env is None:
+            # Imported lazily: winreg only exists on Windows, and read-only commands
+            # should not pay for modules they do not use
+            from .env_backend import default_backend
+            self._env = default_backend()
+        return self._env
+
+    def find_jdks(self, refresh: bool = False,
+                  on_found: Optional[Callable[[List[JdkInfo]], None]] = None) -> List[JdkInfo]:
+        """
+        Returns the JDK installations found in the search paths.
+
+        Results come from the discovery index: a search path is only rescanned if
+        a directory visited during its last scan changed, and a JDK is only
+        re-probed if its home changed. Pass refresh=True to ignore the index and
+        rebuild it. Homes reachable through several paths (symlinks, the same
+        folder under two roots) are reported once, with the other paths as aliases.
+
+        on_found(jdks) is called as results become available: once with every
+        JDK still valid in the index, then for each freshly probed one.
+        """
+        with self.lock, trace.span("find_jdks", refresh=refresh) as span:
+            jdks = self._find_jdks(refresh, on_found)
+            span.set(jdks=len(jdks))
+            return jdks
+
+    def _find_jdks(self, refresh, on_found):
+        with trace.span("index.check", roots=len(self.common_paths)):
+            stale_roots = [root for root in self.common_paths if refresh or not self.index.root_is_fresh(root)]
+        with trace.span("scan", roots=len(stale_roots)):
+            for root, scan in self.scanner.scan(stale_roots).items():
+                self.index.update_root(root, scan.dirs, scan.homes, scan.aliases)
+
+        homes, aliases = self._indexed_homes()
+
+        def to_info(data):
+            info = JdkInfo.from_dict(data)
+            info.aliases = aliases.get(info.path, [])
+            return info
+
+        cached = {} if refresh else {home: self.index.get_home(home) for home in homes}
+        to_probe = [home for home in homes if cached.get(home) is None]
+        if on_found:
+            on_found([to_info(cached[home]) for home in homes if cached.get(home) is not None])
+        for info in self.scanner.imap(probe_jdk, to_probe):
+            self.index.update_home(info.path, info.to_dict())
+            cached[info.path] = info.to_dict()
+            if on_found:
+                on_found([to_info(cached[info.path])])
+
+        jdks = [to_info(cached[home]) for home in homes]
+
+        self.index.prune(self.common_paths)
+        with trace.span("index.save") as span:
+            saved = self.index.save()
+            span.set(written=saved)
+        if saved:
+            # Keep the `coffeebar shell-init` lookup tables in sync with the index
+            from . import shell_init
+            with trace.span("shell_init.write_tables"):
+                shell_init.write_tables(jdks)
+        return jdks
+
+    def cached_jdks(self) -> List[JdkInfo]:
+        """
+        The JDKs recorded in the discovery index, without scanning, probing or
+        even checking that they still exist. Meant for painting a UI instantly
+        while find_jdks() runs in the background.
+        """
+        homes, aliases = self._indexed_homes()
         jdks = []
-        for path_str in self.common_paths:
-            if not os.path.exists(path_str):
-                continue
-            
-            try:
-                for entry in os.scandir(path_str):
-                    if entry.is_dir():
-                        jdk_path = entry.path
-                        if self._is_valid_jdk(jdk_path):
-                            version = self._get_jdk_version(jdk_path)
-                            jdks.append({
-                                "name": entry.name,
-                                "path": jdk_path,
-                                "version": version
-                            })
-            except PermissionError:
-                continue
-                
+        for home in homes:
+            data = self.index.peek_home(home)
+            if data is not None:
+                info = JdkInfo.from_dict(data)
+                info.aliases = aliases.get(home, [])
+                jdks.append(info)
         return jdks
 
+    def _indexed_homes(self) -> Tuple[List[str], Dict[str, List[str]]]:
+        homes = []
+        aliases = {}
+        for root in self.common_paths:
+            for home, links in self.index.root_aliases(root).items():
+                known = aliases.setdefault(home, [])
+                known.extend(link for link in links if link not in known)
+            for home in self.index.root_homes(root):
+                if home not in homes:
+                    homes.append(home)
+        return homes, aliases
+
+    def rescan(self, on_found: Optional[Callable[[List[JdkInfo]], None]] = None) -> List[JdkInfo]:
+        """Discards the discovery index and rebuilds it with a full scan."""
+        with self.lock:
+            self.index.clear()
+            return self.find_jdks(refresh=True, on_found=on_found)
+
     def _is_valid_jdk(self, path: str) -> bool:
         """Checks if a directory looks like a JDK home."""
-        # Simple check: existence of bin/java.exe and bin/javac.exe
-        # JREs might not have javac, but for 'JDK' tool usually we want javac
-        java_exe = os.path.join(path, "bin", "java.exe")
-        return os.path.exists(java_exe)
-
-    def _get_jdk_version(self, path: str) -> str:
-        """Extracts version string from java.exe."""
-        java_exe = os.path.join(path, "bin", "java.exe")
-        try:
-            # Run java -version and capture stderr (java version output goes to stderr mostly)
-            result = subprocess.run(
-                [java_exe, "-version"], 
-                capture_output=True, 
-                text=True, 
-                creationflags=subprocess.CREATE_NO_WINDOW
-            )
-            # Output is usually "java version '1.8.0_...'" or "openjdk 17.0.1 ..."
-            output = result.stderr if result.stderr else result.stdout
-            lines = output.splitlines()
-            if lines:
-                return lines[0] # Return the first line usually containing the version
-        except Exception:
-            return "Unknown"
-        return "Unknown"
+        # bin/java(.exe), or a macOS bundle with Contents/Home/bin/java
+        # JREs might not have javac, probe_jdk reports those as image_type "JRE"
+        return find_home(path) is not None
+
+    def version_index(self, jdks: Optional[List[JdkInfo]] = None) -> VersionIndex:
+        """The version index over jdks (default: the discovered ones), rebuilt only when given a different list."""
+        if jdks is None:
+            jdks = self.find_jdks()
+        index = self._version_index
+        if index is None or index.source is not jdks:
+            index = self._version_index = VersionIndex(jdks)
+        return index
+
+    def resolve(self, path_or_name: str, jdks: Optional[List[JdkInfo]] = None) -> List[JdkInfo]:
+        """
+        Finds the JDKs matching a path, a (partial) name or a version query.
+
+        Tries an exact path match, then an exact name (or alias) match, then a
+        version query ('17', '>=17,<21', 'lts', 'vendor:temurin@21', see
+        version_index), which resolves to the newest match, then a substring
+        of the name. A single-element list means the query resolved.
+        """
+        with trace.span("resolve", query=path_or_name) as span:
+            matches = self._resolve(path_or_name, jdks)
+            span.set(matches=len(matches))
+            return matches
+
+    def _resolve(self, path_or_name, jdks):
+        if jdks is None:
+            jdks = self.find_jdks()
+        query = path_or_name.lower()
+        index = self.version_index(jdks)
+
+        exact = index.by_path.get(query) or index.by_name.get(query)
+        if exact:
+            return [exact]
+
+        version_query = parse_query(path_or_name)
+        if version_query is not None:
+            best = index.best(version_query)
+            if best:
+                return [best]
+            # '21' must not pick jdk-1.8.0_211 by name; only JDKs whose version
+            # couldn't be read are still matched by name
+            jdks = [jdk for jdk in jdks if not jdk.feature]
+
+        return [jdk for jdk in jdks if query in jdk.name.lower()]
+
+    def resolve_project(self, directory: str, jdks: Optional[List[JdkInfo]] = None) -> Optional[JdkInfo]:
+        """
+        Returns the JDK requested by the project containing `directory`
+        (.java-version, .sdkmanrc, .tool-versions or pom.xml toolchains), if installed.
+        """
+        from .project_version import ResolutionCache, spec_candidates
+        from .shell_init import build_table
+
+        cache = ResolutionCache()
+        _, spec = cache.lookup(directory)
+        cache.save()
+        if not spec:
+            return None
+
+        if jdks is None:
+            jdks = self.find_jdks()
+        table = build_table(jdks)
+        by_path = {jdk.path: jdk for jdk in jdks}
+        for candidate in spec_candidates(spec):
+            if candidate in table:
+                return by_path[table[candidate]]
+            matches = self.resolve(candidate, jdks)
+            if len(matches) == 1:
+                return matches[0]
+        return None
 
     def get_current_jdk(self) -> Optional[str]:
         """Returns the path of the current JAVA_HOME."""
-        return registry_utils.get_env_variable("JAVA_HOME")
+        return self.env.get("JAVA_HOME")
 
     def set_jdk(self, path: str):
         """Sets the JAVA_HOME and updates Path."""
-        # 1. Set JAVA_HOME
-        registry_utils.set_env_variable("JAVA_HOME", path)
-        
-        # 2. Ensure %JAVA_HOME%\bin is in Path
-        # We add separate entry or ensure the reference exists. 
-        # Best practice: Add "%JAVA_HOME%\bin" literal to path if registry allows, 
-        # but Python's winreg might resolve it. 
-        # Simpler approach: Check if we are using exact path or variable.
-        # Ideally, we want the PATH to contain "%JAVA_HOME%\bin".
-        
-        target_path_entry = r"%JAVA_HOME%\bin"
-        registry_utils.append_to_path(target_path_entry)
-        
+        # One transaction: a single write and a single change broadcast
+        with trace.span("set_jdk", home=path), self.env.transaction() as tx:
+            tx.set("JAVA_HOME", path)
+            # PATH refers to the variable (%JAVA_HOME%\bin, $JAVA_HOME/bin), so it only
+            # needs adding once and later switches don't touch it
+            tx.ensure_on_path(self.env.java_bin_entry)
+        from .usage import record_use
+        record_use(path)
+
         print(f"Set JAVA_HOME to {path}")
 
     def add_search_path(self, path: str):
+        """Adds a discovery root and remembers it in the user configuration."""
+        path = os.path.abspath(path)
         if path not in self.common_paths:
             self.common_paths.append(path)
+        if path not in self.config["search_paths"]:
+            self.config["search_paths"].append(path)
+            save_config(self.config)
+
+    def remove_search_path(self, path: str) -> bool:
+        """Removes a user-configured discovery root. Returns False if it was not configured."""
+        path = os.path.abspath(path)
+        if path not in self.config["search_paths"]:
+            return False
+        self.config["search_paths"].remove(path)
+        save_config(self.config)
+        if path not in default_roots():
+            self.common_paths.remove(path)
+        return True
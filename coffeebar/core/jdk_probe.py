@@ -0,0 +1,250 @@
+import os
+import re
+from dataclasses import dataclass, asdict, field
+from typing import Dict, List, Optional
+from . import trace
+
+@dataclass
+class JdkInfo:
+    """Structured description of a JDK/JRE home."""
+    name: str
+    path: str
+    version_string: str = "Unknown"
+    feature: int = 0
+    interim: int = 0
+    update: int = 0
+    patch: int = 0
+    build: Optional[int] = None
+    vendor: str = "Unknown"
+    os_name: str = ""
+    arch: str = ""
+    image_type: str = "JDK"  # "JDK" or "JRE"
+    source: str = "unknown"  # where the data came from: release, manifest, java or unknown
+    aliases: List[str] = field(default_factory=list)  # symlinks resolving to this home
+
+    @property
+    def version(self) -> str:
+        """Human-readable version, e.g. '17.0.9+9'."""
+        if not self.feature:
+            return self.version_string
+        if self.feature <= 8:
+            # Legacy scheme, e.g. '1.8.0_392-b08'
+            text = f"1.{self.feature}.0_{self.update}"
+            if self.build is not None:
+                text += f"-b{self.build:02d}"
+            return text
+        parts = [self.feature, self.interim, self.update]
+        if self.patch:
+            parts.append(self.patch)
+        text = ".".join(str(p) for p in parts)
+        if self.build is not None:
+            text += f"+{self.build}"
+        return text
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "JdkInfo":
+        fields = cls.__dataclass_fields__
+        return cls(**{k: v for k, v in data.items() if k in fields})
+
+def home_name(home: str) -> str:
+    """Display name of a JDK home; macOS bundles are named after the .jdk folder."""
+    home = os.path.normpath(home)
+    parent, leaf = os.path.split(home)
+    if leaf == "Home" and os.path.basename(parent) == "Contents":
+        return os.path.basename(os.path.dirname(parent))
+    return leaf
+
+def java_executable(home: str) -> Optional[str]:
+    """Returns the java launcher inside a home (java.exe on Windows), or None."""
+    for exe in ("java.exe", "java"):
+        candidate = os.path.join(home, "bin", exe)
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+# Matches '17', '17.0.9', '17.0.9.1', '1.8.0_392', optionally followed by '+9' / '-b08'
+_VERSION_RE = re.compile(r"^(\d+)(?:\.(\d+))?(?:\.(\d+))?(?:\.(\d+))?(?:_(\d+))?(?:(?:\+|-b)(\d+))?")
+_BUILD_RE = re.compile(r"(?:\+|-b)(\d+)")
+
+def parse_version(text: str) -> Dict[str, Optional[int]]:
+    """
+    Parses a Java version string into feature/interim/update/patch/build.
+
+    Handles both the JEP 322 scheme ('17.0.9+9') and the legacy one ('1.8.0_392-b08').
+    Returns an empty dict if the string is not a version.
+    """
+    match = _VERSION_RE.match(text.strip())
+    if not match:
+        return {}
+    major, minor, micro, patch, legacy_update, build = match.groups()
+    build = int(build) if build else None
+
+    if major == "1" and minor:
+        # Legacy scheme: 1.<feature>.0_<update>
+        return {
+            "feature": int(minor),
+            "interim": 0,
+            "update": int(legacy_update or 0),
+            "patch": 0,
+            "build": build,
+        }
+    return {
+        "feature": int(major),
+        "interim": int(minor or 0),
+        "update": int(micro or 0),
+        "patch": int(patch or 0),
+        "build": build,
+    }
+
+def read_release_file(home: str) -> Optional[Dict[str, str]]:
+    """Parses the KEY="value" pairs of a JDK release file."""
+    release_path = os.path.join(home, "release")
+    try:
+        with open(release_path, "r", encoding="utf-8", errors="replace") as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+
+    props = {}
+    for line in lines:
+        key, sep, value = line.partition("=")
+        if sep:
+            props[key.strip()] = value.strip().strip('"')
+    return props
+
+def _read_rt_manifest(home: str) -> Optional[Dict[str, str]]:
+    """Reads the manifest of rt.jar (JDK 8 and older ship no usable release file)."""
+    import zipfile
+    for rt_jar in (os.path.join(home, "jre", "lib", "rt.jar"), os.path.join(home, "lib", "rt.jar")):
+        if not os.path.isfile(rt_jar):
+            continue
+        try:
+            # Only the central directory and the manifest entry are read, not the whole jar
+            with zipfile.ZipFile(rt_jar) as jar:
+                manifest = jar.read("META-INF/MANIFEST.MF").decode("utf-8", errors="replace")
+        except (OSError, KeyError, zipfile.BadZipFile):
+            continue
+        props = {}
+        for line in manifest.splitlines():
+            key, sep, value = line.partition(":")
+            if sep:
+                props[key.strip()] = value.strip()
+        return props
+    return None
+
+def _image_type(home: str) -> str:
+    has_javac = any(os.path.isfile(os.path.join(home, "bin", exe)) for exe in ("javac.exe", "javac"))
+    return "JDK" if has_javac else "JRE"
+
+def _probe_release(info: JdkInfo, props: Dict[str, str]) -> bool:
+    java_version = props.get("JAVA_VERSION")
+    if not java_version:
+        return False
+
+    # JAVA_RUNTIME_VERSION / FULL_VERSION carry the build number, JAVA_VERSION does not
+    full_version = props.get("JAVA_RUNTIME_VERSION") or props.get("FULL_VERSION") or java_version
+    parsed = parse_version(java_version)
+    if not parsed:
+        return False
+    build = _BUILD_RE.search(full_version)
+    if build:
+        parsed["build"] = int(build.group(1))
+
+    info.version_string = full_version
+    info.vendor = props.get("IMPLEMENTOR", info.vendor)
+    info.os_name = props.get("OS_NAME", "")
+    info.arch = props.get("OS_ARCH", "")
+    info.image_type = props.get("IMAGE_TYPE") or _image_type(info.path)
+    info.source = "release"
+    for key, value in parsed.items():
+        setattr(info, key, value)
+    return True
+
+def _probe_manifest(info: JdkInfo, props: Dict[str, str]) -> bool:
+    version = props.get("Implementation-Version")
+    parsed = parse_version(version) if version else {}
+    if not parsed:
+        return False
+
+    info.version_string = version
+    info.vendor = props.get("Implementation-Vendor", info.vendor)
+    info.image_type = _image_type(info.path)
+    info.source = "manifest"
+    for key, value in parsed.items():
+        setattr(info, key, value)
+    return True
+
+def _probe_java(info: JdkInfo) -> bool:
+    """Last resort: run 'java -version' (costs a JVM startup)."""
+    import subprocess
+    java_exe = java_executable(info.path)
+    if not java_exe:
+        return False
+    try:
+        # java -version writes to stderr
+        with trace.span("java -version", java=java_exe):
+            result = subprocess.run(
+                [java_exe, "-version"],
+                capture_output=True,
+                text=True,
+                timeout=30,
+                creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0)
+            )
+    except (OSError, subprocess.SubprocessError):
+        return False
+
+    output = result.stderr if result.stderr else result.stdout
+    lines = output.splitlines()
+    if not lines:
+        return False
+
+    # First line: 'openjdk version "17.0.9" 2023-10-17' or 'java version "1.8.0_392"'
+    quoted = re.search(r'"([^"]+)"', lines[0])
+    parsed = parse_version(quoted.group(1)) if quoted else {}
+    build = re.search(r"\(build ([^)]+)\)", output)
+    if build:
+        build_number = _BUILD_RE.search(build.group(1))
+        if build_number and parsed:
+            parsed["build"] = int(build_number.group(1))
+
+    info.version_string = lines[0]
+    if len(lines) > 1:
+        # Second line: 'OpenJDK Runtime Environment Temurin-17.0.9+9 (build 17.0.9+9)'
+        info.vendor = lines[1].split("(build")[0].strip() or info.vendor
+    info.image_type = _image_type(info.path)
+    info.source = "java"
+    for key, value in parsed.items():
+        setattr(info, key, value)
+    return True
+
+def probe_jdk(home: str, allow_spawn: bool = True) -> JdkInfo:
+    """
+    Describes the JDK at `home`.
+
+    Tries the release file first, then the rt.jar manifest, and only runs
+    `java -version` if neither is usable (and allow_spawn is True).
+    """
+    with trace.span("probe", home=home) as span:
+        info = _probe(home, allow_spawn)
+        span.set(source=info.source)
+        return info
+
+def _probe(home: str, allow_spawn: bool) -> JdkInfo:
+    info = JdkInfo(name=home_name(home), path=home)
+
+    props = read_release_file(home)
+    if props and _probe_release(info, props):
+        return info
+
+    props = _read_rt_manifest(home)
+    if props and _probe_manifest(info, props):
+        return info
+
+    if allow_spawn and _probe_java(info):
+        return info
+
+    info.image_type = _image_type(home)
+    return info
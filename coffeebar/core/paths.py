@@ -0,0 +1,43 @@
+import os
+from pathlib import Path
+
+def cache_dir() -> Path:
+    """Returns the per-user cache directory for CoffeeBar (created on demand)."""
+    override = os.environ.get("COFFEEBAR_CACHE_DIR")
+    if override:
+        return Path(override)
+
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or str(Path.home() / "AppData" / "Local")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(base) / "coffeebar"
+
+def config_dir() -> Path:
+    """Returns the per-user configuration directory for CoffeeBar."""
+    override = os.environ.get("COFFEEBAR_CONFIG_DIR")
+    if override:
+        return Path(override)
+
+    if os.name == "nt":
+        base = os.environ.get("APPDATA") or str(Path.home() / "AppData" / "Roaming")
+    else:
+        base = os.environ.get("XDG_CONFIG_HOME") or str(Path.home() / ".config")
+    return Path(base) / "coffeebar"
+
+def jdks_dir() -> Path:
+    """Default install location for downloaded JDKs (shared with IntelliJ's ~/.jdks)."""
+    return Path.home() / ".jdks"
+
+def atomic_write_text(path, text: str):
+    """Writes a text file atomically (temp file in the same directory + rename)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
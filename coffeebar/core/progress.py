@@ -0,0 +1,170 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+# In order; an install may skip some (a cache hit has no download phase)
+PHASES = ("metadata", "download", "verify", "extract", "finalize", "done", "failed")
+
+@dataclass
+class ProgressEvent:
+    """A snapshot of one task's progress, as delivered to subscribers."""
+    key: Any
+    phase: str
+    done: int = 0                 # bytes of the current phase (downloaded, or archive bytes read)
+    total: int = 0                # 0 when unknown
+    throughput: float = 0.0       # bytes/s, smoothed
+    eta: Optional[float] = None   # seconds left in this phase, when known
+    extracted: int = 0            # uncompressed bytes written, from archive member sizes
+    extract_total: int = 0        # 0 when the archive doesn't say up front (streams)
+    members: int = 0
+    message: str = ""
+
+    @property
+    def fraction(self) -> Optional[float]:
+        if self.extract_total and self.phase == "extract":
+            return min(1.0, self.extracted / self.extract_total)
+        return min(1.0, self.done / self.total) if self.total else None
+
+class ProgressTracker:
+    """
+    Progress of one task. Updates are cheap and may come from any thread;
+    the bus turns them into at most one event per interval, plus one for every
+    phase change. With no subscribers every update returns straight away.
+    """
+
+    def __init__(self, bus: "ProgressBus", key: Any):
+        self.bus = bus
+        self.key = key
+        self.phase_name = "metadata"
+        self.done = 0
+        self.total = 0
+        self.extracted = 0
+        self.extract_total = 0
+        self.members = 0
+        self.message = ""
+        self._rate = 0.0
+        self._last_emit = 0.0
+        self._last_done = 0
+        self._pending = False
+        self._phase_started = time.monotonic()
+
+    def phase(self, name: str, total: int = 0, message: str = ""):
+        """Starts a phase: byte counters restart, and subscribers hear about it right away."""
+        if self._pending and self.bus.subscribers:
+            # The last update of the previous phase (e.g. 100% downloaded) isn't dropped
+            self.bus.publish(self._snapshot())
+        self._pending = False
+        self.phase_name = name
+        self.done = 0
+        self.total = total
+        self.message = message
+        self._rate = 0.0
+        self._last_done = 0
+        self._phase_started = self._last_emit = time.monotonic()
+        if self.bus.subscribers:
+            self.bus.publish(self._snapshot())
+
+    def update(self, done: int, total: Optional[int] = None):
+        """Bytes done in the current phase (absolute)."""
+        self.done = done
+        if total is not None:
+            self.total = total
+        if self.bus.subscribers:
+            self._maybe_emit()
+
+    def member(self, size: int):
+        """One archive member written (its uncompressed size)."""
+        self.members += 1
+        self.extracted += size
+        if self.bus.subscribers:
+            self._maybe_emit()
+
+    def expect_extracted(self, total: int):
+        """Uncompressed size of the archive about to be extracted; the extraction counters restart."""
+        self.extract_total = total
+        self.extracted = 0
+        self.members = 0
+
+    def finish(self, ok: bool = True, message: str = ""):
+        """Last event of the task; the bus forgets the tracker, so a long-lived bus doesn't grow."""
+        self.phase("done" if ok else "failed", message=message)
+        self.bus.discard(self)
+
+    def _maybe_emit(self):
+        now = time.monotonic()
+        if now - self._last_emit < self.bus.min_interval:
+            self._pending = True
+            return
+        elapsed = now - self._last_emit
+        self._last_emit = now
+        if elapsed > 0:
+            # Smoothed over emits, so a stalled connection shows up within a few intervals
+            instant = (self.done - self._last_done) / elapsed
+            self._rate = instant if not self._rate else 0.3 * instant + 0.7 * self._rate
+        self._last_done = self.done
+        self._pending = False
+        self.bus.publish(self._snapshot())
+
+    def _snapshot(self) -> ProgressEvent:
+        eta = None
+        if self.total and self._rate > 0:
+            eta = max(0.0, (self.total - self.done) / self._rate)
+        return ProgressEvent(self.key, self.phase_name, self.done, self.total, self._rate, eta,
+                             self.extracted, self.extract_total, self.members, self.message)
+
+class ProgressBus:
+    """
+    Fan-out of progress events for downloads, installs and extraction.
+
+    Shared by the CLI (rich) and the GUI (Tk): each tracker emits at most one
+    event per `min_interval` seconds, however often the transfer loop reports,
+    so a UI never sees more than a handful of updates per second per task.
+    Subscribers are called on the worker thread that produced the event.
+    """
+
+    def __init__(self, min_interval: float = 0.1):
+        self.min_interval = min_interval
+        self.subscribers: List[Callable[[ProgressEvent], None]] = []
+        self._lock = threading.Lock()
+        self._trackers: Dict[Any, ProgressTracker] = {}
+
+    def subscribe(self, callback: Callable[[ProgressEvent], None]) -> Callable[[], None]:
+        """Registers a subscriber; returns a function that unregisters it."""
+        with self._lock:
+            # Copy-on-write: publishers iterate without taking the lock
+            self.subscribers = self.subscribers + [callback]
+
+        def unsubscribe():
+            with self._lock:
+                self.subscribers = [s for s in self.subscribers if s is not callback]
+        return unsubscribe
+
+    def tracker(self, key: Any) -> ProgressTracker:
+        with self._lock:
+            tracker = self._trackers.get(key)
+            if tracker is None:
+                tracker = self._trackers[key] = ProgressTracker(self, key)
+            return tracker
+
+    def discard(self, tracker: ProgressTracker):
+        """Drops a finished tracker. The next tracker(key) starts a fresh one."""
+        with self._lock:
+            if self._trackers.get(tracker.key) is tracker:
+                del self._trackers[tracker.key]
+
+    def publish(self, event: ProgressEvent):
+        for subscriber in self.subscribers:
+            subscriber(event)
+
+def callback_tracker(progress_callback: Optional[Callable[[int, int], None]],
+                     phases=("download", "extract")) -> ProgressTracker:
+    """
+    A tracker for the classic progress_callback(bytes_done, bytes_total) API:
+    forwards byte counts of the given phases, uncoalesced. Without a callback
+    it has no subscribers and costs nothing.
+    """
+    bus = ProgressBus(min_interval=0.0)
+    if progress_callback:
+        bus.subscribe(lambda e: progress_callback(e.done, e.total) if e.phase in phases else None)
+    return bus.tracker(None)
@@ -0,0 +1,141 @@
+import json
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+from . import paths
+from .jdk_index import dir_signature
+
+# Checked in this order in every directory, walking up from the project dir
+MARKER_FILES = (".java-version", ".sdkmanrc", ".tool-versions", "pom.xml")
+
+_TOOLCHAIN_JDK_RE = re.compile(r"<jdk>\s*<version>\s*([^<\s]+)\s*</version>", re.S)
+
+def read_spec(marker: str) -> Optional[str]:
+    """Extracts the requested Java version from a marker file, or None."""
+    try:
+        with open(marker, "r", encoding="utf-8", errors="replace") as f:
+            text = f.read()
+    except OSError:
+        return None
+
+    name = os.path.basename(marker)
+    if name == ".java-version":
+        # jenv / SDKMAN style: the first line is the version
+        lines = text.split()
+        return lines[0] if lines else None
+
+    if name == ".sdkmanrc":
+        # java=17.0.9-tem
+        for line in text.splitlines():
+            key, sep, value = line.partition("=")
+            if sep and key.strip() == "java" and value.strip():
+                return value.strip()
+        return None
+
+    if name == ".tool-versions":
+        # asdf: java temurin-17.0.9+9
+        for line in text.splitlines():
+            parts = line.split()
+            if len(parts) >= 2 and parts[0] == "java":
+                return parts[1]
+        return None
+
+    if name == "pom.xml":
+        # maven-toolchains-plugin: <toolchains><jdk><version>17</version></jdk></toolchains>
+        match = _TOOLCHAIN_JDK_RE.search(text)
+        return match.group(1) if match else None
+
+    return None
+
+def find_project_spec(directory: str) -> Tuple[Optional[str], Optional[str], Dict[str, Optional[List[int]]]]:
+    """
+    Walks up from `directory` to the first marker declaring a Java version.
+
+    Returns (marker path, spec, signatures of the paths walked). A pom.xml
+    without a toolchains requirement does not stop the walk.
+    """
+    walked = {}
+    current = os.path.abspath(directory)
+    while True:
+        walked[current] = dir_signature(current)
+        for name in MARKER_FILES:
+            marker = os.path.join(current, name)
+            if os.path.isfile(marker):
+                spec = read_spec(marker)
+                if spec:
+                    return marker, spec, walked
+                # Skipped markers (a pom.xml without toolchains) are tracked too, so
+                # adding a requirement to them later invalidates cached lookups
+                walked[marker] = dir_signature(marker)
+        parent = os.path.dirname(current)
+        if parent == current:
+            return None, None, walked
+        current = parent
+
+def spec_candidates(spec: str) -> List[str]:
+    """
+    Lookup keys for a spec, most specific first.
+
+    '17.0.9-tem' (SDKMAN) -> '17.0.9'; 'temurin-17.0.9+9' (asdf) -> '17.0.9+9'.
+    """
+    candidates = [spec]
+    if re.match(r"^\d", spec) and "-" in spec:
+        candidates.append(spec.rsplit("-", 1)[0])
+    elif "-" in spec:
+        candidates.append(spec.split("-", 1)[1])
+    return candidates
+
+def _file_mtime(path: Optional[str]) -> Optional[int]:
+    if not path:
+        return None
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+class ResolutionCache:
+    """
+    Per-directory cache of (marker, spec) lookups.
+
+    An entry stays valid while the directories walked and the marker file keep
+    their mtimes, so creating, editing or deleting a marker invalidates it.
+    """
+
+    def __init__(self, cache_file: Optional[str] = None):
+        self.cache_file = cache_file or str(paths.cache_dir() / "projects.json")
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+        self.dirty = False
+
+    def lookup(self, directory: str) -> Tuple[Optional[str], Optional[str]]:
+        directory = os.path.abspath(directory)
+        entry = self.entries.get(directory)
+        if entry is not None and self._is_fresh(entry):
+            return entry["marker"], entry["spec"]
+
+        marker, spec, walked = find_project_spec(directory)
+        self.entries[directory] = {
+            "marker": marker,
+            "spec": spec,
+            "marker_mtime": _file_mtime(marker),
+            "dirs": walked,
+        }
+        self.dirty = True
+        return marker, spec
+
+    def _is_fresh(self, entry) -> bool:
+        if entry["marker"] and _file_mtime(entry["marker"]) != entry["marker_mtime"]:
+            return False
+        return all(dir_signature(path) == sig for path, sig in entry["dirs"].items())
+
+    def save(self):
+        if not self.dirty:
+            return
+        try:
+            paths.atomic_write_text(self.cache_file, json.dumps(self.entries))
+        except OSError:
+            return
+        self.dirty = False
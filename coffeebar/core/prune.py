@@ -0,0 +1,288 @@
+"""
+Retention policy for installed JDKs (`coffeebar prune`).
+
+Only JDKs under the install root (~/.jdks, where `coffeebar install` puts
+them) are candidates; system and package-manager JDKs are never touched.
+A JDK is kept if it is:
+
+  - the active one (JAVA_HOME of this process or of new shells),
+  - used (see core.usage) within the last keep_used_days days,
+  - among the keep_per_version newest builds of its feature version
+    (17, 21, ...), or of unknown version.
+
+Everything else is removed. Then, if max_total_mb is set and the install
+root still holds more than that, kept JDKs other than the active one go
+too, least recently used first. Leftover _temp_extract_* folders from
+crashed installs are always removed: the installer marks each one with its
+pid (make_staging_dir), and a folder is left alone while that process runs.
+Unmarked folders, or ones made on another machine sharing the install root,
+go once they are an hour old.
+
+Sizes count each inode once, so JDKs sharing files through `coffeebar
+dedupe` hardlinks aren't counted twice, and removing one frees only the
+files no other JDK links to.
+"""
+import os
+import shutil
+import socket
+import tempfile
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from .jdk_probe import JdkInfo
+from .usage import UsageLog
+from .version_index import version_key
+
+TEMP_PREFIX = "_temp_extract_"
+# In each staging folder while its install runs: "<pid> <hostname>"
+OWNER_FILE = ".coffeebar-owner"
+# Staging folders whose owner can't be checked: a fresh one may still be extracting
+TEMP_MIN_AGE = 3600
+DAY = 86400
+
+def make_staging_dir(root: str) -> str:
+    """A new _temp_extract_* folder under root, marked as this process's until release_staging_dir."""
+    path = tempfile.mkdtemp(prefix=TEMP_PREFIX, dir=root)
+    with open(os.path.join(path, OWNER_FILE), "w", encoding="utf-8") as f:
+        f.write(f"{os.getpid()} {socket.gethostname()}\n")
+    return path
+
+def release_staging_dir(path: str):
+    """Removes the owner mark, leaving only the extracted files (before they are moved into place)."""
+    try:
+        os.remove(os.path.join(path, OWNER_FILE))
+    except OSError:
+        pass
+
+def staging_owner_alive(path: str) -> Optional[bool]:
+    """Whether the install that made a staging folder is still running; None if that can't be told."""
+    try:
+        with open(os.path.join(path, OWNER_FILE), "r", encoding="utf-8") as f:
+            pid, host = f.read().split()
+        pid = int(pid)
+    except (OSError, ValueError):
+        return None
+    if host != socket.gethostname():
+        return None
+    return _pid_alive(pid)
+
+def _pid_alive(pid: int) -> bool:
+    if pid <= 0:
+        return False
+    if os.name == "nt":
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        # PROCESS_QUERY_LIMITED_INFORMATION; exit code STILL_ACTIVE while running
+        handle = kernel32.OpenProcess(0x1000, False, pid)
+        if not handle:
+            return False
+        code = ctypes.c_ulong()
+        try:
+            return bool(kernel32.GetExitCodeProcess(handle, ctypes.byref(code))) and code.value == 259
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # someone else's process, but running
+    return True
+
+@dataclass
+class RetentionPolicy:
+    keep_per_version: int = 2
+    keep_used_days: float = 30
+    max_total_mb: int = 0  # 0: no cap
+
+    @classmethod
+    def from_config(cls, config: dict) -> "RetentionPolicy":
+        return cls(keep_per_version=int(config.get("prune_keep_per_version", 2)),
+                   keep_used_days=float(config.get("prune_keep_used_days", 30)),
+                   max_total_mb=int(config.get("prune_max_total_mb", 0)))
+
+@dataclass
+class PruneEntry:
+    path: str
+    reason: str
+    jdk: Optional[JdkInfo] = None  # None for leftover staging folders
+    last_used: Optional[float] = None
+    freed_bytes: int = 0
+
+@dataclass
+class PrunePlan:
+    keep: List[PruneEntry] = field(default_factory=list)
+    remove: List[PruneEntry] = field(default_factory=list)
+    total_bytes: int = 0  # under the install root, before pruning
+
+    @property
+    def freed_bytes(self) -> int:
+        return sum(entry.freed_bytes for entry in self.remove)
+
+def _inodes(path: str) -> Dict[Tuple[int, int], int]:
+    """{(device, inode): size} of the files under path, symlinks not followed."""
+    found = {}
+    for directory, _, names in os.walk(path):
+        for name in names:
+            try:
+                st = os.lstat(os.path.join(directory, name))
+            except OSError:
+                continue
+            found[(st.st_dev, st.st_ino)] = st.st_size
+    return found
+
+def _install_dir(path: str, root: str) -> Optional[str]:
+    """The folder directly under root that holds the JDK at path (a macOS bundle's home is a few levels down)."""
+    path, root = os.path.realpath(path), os.path.realpath(root)
+    if not os.path.normcase(path).startswith(os.path.normcase(root) + os.sep):
+        return None
+    return os.path.join(root, os.path.relpath(path, root).split(os.sep)[0])
+
+def plan_prune(jdks: List[JdkInfo], root: str, policy: RetentionPolicy, usage: UsageLog,
+               active: List[str], now: Optional[float] = None) -> PrunePlan:
+    """Decides what to keep and remove. Touches nothing."""
+    now = time.time() if now is None else now
+    plan = PrunePlan()
+    active_paths = {os.path.normcase(os.path.realpath(path)) for path in active if path}
+    folders = {jdk.path: _install_dir(jdk.path, root) for jdk in jdks}
+    managed = [jdk for jdk in jdks if folders[jdk.path]]
+
+    decided: Dict[str, PruneEntry] = {}
+    outdated = set()
+    for jdk in managed:
+        last_used = max([when for when in map(usage.get, [jdk.path] + jdk.aliases) if when] or [0]) or None
+        entry = PruneEntry(folders[jdk.path], "", jdk, last_used)
+        if os.path.normcase(os.path.realpath(jdk.path)) in active_paths:
+            entry.reason = "active"
+        elif last_used and now - last_used < policy.keep_used_days * DAY:
+            entry.reason = f"used {_ago(now - last_used)}"
+        elif not jdk.feature:
+            entry.reason = "unknown version"
+        decided[jdk.path] = entry
+
+    by_feature: Dict[int, List[JdkInfo]] = {}
+    for jdk in managed:
+        if jdk.feature:
+            by_feature.setdefault(jdk.feature, []).append(jdk)
+    for feature, group in by_feature.items():
+        group.sort(key=version_key, reverse=True)
+        for rank, jdk in enumerate(group):
+            entry = decided[jdk.path]
+            if entry.reason:
+                continue
+            if rank < policy.keep_per_version:
+                entry.reason = f"newest {rank + 1} of Java {feature}"
+            else:
+                entry.reason = f"older Java {feature} build, unused for {policy.keep_used_days:g}+ days"
+                outdated.add(jdk.path)
+
+    keep = [entry for path, entry in decided.items() if path not in outdated]
+    remove = [entry for path, entry in decided.items() if path in outdated]
+
+    # Sizes: count inodes, so hardlinked (deduplicated) files are counted once
+    inodes = {entry.path: _inodes(entry.path) for entry in decided.values()}
+    all_inodes: Dict[Tuple[int, int], int] = {}
+    for found in inodes.values():
+        all_inodes.update(found)
+    plan.total_bytes = sum(all_inodes.values())
+    refs = Counter(key for found in inodes.values() for key in found)
+
+    def release(entry):
+        freed = 0
+        for key, size in inodes[entry.path].items():
+            refs[key] -= 1
+            if refs[key] == 0:
+                freed += size
+        entry.freed_bytes = freed
+        return freed
+
+    remaining = plan.total_bytes
+    for entry in remove:
+        remaining -= release(entry)
+
+    if policy.max_total_mb and remaining > policy.max_total_mb * 1024 * 1024:
+        evictable = sorted((entry for entry in keep if entry.reason != "active"),
+                           key=lambda entry: (entry.last_used or 0, version_key(entry.jdk)))
+        for entry in evictable:
+            if remaining <= policy.max_total_mb * 1024 * 1024:
+                break
+            remaining -= release(entry)
+            entry.reason = f"over the {policy.max_total_mb} MB cap (was: {entry.reason})"
+            keep.remove(entry)
+            remove.append(entry)
+
+    for name in _listdir(root):
+        if name.startswith(TEMP_PREFIX):
+            path = os.path.join(root, name)
+            alive = staging_owner_alive(path)
+            if alive:
+                continue  # still extracting
+            if alive is None:
+                try:
+                    if now - os.path.getmtime(path) < TEMP_MIN_AGE:
+                        continue
+                except OSError:
+                    continue
+            size = sum(_inodes(path).values())
+            remove.append(PruneEntry(path, "leftover from an interrupted install", freed_bytes=size))
+
+    plan.keep, plan.remove = keep, remove
+    return plan
+
+def apply_plan(plan: PrunePlan, usage: Optional[UsageLog] = None) -> List[Tuple[PruneEntry, str]]:
+    """Deletes what the plan removes. Returns (entry, error) for the folders that couldn't be deleted."""
+    errors = []
+    for entry in plan.remove:
+        try:
+            shutil.rmtree(entry.path)
+        except OSError as e:
+            errors.append((entry, str(e)))
+    if usage is not None:
+        usage.forget(entry.jdk.path for entry in plan.remove if entry.jdk)
+        usage.save()
+    root_dirs = {os.path.dirname(entry.path) for entry in plan.remove}
+    if root_dirs:
+        # Store objects only the removed JDKs linked to
+        from .dedupe import ContentStore
+        for directory in root_dirs:
+            ContentStore(directory).prune()
+    return errors
+
+def active_homes(manager) -> List[str]:
+    """JAVA_HOME of this process and of what new shells / the registry will get."""
+    homes = [os.environ.get("JAVA_HOME")]
+    try:
+        homes.append(manager.get_current_jdk())
+        if os.name != "nt":
+            # get_current_jdk prefers this process's environment over the env file
+            from .shell_utils import read_env_file
+            homes.append(read_env_file()[0].get("JAVA_HOME"))
+    except OSError:
+        pass
+    return [home for home in homes if home]
+
+def auto_prune(manager, root: str) -> Optional[PrunePlan]:
+    """The after-install pass, if enabled in the config ("prune_after_install"). Returns what was removed."""
+    if not manager.config.get("prune_after_install"):
+        return None
+    usage = UsageLog()
+    plan = plan_prune(manager.find_jdks(), root, RetentionPolicy.from_config(manager.config), usage,
+                      active_homes(manager))
+    usage.save()
+    if plan.remove:
+        apply_plan(plan, usage)
+        manager.find_jdks()
+    return plan
+
+def _listdir(path: str) -> List[str]:
+    try:
+        return os.listdir(path)
+    except OSError:
+        return []
+
+def _ago(seconds: float) -> str:
+    if seconds < DAY:
+        return "today"
+    days = int(seconds // DAY)
+    return f"{days} day{'s' if days != 1 else ''} ago"
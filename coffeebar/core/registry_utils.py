@@ -2,10 +2,12 @@ import os
 import winreg
 import ctypes
 from ctypes.wintypes import HWND, UINT, WPARAM, LPARAM, LPVOID
+from . import trace
 
 HW_BROADCAST = 0xFFFF
 WM_SETTINGCHANGE = 0x001A
 
+@trace.traced("registry.read")
 def get_env_variable(name, user=True):
     """Retrieves an environment variable from the registry."""
     key = winreg.HKEY_CURRENT_USER if user else winreg.HKEY_LOCAL_MACHINE
@@ -17,6 +19,7 @@ def get_env_variable(name, user=True):
     except FileNotFoundError:
         return None
 
+@trace.traced("registry.write")
 def set_env_variable(name, value, user=True):
     """Sets an environment variable in the registry."""
     key = winreg.HKEY_CURRENT_USER if user else winreg.HKEY_LOCAL_MACHINE
@@ -27,6 +30,7 @@ def set_env_variable(name, value, user=True):
 
     broadcast_settings_change()
 
+@trace.traced("registry.write")
 def append_to_path(value, user=True):
     """Appends a value to the Path environment variable if not present."""
     current_path = get_env_variable("Path", user) or ""
@@ -43,6 +47,44 @@ def append_to_path(value, user=True):
              winreg.SetValueEx(reg_key, "Path", 0, winreg.REG_EXPAND_SZ, new_path)
         broadcast_settings_change()
 
+@trace.traced("registry.write")
+def apply_env_changes(values, path_entries=(), user=True):
+    """
+    Applies several variables (None deletes one) and Path entries with a single
+    open of the Environment key. Values that are already set are not rewritten.
+    Returns True if anything changed; the caller broadcasts once.
+    """
+    key = winreg.HKEY_CURRENT_USER if user else winreg.HKEY_LOCAL_MACHINE
+    subkey = r"Environment" if user else r"SYSTEM\CurrentControlSet\Control\Session Manager\Environment"
+    changed = False
+    with winreg.CreateKey(key, subkey) as reg_key:
+        for name, value in values.items():
+            try:
+                current, _ = winreg.QueryValueEx(reg_key, name)
+            except FileNotFoundError:
+                current = None
+            if current == value:
+                continue
+            if value is None:
+                winreg.DeleteValue(reg_key, name)
+            else:
+                winreg.SetValueEx(reg_key, name, 0, winreg.REG_SZ, value)
+            changed = True
+
+        if path_entries:
+            try:
+                current_path, _ = winreg.QueryValueEx(reg_key, "Path")
+            except FileNotFoundError:
+                current_path = ""
+            parts = [p.strip() for p in current_path.split(";") if p.strip()]
+            missing = [v for v in path_entries if not any(p.lower() == v.lower() for p in parts)]
+            if missing:
+                # Use REG_EXPAND_SZ for Path to allow %variables%
+                winreg.SetValueEx(reg_key, "Path", 0, winreg.REG_EXPAND_SZ, ";".join(parts + missing))
+                changed = True
+    return changed
+
+@trace.traced("WM_SETTINGCHANGE broadcast")
 def broadcast_settings_change():
     """Broadcasts a message to all top-level windows that settings have changed."""
     SendMessageTimeout = ctypes.windll.user32.SendMessageTimeoutW
@@ -0,0 +1,198 @@
+import json
+import os
+import platform
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from . import paths, trace
+
+DEFAULT_API = "https://api.adoptium.net"
+# Latest-release metadata changes a few times a quarter; after this long we revalidate
+DEFAULT_TTL = 6 * 3600
+
+_ARCH_ALIASES = {
+    "x86_64": "x64", "amd64": "x64",
+    "aarch64": "aarch64", "arm64": "aarch64",
+    "i386": "x32", "i686": "x32", "x86": "x32",
+    "armv7l": "arm", "armv6l": "arm",
+    "ppc64le": "ppc64le", "s390x": "s390x",
+}
+
+def current_os() -> str:
+    """This machine's OS in Adoptium's vocabulary (windows, mac, linux, alpine-linux)."""
+    if os.name == "nt":
+        return "windows"
+    if platform.system() == "Darwin":
+        return "mac"
+    if os.path.exists("/etc/alpine-release"):
+        return "alpine-linux"
+    return "linux"
+
+def current_arch() -> str:
+    """This machine's architecture in Adoptium's vocabulary (x64, aarch64, ...)."""
+    machine = platform.machine().lower()
+    return _ARCH_ALIASES.get(machine, machine)
+
+class MetadataCache:
+    """
+    On-disk cache of API responses, keyed by URL.
+
+    Each entry keeps the body together with the validators the server sent
+    (ETag, Last-Modified) and when it was last confirmed current.
+    """
+
+    def __init__(self, cache_file: Optional[str] = None):
+        self.cache_file = cache_file or str(paths.cache_dir() / "adoptium.json")
+        self._lock = threading.Lock()
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+        self.dirty = False
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self.entries.get(key)
+
+    def put(self, key: str, entry: Dict[str, Any]):
+        with self._lock:
+            self.entries[key] = entry
+            self.dirty = True
+
+    def save(self):
+        with self._lock:
+            if not self.dirty:
+                return
+            try:
+                paths.atomic_write_text(self.cache_file, json.dumps(self.entries))
+            except OSError:
+                return
+            self.dirty = False
+
+class AdoptiumClient:
+    """
+    Adoptium v3 API client with a TTL cache and conditional revalidation.
+
+    Fresh entries are served without touching the network; stale ones are
+    revalidated with If-None-Match / If-Modified-Since (a 304 costs no body).
+    If the API is unreachable, the last cached answer is used, however old.
+    COFFEEBAR_ADOPTIUM_API points the client at a mirror or a local stub.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, cache: Optional[MetadataCache] = None,
+                 ttl: float = DEFAULT_TTL, os_name: Optional[str] = None, arch: Optional[str] = None,
+                 image_type: str = "jdk", session: Optional[requests.Session] = None,
+                 timeout=(5, 20)):
+        self.base_url = (base_url or os.environ.get("COFFEEBAR_ADOPTIUM_API") or DEFAULT_API).rstrip("/")
+        self.cache = cache or MetadataCache()
+        self.ttl = ttl
+        self.os_name = os_name or current_os()
+        self.arch = arch or current_arch()
+        self.image_type = image_type
+        self.timeout = timeout
+        if session is None:
+            session = requests.Session()
+            # Keep-alive connections shared by concurrent lookups
+            adapter = HTTPAdapter(pool_maxsize=8)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self.session = session
+
+    def get_json(self, path: str, params: Optional[Dict[str, Any]] = None, max_age: Optional[float] = None,
+                 cache_only: bool = False) -> Any:
+        """GET a JSON document through the cache. With cache_only, never touches the network (None on a miss)."""
+        url = self.base_url + path
+        key = url + "?" + "&".join(f"{k}={v}" for k, v in sorted((params or {}).items()))
+        entry = self.cache.get(key)
+        if cache_only:
+            return entry["body"] if entry else None
+        max_age = self.ttl if max_age is None else max_age
+        if entry and time.time() - entry["checked_at"] < max_age:
+            return entry["body"]
+
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            with trace.span("metadata.http", path=path) as span:
+                response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+                span.set(status=response.status_code)
+            if response.status_code == 304 and entry:
+                self.cache.put(key, dict(entry, checked_at=time.time()))
+                return entry["body"]
+            response.raise_for_status()
+            body = response.json()
+        except (requests.RequestException, ValueError):
+            if entry:
+                # Offline (or the API is having a bad day): stale beats nothing
+                return entry["body"]
+            raise
+
+        self.cache.put(key, {
+            "body": body,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "checked_at": time.time(),
+        })
+        return body
+
+    def latest_release(self, version: int, max_age: Optional[float] = None,
+                       cache_only: bool = False) -> Optional[Dict[str, Any]]:
+        """Latest Temurin build of a feature version for this client's OS/arch, or None."""
+        params = {
+            "architecture": self.arch,
+            "image_type": self.image_type,
+            "os": self.os_name,
+            "vendor": "eclipse",
+        }
+        data = self.get_json(f"/v3/assets/latest/{version}/hotspot", params, max_age, cache_only)
+        if not data:
+            return None
+
+        # data is a list of binaries (usually one for latest)
+        binary = data[0]["binary"]
+        package = binary["package"]
+        return {
+            "version": version,
+            "name": data[0]["release_name"],
+            "url": package["link"],
+            "size": package["size"],
+            "filename": package["name"],
+            # Published SHA-256 of the package; installs are verified against it
+            "checksum": package.get("checksum"),
+            "os": self.os_name,
+            "arch": self.arch,
+        }
+
+    def latest_releases(self, versions: Iterable[int], max_age: Optional[float] = None) -> Dict[int, Optional[Dict[str, Any]]]:
+        """
+        latest_release for several versions, fetched concurrently.
+
+        A version whose lookup fails maps to None; the cache is saved once at the end.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        versions = list(versions)
+        results: Dict[int, Optional[Dict[str, Any]]] = {}
+
+        def lookup(version):
+            try:
+                return self.latest_release(version, max_age)
+            except (requests.RequestException, ValueError, KeyError, IndexError):
+                return None
+
+        if versions:
+            with ThreadPoolExecutor(max_workers=min(8, len(versions))) as pool:
+                for version, release in zip(versions, pool.map(lookup, versions)):
+                    results[version] = release
+        self.cache.save()
+        return results
+
+    def cached_releases(self, versions: Iterable[int]) -> Dict[int, Optional[Dict[str, Any]]]:
+        """Whatever is in the cache for these versions (any age), without network access."""
+        return {version: self.latest_release(version, cache_only=True) for version in versions}
@@ -0,0 +1,451 @@
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List
+from . import paths, shell_utils
+from .jdk_probe import JdkInfo
+from .usage import usage_log
+from .version_index import VersionIndex, is_lts
+
+SHELLS = ("bash", "zsh", "fish")
+
+def tables_dir() -> Path:
+    return paths.cache_dir() / "shell"
+
+def table_file(shell: str) -> Path:
+    # bash and zsh share the POSIX-style table
+    return tables_dir() / ("jdks.fish" if shell == "fish" else "jdks.sh")
+
+def build_table(jdks: List[JdkInfo]) -> Dict[str, str]:
+    """
+    Maps every name a JDK can be selected by to its JAVA_HOME.
+
+    Exact keys only (paths, aliases, names, versions, 'latest', 'lts'); partial
+    names and version ranges are left to the Python resolver. Versions map to
+    the newest match, in the same order as JdkManager.resolve.
+    """
+    table = {}
+    for jdk in VersionIndex(jdks).newest_first():
+        keys = [jdk.path, jdk.name, jdk.name.lower()]
+        for alias in jdk.aliases:
+            keys += [alias, os.path.basename(alias)]
+        if jdk.feature:
+            keys += [
+                str(jdk.feature),
+                f"{jdk.feature}.{jdk.interim}.{jdk.update}",
+                jdk.version,
+                jdk.version_string,
+                "latest",
+            ]
+            if is_lts(jdk.feature):
+                keys.append("lts")
+        for key in keys:
+            # Newest first, so the first JDK claiming a key keeps it
+            if key and key not in table:
+                table[key] = jdk.path
+    return table
+
+def _sh_quote(text: str) -> str:
+    return "'" + text.replace("'", "'\\''") + "'"
+
+def _fish_quote(text: str) -> str:
+    return "'" + text.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+def render_table(shell: str, table: Dict[str, str]) -> str:
+    """Renders the lookup table as a shell function setting _coffeebar_home."""
+    by_home: Dict[str, List[str]] = {}
+    for key, home in table.items():
+        by_home.setdefault(home, []).append(key)
+
+    if shell == "fish":
+        lines = ["# Generated by CoffeeBar from the discovery index. Do not edit.",
+                 "function _coffeebar_lookup", "    switch $argv[1]"]
+        for home, keys in by_home.items():
+            lines.append("        case " + " ".join(_fish_quote(k) for k in keys))
+            lines.append(f"            set -g _coffeebar_home {_fish_quote(home)}")
+        lines += ["        case '*'", "            return 1", "    end", "end", ""]
+        return "\n".join(lines)
+
+    lines = ["# Generated by CoffeeBar from the discovery index. Do not edit.",
+             "_coffeebar_lookup() {", '    case "$1" in']
+    for home, keys in by_home.items():
+        lines.append("        " + "|".join(_sh_quote(k) for k in keys) + f") _coffeebar_home={_sh_quote(home)} ;;")
+    lines += ["        *) return 1 ;;", "    esac", "}", ""]
+    return "\n".join(lines)
+
+def write_tables(jdks: List[JdkInfo]):
+    """Regenerates the per-shell lookup tables, touching only files whose content changed."""
+    table = build_table(jdks)
+    for shell in ("bash", "fish"):
+        path = table_file(shell)
+        text = render_table(shell, table)
+        try:
+            if path.exists() and path.read_text(encoding="utf-8") == text:
+                continue
+            paths.atomic_write_text(path, text)
+        except OSError:
+            # Shell integration is optional; the Python CLI keeps working without it
+            continue
+
+def _python_command() -> List[str]:
+    """How the generated function calls back into the Python CLI."""
+    wrapper = Path(__file__).resolve().parent.parent.parent / "bin" / "coffeebar"
+    if os.name != "nt" and os.access(wrapper, os.X_OK):
+        return [str(wrapper)]
+    return [sys.executable, "-m", "coffeebar.main"]
+
+_SH_TEMPLATE = r"""# CoffeeBar shell integration (@SHELL@)
+_coffeebar_table=@TABLE@
+_coffeebar_env_file=@ENV_FILE@
+_coffeebar_projects=@PROJECTS@
+_coffeebar_usage=@USAGE_LOG@
+[ -f "$_coffeebar_table" ] && . "$_coffeebar_table"
+
+_coffeebar_py() {
+    @PYTHON@ "$@"
+}
+
+_coffeebar_strip_path() {
+    if [ -n "$JAVA_HOME" ]; then
+        PATH=":$PATH:"
+        PATH="${PATH//":$JAVA_HOME/bin:"/:}"
+        PATH="${PATH#:}"
+        PATH="${PATH%:}"
+    fi
+}
+
+_coffeebar_switch() {
+    _coffeebar_strip_path
+    export JAVA_HOME="$1"
+    export PATH="$JAVA_HOME/bin:$PATH"
+    # Last-used record for `coffeebar prune` (see core/usage.py)
+    { printf '%s\n' "$1" >> "$_coffeebar_usage"; } 2>/dev/null
+}
+
+_coffeebar_write_env() {
+    # What `coffeebar use` writes (shell_utils.render_env_file): only the JAVA_HOME
+    # line changes, so other variables and `add-to-path` entries are kept. Returns 1
+    # for an env file without JAVA_HOME, where Python has to insert it.
+    local value="$1" line found=""
+    # shell_utils._dq
+    value=${value//\\/\\\\}; value=${value//\"/\\\"}; value=${value//\$/\\\$}; value=${value//\`/\\\`}
+    if [ ! -f "$_coffeebar_env_file" ]; then
+        printf '@ENV_FORMAT@' "$value" > "$_coffeebar_env_file.$$"
+    else
+        while IFS= read -r line || [ -n "$line" ]; do
+            case "$line" in
+                'export JAVA_HOME="'*) printf 'export JAVA_HOME="%s"\n' "$value"; found=1 ;;
+                *) printf '%s\n' "$line" ;;
+            esac
+        done < "$_coffeebar_env_file" > "$_coffeebar_env_file.$$"
+        if [ -z "$found" ]; then
+            rm -f "$_coffeebar_env_file.$$"
+            return 1
+        fi
+    fi
+    # Temp file + rename, like the Python side
+    mv -f "$_coffeebar_env_file.$$" "$_coffeebar_env_file"
+}
+
+coffeebar() {
+    if [ $# -eq 2 ] && [ "$1" = "use" ] && _coffeebar_lookup "$2" 2>/dev/null \
+            && _coffeebar_write_env "$_coffeebar_home"; then
+        _coffeebar_switch "$_coffeebar_home"
+        echo "Set JAVA_HOME to $JAVA_HOME"
+        return 0
+    fi
+    _coffeebar_py "$@"
+    local code=$?
+    [ -f "$_coffeebar_table" ] && . "$_coffeebar_table"
+    if [ $code -eq 0 ] && [ "$1" = "use" ] && [ -f "$_coffeebar_env_file" ]; then
+        . "$_coffeebar_env_file"
+    fi
+    return $code
+}
+
+# Per-directory JDK selection (.java-version, .sdkmanrc, .tool-versions, pom.xml
+# toolchains). Runs before every prompt using builtins only; Python is started
+# only for pom.xml toolchains and specs missing from the lookup table, and only when
+# the marker or its content changed. Disable with COFFEEBAR_AUTO_SWITCH=0.
+
+_coffeebar_read_spec() {
+    _coffeebar_spec=""
+    local k v rest
+    case "$1" in
+        */.java-version)
+            read -r _coffeebar_spec rest < "$1" ;;
+        */.sdkmanrc)
+            while IFS='=' read -r k v || [ -n "$k" ]; do
+                [ "$k" = "java" ] && _coffeebar_spec="$v"
+            done < "$1" ;;
+        */.tool-versions)
+            while read -r k v rest || [ -n "$k" ]; do
+                [ "$k" = "java" ] && _coffeebar_spec="$v"
+            done < "$1" ;;
+    esac
+}
+
+_coffeebar_pom_has_jdk() {
+    # Loose builtin version of project_version.read_spec's <jdk><version> test: a
+    # pom.xml without one (a plain Maven module) doesn't stop the walk up
+    local text
+    IFS= read -r -d '' text < "$1"
+    case "$text" in *"<jdk>"*"<version>"*) return 0 ;; esac
+    return 1
+}
+
+_coffeebar_resolve_spec() {
+    # Same candidates as project_version.spec_candidates
+    _coffeebar_lookup "$1" 2>/dev/null && return 0
+    case "$1" in
+        [0-9]*-*) _coffeebar_lookup "${1%-*}" 2>/dev/null ;;
+        *-*) _coffeebar_lookup "${1#*-}" 2>/dev/null ;;
+        *) return 1 ;;
+    esac
+}
+
+_coffeebar_auto() {
+    [ "${COFFEEBAR_AUTO_SWITCH:-1}" = "0" ] && return 0
+    local dir="$PWD" marker="" name key home=""
+    while :; do
+        for name in .java-version .sdkmanrc .tool-versions pom.xml; do
+            if [ -f "$dir/$name" ]; then
+                [ "$name" = pom.xml ] && ! _coffeebar_pom_has_jdk "$dir/$name" && continue
+                marker="$dir/$name"
+                break 2
+            fi
+        done
+        [ -z "$dir" ] && break
+        dir="${dir%/*}"
+    done
+
+    _coffeebar_spec=""
+    [ -n "$marker" ] && _coffeebar_read_spec "$marker"
+    key="$marker|$_coffeebar_spec"
+    if [ "$key" = "$_coffeebar_auto_key" ]; then
+        # No change. pom.xml is parsed by Python, so also check it was not edited
+        # since the last resolution (which rewrote the projects cache)
+        case "$marker" in
+            */pom.xml) [ "$marker" -nt "$_coffeebar_projects" ] || return 0 ;;
+            *) return 0 ;;
+        esac
+    fi
+    _coffeebar_auto_key="$key"
+
+    if [ -n "$_coffeebar_spec" ] && _coffeebar_resolve_spec "$_coffeebar_spec"; then
+        home="$_coffeebar_home"
+    elif [ -n "$marker" ]; then
+        home="$(_coffeebar_py resolve-dir "${marker%/*}" 2>/dev/null)"
+    fi
+
+    if [ -n "$home" ]; then
+        if [ -z "$_coffeebar_auto_active" ]; then
+            _coffeebar_saved_home="$JAVA_HOME"
+            _coffeebar_auto_active=1
+        fi
+        [ "$JAVA_HOME" != "$home" ] && _coffeebar_switch "$home"
+    elif [ -n "$_coffeebar_auto_active" ]; then
+        # Left the project: restore the JDK that was active before entering it
+        _coffeebar_auto_active=""
+        if [ -n "$_coffeebar_saved_home" ]; then
+            _coffeebar_switch "$_coffeebar_saved_home"
+        else
+            _coffeebar_strip_path
+            unset JAVA_HOME
+        fi
+    fi
+    return 0
+}
+
+@HOOK@
+_coffeebar_auto
+"""
+
+_BASH_HOOK = r"""case ";${PROMPT_COMMAND};" in
+    *";_coffeebar_auto;"*) ;;
+    *) PROMPT_COMMAND="_coffeebar_auto${PROMPT_COMMAND:+;$PROMPT_COMMAND}" ;;
+esac"""
+
+_ZSH_HOOK = r"""autoload -Uz add-zsh-hook
+add-zsh-hook precmd _coffeebar_auto"""
+
+_FISH_TEMPLATE = r"""# CoffeeBar shell integration (fish)
+set -g _coffeebar_table @TABLE@
+set -g _coffeebar_env_file @ENV_FILE@
+set -g _coffeebar_projects @PROJECTS@
+set -g _coffeebar_usage @USAGE_LOG@
+test -f $_coffeebar_table; and source $_coffeebar_table
+
+function _coffeebar_py
+    @PYTHON@ $argv
+end
+
+function _coffeebar_strip_path
+    if set -q JAVA_HOME
+        set -gx PATH (string match -v -- "$JAVA_HOME/bin" $PATH)
+    end
+end
+
+function _coffeebar_switch
+    _coffeebar_strip_path
+    set -gx JAVA_HOME $argv[1]
+    set -gx PATH "$JAVA_HOME/bin" $PATH
+    # Last-used record for `coffeebar prune` (see core/usage.py)
+    begin; printf '%s\n' $argv[1] >> $_coffeebar_usage; end 2>/dev/null
+end
+
+function _coffeebar_write_env
+    # See the bash/zsh version: only the JAVA_HOME line changes
+    set -l value (string replace -a '\\' '\\\\' -- $argv[1] | string replace -a '"' '\\"' \
+        | string replace -a '$' '\\$' | string replace -a '`' '\\`')
+    set -l temp $_coffeebar_env_file.$fish_pid
+    if not test -f $_coffeebar_env_file
+        printf '@ENV_FORMAT@' $value > $temp
+    else
+        string match -q -- 'export JAVA_HOME="*' < $_coffeebar_env_file; or return 1
+        for line in (string match -- '*' < $_coffeebar_env_file)
+            if string match -q -- 'export JAVA_HOME="*' $line
+                printf 'export JAVA_HOME="%s"\n' $value
+            else
+                printf '%s\n' $line
+            end
+        end > $temp
+    end
+    mv -f $temp $_coffeebar_env_file
+end
+
+function coffeebar
+    if test (count $argv) -eq 2; and test "$argv[1]" = use; and functions -q _coffeebar_lookup; and _coffeebar_lookup $argv[2]
+        and _coffeebar_write_env $_coffeebar_home
+        _coffeebar_switch $_coffeebar_home
+        echo "Set JAVA_HOME to $JAVA_HOME"
+        return 0
+    end
+    _coffeebar_py $argv
+    set -l code $status
+    test -f $_coffeebar_table; and source $_coffeebar_table
+    if test $code -eq 0; and test "$argv[1]" = use
+        set -l line (string match -r '^export JAVA_HOME="(.*)"' < $_coffeebar_env_file)
+        # Undo shell_utils._dq
+        test -n "$line[2]"; and _coffeebar_switch (string replace -ra '\\\\(.)' '$1' -- $line[2])
+    end
+    return $code
+end
+
+# Per-directory JDK selection, see the bash/zsh version for details.
+# Disable with `set -gx COFFEEBAR_AUTO_SWITCH 0`.
+
+function _coffeebar_read_spec
+    set -g _coffeebar_spec ""
+    set -l m
+    switch $argv[1]
+        case '*/.java-version'
+            read -l line < $argv[1]
+            set m '' (string split -f1 ' ' -- (string trim -- $line))
+        case '*/.sdkmanrc'
+            set m (string match -r '^java=(\S+)' < $argv[1])
+        case '*/.tool-versions'
+            set m (string match -r '^java\s+(\S+)' < $argv[1])
+    end
+    set -q m[2]; and set -g _coffeebar_spec $m[2]
+end
+
+function _coffeebar_pom_has_jdk
+    # project_version.read_spec's test: a pom.xml without one doesn't stop the walk up
+    string match -qr '<jdk>\s*<version>' -- (string collect < $argv[1])
+end
+
+function _coffeebar_resolve_spec
+    functions -q _coffeebar_lookup; or return 1
+    _coffeebar_lookup $argv[1]; and return 0
+    if string match -qr '^[0-9].*-' -- $argv[1]
+        _coffeebar_lookup (string replace -r -- '-[^-]*$' '' $argv[1])
+    else if string match -q -- '*-*' $argv[1]
+        _coffeebar_lookup (string replace -r -- '^[^-]*-' '' $argv[1])
+    else
+        return 1
+    end
+end
+
+function _coffeebar_auto --on-event fish_prompt
+    test "$COFFEEBAR_AUTO_SWITCH" = 0; and return 0
+    set -l dir $PWD
+    set -l marker ""
+    while true
+        for name in .java-version .sdkmanrc .tool-versions pom.xml
+            if test -f "$dir/$name"
+                test $name = pom.xml; and not _coffeebar_pom_has_jdk "$dir/$name"; and continue
+                set marker "$dir/$name"
+                break
+            end
+        end
+        test -n "$marker" -o -z "$dir"; and break
+        set dir (string replace -r '/[^/]*$' '' -- $dir)
+    end
+
+    set -g _coffeebar_spec ""
+    test -n "$marker"; and _coffeebar_read_spec $marker
+    set -l key "$marker|$_coffeebar_spec"
+    if test "$key" = "$_coffeebar_auto_key"
+        string match -q '*/pom.xml' -- $marker; or return 0
+        set -l marker_mtime (path mtime -- $marker)
+        set -l cache_mtime (path mtime -- $_coffeebar_projects); or set cache_mtime 0
+        test "$marker_mtime" -gt "$cache_mtime"; or return 0
+    end
+    set -g _coffeebar_auto_key $key
+
+    set -l home ""
+    if test -n "$_coffeebar_spec"; and _coffeebar_resolve_spec $_coffeebar_spec
+        set home $_coffeebar_home
+    else if test -n "$marker"
+        set home (_coffeebar_py resolve-dir (string replace -r '/[^/]*$' '' -- $marker) 2>/dev/null)
+    end
+
+    if test -n "$home"
+        if not set -q _coffeebar_auto_active
+            set -g _coffeebar_saved_home "$JAVA_HOME"
+            set -g _coffeebar_auto_active 1
+        end
+        test "$JAVA_HOME" != "$home"; and _coffeebar_switch $home
+    else if set -q _coffeebar_auto_active
+        set -e _coffeebar_auto_active
+        if test -n "$_coffeebar_saved_home"
+            _coffeebar_switch $_coffeebar_saved_home
+        else
+            _coffeebar_strip_path
+            set -e JAVA_HOME
+        end
+    end
+end
+
+_coffeebar_auto
+"""
+
+def init_script(shell: str) -> str:
+    """
+    Shell code for `eval "$(coffeebar shell-init bash)"`.
+
+    `coffeebar use <key>` is resolved from the generated table and applied to the
+    current shell with builtins only; anything else (or a key not in the table)
+    goes through the Python CLI, after which the table is re-sourced in case the
+    command rescanned or installed something. A prompt hook switches JDKs
+    automatically in projects that declare one.
+    """
+    if shell not in SHELLS:
+        raise ValueError(f"Unsupported shell '{shell}'. Choose one of: {', '.join(SHELLS)}")
+
+    quote = _fish_quote if shell == "fish" else _sh_quote
+    replacements = {
+        "@SHELL@": shell,
+        "@TABLE@": quote(str(table_file(shell))),
+        "@ENV_FILE@": quote(str(shell_utils.env_file())),
+        "@ENV_FORMAT@": shell_utils.env_file_format(),
+        "@PROJECTS@": quote(str(paths.cache_dir() / "projects.json")),
+        "@USAGE_LOG@": quote(str(usage_log())),
+        "@PYTHON@": " ".join(quote(part) for part in _python_command()),
+        "@HOOK@": _ZSH_HOOK if shell == "zsh" else _BASH_HOOK,
+    }
+    script = _FISH_TEMPLATE if shell == "fish" else _SH_TEMPLATE
+    for placeholder, value in replacements.items():
+        script = script.replace(placeholder, value)
+    return script
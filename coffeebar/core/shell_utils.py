@@ -1,5 +1,13 @@
 import os
+import re
 from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+from . import paths, trace
+
+_EXPORT_RE = re.compile(r'^export (\w+)="((?:[^"\\]|\\.)*)"\s*$')
+_PATH_ENTRY_RE = re.compile(r'^case ":\$PATH:" in \*":((?:[^"\\]|\\.)*):"\*\)')
+# Appends one directory to PATH unless it's already there
+_PATH_ENTRY_LINE = 'case ":$PATH:" in *":{0}:"*) ;; *) export PATH="$PATH:{0}" ;; esac'
 
 def get_shell_config_file():
     """Determines the appropriate shell configuration file (.bashrc, .zshrc)."""
@@ -12,41 +20,112 @@ def get_shell_config_file():
         # Default to bashrc for bash or others
         return home / ".bashrc"
 
-def set_env_variable(name, value):
-    """Sets an environment variable by updating the shell config file."""
+# Sourced from every new shell (and again by `coffeebar use`), so it has to be
+# idempotent: PATH is rebuilt without duplicates and without the bin/ of the
+# JDK that was active before, then the new one is put in front. POSIX sh, so
+# bash, zsh and dash all run it. No single quotes, backslashes or % other than
+# the placeholder: shell_init embeds it as a printf format.
+ENV_FILE_HEADER = "# Generated by CoffeeBar; rewritten on every `coffeebar use`."
+JAVA_HOME_SNIPPET = """_coffeebar_old="${JAVA_HOME:-}"
+export JAVA_HOME="%s"
+_coffeebar_rest="$PATH:"
+PATH=""
+while [ -n "$_coffeebar_rest" ]; do
+    _coffeebar_dir="${_coffeebar_rest%%%%:*}"
+    _coffeebar_rest="${_coffeebar_rest#*:}"
+    case "$_coffeebar_dir" in
+        ""|"${_coffeebar_old:+$_coffeebar_old/bin}"|"$JAVA_HOME/bin") continue ;;
+    esac
+    case ":$PATH:" in
+        *":$_coffeebar_dir:"*) ;;
+        *) PATH="${PATH:+$PATH:}$_coffeebar_dir" ;;
+    esac
+done
+export PATH="$JAVA_HOME/bin${PATH:+:$PATH}"
+unset _coffeebar_old _coffeebar_rest _coffeebar_dir
+"""
+
+def env_file() -> Path:
+    return Path.home() / ".coffeebar_env"
+
+def _dq(value: str) -> str:
+    """Escapes a value for a double-quoted sh string."""
+    for char in ("\\", '"', "$", "`"):
+        value = value.replace(char, "\\" + char)
+    return value
+
+def render_env_file(variables: Dict[str, str], path_entries: Sequence[str] = ()) -> str:
+    """The whole ~/.coffeebar_env for these variables (JAVA_HOME also sets up PATH) and extra PATH entries."""
+    lines = [ENV_FILE_HEADER]
+    for name, value in variables.items():
+        if name != "JAVA_HOME":
+            lines.append(f'export {name}="{_dq(value)}"')
+    text = "\n".join(lines) + "\n"
+    if "JAVA_HOME" in variables:
+        text += JAVA_HOME_SNIPPET % _dq(variables["JAVA_HOME"])
+    for entry in path_entries:
+        text += _PATH_ENTRY_LINE.format(_dq(entry)) + "\n"
+    return text
+
+def env_file_format() -> str:
+    """
+    A printf format producing render_env_file({"JAVA_HOME": <the %s argument>}),
+    for the shell functions that switch JDKs without starting Python.
+    """
+    return ENV_FILE_HEADER + "\n" + JAVA_HOME_SNIPPET
+
+def read_env_file(path: Optional[Path] = None) -> Tuple[Dict[str, str], List[str]]:
+    """Variables and extra PATH entries of the env file (in the format written by render_env_file)."""
+    variables = {}
+    path_entries = []
+    try:
+        with open(path or env_file(), "r", encoding="utf-8") as f:
+            for line in f:
+                match = _EXPORT_RE.match(line)
+                if match and match.group(1) != "PATH":
+                    variables[match.group(1)] = _undq(match.group(2))
+                    continue
+                match = _PATH_ENTRY_RE.match(line)
+                if match:
+                    path_entries.append(_undq(match.group(1)))
+    except OSError:
+        pass
+    return variables, path_entries
+
+def _undq(value: str) -> str:
+    return re.sub(r'\\(.)', r"\1", value)
+
+@trace.traced("env_file.write")
+def set_env_variables(variables: Dict[str, Optional[str]], path_entries: Sequence[str] = ()) -> bool:
+    """
+    Applies several changes to the env file in one write (None unsets a variable).
+    Returns False if the file already said exactly that.
+    """
     config_file = get_shell_config_file()
-    
-    # We will use a dedicated block for CoffeeBar in the config file
-    # to avoid messing up manual configurations.
-    
+
     # Strategy: Maintain a ~/.coffeebar_env file and source it in .bashrc/.zshrc
     # This is safer and cleaner than regexing .bashrc every time.
-    
-    env_file = Path.home() / ".coffeebar_env"
-    
-    # Write the variable to the env file
-    content = ""
-    if env_file.exists():
-        with open(env_file, 'r') as f:
-            lines = f.readlines()
-        
-        # Filter out existing definition of this var
-        for line in lines:
-            if not line.startswith(f"export {name}="):
-                content += line
-    
-    content += f'\nexport {name}="{value}"\n'
-    
-    # Ensure PATH includes JAVA_HOME/bin
-    if name == "JAVA_HOME":
-        if "export PATH=$JAVA_HOME/bin:$PATH" not in content:
-            content += 'export PATH=$JAVA_HOME/bin:$PATH\n'
-
-    with open(env_file, 'w') as f:
-        f.write(content)
+    # The file is regenerated as a whole (no blank lines piling up) and replaced
+    # atomically, so a shell starting at the same moment never sources half of it.
+    current, entries = read_env_file()
+    merged = dict(current)
+    for name, value in variables.items():
+        if value is None:
+            merged.pop(name, None)
+        else:
+            merged[name] = value
+    merged_entries = entries + [entry for entry in path_entries if entry not in entries]
+    changed = merged != current or merged_entries != entries
+    if changed:
+        paths.atomic_write_text(env_file(), render_env_file(merged, merged_entries))
 
     # Ensure env file is sourced in config file
-    _ensure_sourced(config_file, env_file)
+    _ensure_sourced(config_file, env_file())
+    return changed
+
+def set_env_variable(name, value):
+    """Sets an environment variable by updating the shell config file."""
+    set_env_variables({name: value})
 
 def _ensure_sourced(config_file, env_file):
     """Ensures the env_file is sourced in the config_file."""
@@ -65,9 +144,14 @@ def _ensure_sourced(config_file, env_file):
         with open(config_file, 'a') as f:
             f.write(f"\n# CoffeeBar configuration\n{source_cmd}\n")
 
+@trace.traced("env_file.read")
 def get_env_variable(name):
     """
     Tries to read the variable from the current environment or the .coffeebar_env file.
     Note: Reading from file is tricky without sourcing. We prioritize os.environ.
     """
-    return os.environ.get(name)
+    value = os.environ.get(name)
+    if value is None:
+        # Not exported in this process (e.g. started from a desktop launcher): what new shells will get
+        value = read_env_file()[0].get(name)
+    return value
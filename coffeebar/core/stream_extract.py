@@ -0,0 +1,378 @@
+import os
+import queue
+import stat
+import struct
+import tarfile
+import threading
+import zlib
+from typing import Callable, Iterable, Optional
+
+class StreamingUnsupported(Exception):
+    """The archive can't be extracted from a forward-only stream (caller should fall back)."""
+
+def archive_kind(filename: str) -> str:
+    name = filename.lower()
+    if name.endswith((".tar.gz", ".tgz")):
+        return "tar.gz"
+    if name.endswith(".zip"):
+        return "zip"
+    raise ValueError(f"Unsupported archive type: {filename}")
+
+def safe_join(root: str, member_name: str) -> str:
+    """Joins an archive member name to root, refusing absolute paths and '..' escapes."""
+    name = member_name.replace("\\", "/")
+    parts = [p for p in name.split("/") if p not in ("", ".")]
+    if name.startswith("/") or ".." in parts or (parts and ":" in parts[0]):
+        raise ValueError(f"Unsafe path in archive: {member_name}")
+    return os.path.join(root, *parts)
+
+def link_stays_inside(root: str, link_path: str, link_target: str) -> bool:
+    """True if a relative symlink at link_path pointing to link_target stays under root."""
+    if os.path.isabs(link_target):
+        return False
+    resolved = os.path.normpath(os.path.join(os.path.dirname(link_path), link_target))
+    root = os.path.normpath(root)
+    return resolved == root or resolved.startswith(root + os.sep)
+
+class PrefetchReader:
+    """
+    File-like reader over an iterator of byte chunks (e.g. response.iter_content).
+
+    A background thread pulls chunks from the network into a bounded queue, so
+    the download keeps going while the consumer decompresses and writes to disk.
+    on_bytes(total_read_so_far) is called from that thread as data arrives.
+    """
+
+    _DONE = object()
+
+    def __init__(self, chunks: Iterable[bytes], on_bytes: Optional[Callable[[int], None]] = None,
+                 max_buffered_chunks: int = 64):
+        self._queue = queue.Queue(maxsize=max_buffered_chunks)
+        self._buffer = bytearray()
+        self._eof = False
+        self._error = None
+        self._received = 0
+        self._on_bytes = on_bytes
+        self._closed = False
+        self._thread = threading.Thread(target=self._pump, args=(chunks,), daemon=True)
+        self._thread.start()
+
+    def _pump(self, chunks):
+        try:
+            for chunk in chunks:
+                if chunk:
+                    self._received += len(chunk)
+                    if not self._put(chunk):
+                        return
+                    if self._on_bytes:
+                        self._on_bytes(self._received)
+        except BaseException as e:  # surfaced to the consumer in read()
+            self._error = e
+        finally:
+            self._put(self._DONE)
+
+    def _put(self, item) -> bool:
+        while not self._closed:
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def read(self, size: int = -1) -> bytes:
+        while not self._eof and (size < 0 or len(self._buffer) < size):
+            item = self._queue.get()
+            if item is self._DONE:
+                self._eof = True
+                if self._error:
+                    raise self._error
+            else:
+                self._buffer += item
+        if size < 0:
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def unread(self, data: bytes):
+        """Pushes bytes back to the front of the stream."""
+        self._buffer[:0] = data
+
+    @property
+    def received(self) -> int:
+        """Bytes pulled from the source so far."""
+        return self._received
+
+    def read_exact(self, size: int) -> bytes:
+        data = self.read(size)
+        if len(data) != size:
+            raise EOFError("Archive stream ended unexpectedly")
+        return data
+
+    def close(self):
+        """Stops the pump thread early (e.g. extraction failed) so it doesn't block on a full queue."""
+        self._closed = True
+
+    def drain(self):
+        """Reads and discards the rest of the stream."""
+        while self.read(1024 * 1024):
+            pass
+
+# tar.gz
+
+def extract_tar_stream(fileobj, dest_dir: str, on_member: Optional[Callable[[str, int], None]] = None):
+    """Extracts a .tar.gz from a forward-only stream ('r|gz': members are written as they arrive)."""
+    with tarfile.open(fileobj=fileobj, mode="r|gz") as tar:
+        for member in tar:
+            # Checked here on every Python, so an unsafe archive raises ValueError either way
+            safe_join(dest_dir, member.name)
+            if member.issym() and not link_stays_inside(
+                    dest_dir, safe_join(dest_dir, member.name), member.linkname):
+                raise ValueError(f"Unsafe symlink in archive: {member.name} -> {member.linkname}")
+            if member.islnk():
+                safe_join(dest_dir, member.linkname)
+            if hasattr(tarfile, "data_filter"):
+                # Python 3.12 / 3.11.4+: also strips setuid bits and refuses device files
+                tar.extract(member, dest_dir, filter="data")
+            else:
+                tar.extract(member, dest_dir)
+            if on_member:
+                on_member(member.name, member.size)
+
+# zip
+
+_LOCAL_HEADER = struct.Struct("<HHHHHIIIHH")
+_CENTRAL_HEADER = struct.Struct("<HHHHHHIIIHHHHHII")
+_LOCAL_SIG = b"PK\x03\x04"
+_CENTRAL_SIG = b"PK\x01\x02"
+_DESCRIPTOR_SIG = b"PK\x07\x08"
+_CHUNK = 256 * 1024
+
+def _zip64_sizes(extra: bytes, csize: int, usize: int):
+    """Reads sizes from the ZIP64 extra field (id 0x0001) when the header holds 0xFFFFFFFF."""
+    pos = 0
+    while pos + 4 <= len(extra):
+        field_id, field_len = struct.unpack_from("<HH", extra, pos)
+        if field_id == 0x0001:
+            data = extra[pos + 4:pos + 4 + field_len]
+            values = list(struct.unpack_from(f"<{len(data) // 8}Q", data))
+            if usize == 0xFFFFFFFF and values:
+                usize = values.pop(0)
+            if csize == 0xFFFFFFFF and values:
+                csize = values.pop(0)
+            return csize, usize, True
+        pos += 4 + field_len
+    return csize, usize, False
+
+class _NullWriter:
+    def write(self, data):
+        pass
+
+def _copy_entry(reader: PrefetchReader, out, method: int, csize: Optional[int]) -> int:
+    """Copies one entry's data to `out`, inflating if needed. Returns the CRC32 of the output."""
+    crc = 0
+    if method == 0:
+        remaining = csize
+        while remaining:
+            data = reader.read_exact(min(_CHUNK, remaining))
+            remaining -= len(data)
+            out.write(data)
+            crc = zlib.crc32(data, crc)
+        return crc
+
+    if method != 8:
+        raise StreamingUnsupported(f"Unsupported zip compression method {method}")
+
+    inflater = zlib.decompressobj(-15)
+    remaining = csize
+    while not inflater.eof:
+        if remaining is None:
+            data = reader.read(_CHUNK)
+        else:
+            data = reader.read(min(_CHUNK, remaining))
+            remaining -= len(data)
+        if not data:
+            raise EOFError("Archive stream ended inside a compressed entry")
+        output = inflater.decompress(data)
+        out.write(output)
+        crc = zlib.crc32(output, crc)
+    if inflater.unused_data:
+        # Deflate streams end on their own; whatever follows belongs to the next record
+        reader.unread(inflater.unused_data)
+    return crc
+
+def extract_zip_stream(reader: PrefetchReader, dest_dir: str, on_member: Optional[Callable[[str, int], None]] = None):
+    """
+    Extracts a .zip from a forward-only stream by walking its local file headers.
+
+    Only the central directory at the end of the archive is kept in memory; it
+    carries the Unix modes, which are applied once the stream ends (executable
+    bits, symlinks). Raises StreamingUnsupported for archives that can't be read
+    this way (encryption, stored entries with data descriptors).
+    """
+    extracted = {}
+    while True:
+        signature = reader.read_exact(4)
+        if signature == _CENTRAL_SIG:
+            reader.unread(signature)
+            break
+        if signature != _LOCAL_SIG:
+            raise StreamingUnsupported("Unexpected record in zip stream")
+
+        (_, flags, method, _, _, crc, csize, usize, name_len, extra_len) = _LOCAL_HEADER.unpack(
+            reader.read_exact(_LOCAL_HEADER.size))
+        name = reader.read_exact(name_len).decode("utf-8" if flags & 0x800 else "cp437")
+        extra = reader.read_exact(extra_len)
+        csize, usize, zip64 = _zip64_sizes(extra, csize, usize)
+
+        if flags & 0x1:
+            raise StreamingUnsupported("Encrypted zip entries are not supported")
+        is_dir = name.endswith("/")
+        has_descriptor = bool(flags & 0x8)
+        if has_descriptor and method == 0 and not is_dir:
+            raise StreamingUnsupported("Stored entries with a data descriptor have no known length")
+
+        target = safe_join(dest_dir, name)
+        if is_dir:
+            os.makedirs(target, exist_ok=True)
+            # jar-style archives give directories an (empty) deflate stream too
+            actual_crc = _copy_entry(reader, _NullWriter(), method,
+                                     None if has_descriptor and method == 8 else csize)
+        else:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "wb") as out:
+                actual_crc = _copy_entry(reader, out, method, None if has_descriptor else csize)
+        if has_descriptor:
+            head = reader.read_exact(4)
+            if head == _DESCRIPTOR_SIG:
+                head = reader.read_exact(4)
+            crc = struct.unpack("<I", head)[0]
+            reader.read_exact(16 if zip64 else 8)
+        if actual_crc != crc:
+            raise ValueError(f"CRC mismatch in {name}")
+        extracted[name] = target
+        if on_member and not is_dir:
+            on_member(name, usize)
+
+    central = reader.read()
+    _apply_central_directory(central, extracted, dest_dir)
+
+def _apply_central_directory(central: bytes, extracted, dest_dir: str):
+    """Applies Unix permissions and symlinks recorded in the central directory."""
+    pos = 0
+    while central[pos:pos + 4] == _CENTRAL_SIG:
+        fields = _CENTRAL_HEADER.unpack_from(central, pos + 4)
+        flags, name_len, extra_len, comment_len, external_attr = fields[2], fields[9], fields[10], fields[11], fields[14]
+        name_start = pos + 4 + _CENTRAL_HEADER.size
+        name = central[name_start:name_start + name_len].decode("utf-8" if flags & 0x800 else "cp437")
+        pos = name_start + name_len + extra_len + comment_len
+
+        target = extracted.get(name)
+        if target:
+            apply_unix_mode(dest_dir, name, target, external_attr >> 16)
+
+def apply_unix_mode(dest_dir: str, name: str, target: str, mode: int):
+    """Applies a zip entry's Unix mode (from external_attr >> 16): executable bits, symlinks."""
+    if not mode or os.name == "nt":
+        return
+    if stat.S_ISLNK(mode):
+        # Symlinks are stored as entries whose content is the link target
+        with open(target, "r", encoding="utf-8") as f:
+            link_target = f.read()
+        if not link_stays_inside(dest_dir, target, link_target):
+            raise ValueError(f"Unsafe symlink in archive: {name} -> {link_target}")
+        os.remove(target)
+        os.symlink(link_target, target)
+    else:
+        os.chmod(target, stat.S_IMODE(mode) & 0o777)
+
+def zip_uncompressed_size(archive_path: str) -> int:
+    """Total size of the members of a .zip on disk (read from its central directory)."""
+    import zipfile
+    with zipfile.ZipFile(archive_path, "r") as zip_ref:
+        return sum(info.file_size for info in zip_ref.infolist())
+
+# Fewer members than this per thread and the extra threads cost more than they save
+_PARALLEL_MIN_MEMBERS = 64
+
+def extract_zip_file(archive_path: str, dest_dir: str, on_member: Optional[Callable[[str, int], None]] = None,
+                     workers: Optional[int] = None):
+    """
+    Extracts a seekable .zip on disk, keeping the Unix modes zipfile.extractall drops.
+
+    Members are inflated by a pool of threads, each with its own handle on the
+    archive (zlib and file writes release the GIL), writing straight to their
+    final paths. Directories are created up front in one pass, and symlinks
+    last, so nothing is ever written through a link. on_member may be called
+    from any of the threads, but never concurrently.
+    """
+    import zipfile
+    with zipfile.ZipFile(archive_path, "r") as zip_ref:
+        infos = zip_ref.infolist()
+
+    files, links, directories = [], [], set()
+    for info in infos:
+        target = safe_join(dest_dir, info.filename)
+        if info.is_dir():
+            directories.add(target)
+            continue
+        directories.add(os.path.dirname(target))
+        mode = info.external_attr >> 16
+        (links if stat.S_ISLNK(mode) and os.name != "nt" else files).append((info, target))
+    # Sorted, parents come before children: one mkdir per directory, no makedirs probing per file
+    for directory in sorted(directories):
+        os.makedirs(directory, exist_ok=True)
+
+    lock = threading.Lock()
+    def report(info):
+        if on_member:
+            with lock:
+                on_member(info.filename, info.file_size)
+
+    # Largest first, so lib/modules starts right away instead of being the last thing left running
+    files.sort(key=lambda item: item[0].compress_size, reverse=True)
+    if workers is None:
+        workers = min(8, os.cpu_count() or 1)
+    workers = max(1, min(workers, len(files) // _PARALLEL_MIN_MEMBERS + 1))
+    if workers == 1:
+        _extract_members(archive_path, dest_dir, iter(files), report, threading.Event())
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+        pending = iter(files)
+        failed = threading.Event()
+        def next_member():
+            with lock:
+                return next(pending, None)
+        members = iter(next_member, None)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            jobs = [pool.submit(_extract_members, archive_path, dest_dir, members, report, failed)
+                    for _ in range(workers)]
+        for job in jobs:
+            job.result()
+
+    with zipfile.ZipFile(archive_path, "r") as zip_ref:
+        for info, target in links:
+            link_target = zip_ref.read(info).decode("utf-8")
+            if not link_stays_inside(dest_dir, target, link_target):
+                raise ValueError(f"Unsafe symlink in archive: {info.filename} -> {link_target}")
+            os.symlink(link_target, target)
+            report(info)
+
+def _extract_members(archive_path, dest_dir, members, report, failed):
+    """Worker: extracts members from its own handle on the archive until none are left (or another failed)."""
+    import shutil
+    import zipfile
+    try:
+        with zipfile.ZipFile(archive_path, "r") as zip_ref:
+            for info, target in members:
+                if failed.is_set():
+                    return
+                # zipfile checks the CRC when the member has been read to the end
+                with zip_ref.open(info) as source, open(target, "wb") as out:
+                    shutil.copyfileobj(source, out, 1024 * 1024)
+                apply_unix_mode(dest_dir, info.filename, target, info.external_attr >> 16)
+                report(info)
+    except BaseException:
+        failed.set()
+        raise
@@ -0,0 +1,216 @@
+"""
+Lightweight timing spans.
+
+    with trace.span("probe", home=home):
+        ...
+
+Off by default: span() then returns one shared no-op object, so an
+instrumented call costs a global lookup and an empty `with`. `coffeebar
+--profile` / `--trace-file FILE` (see main.py) call enable(), and finish()
+prints a timing tree to stderr and/or writes Chrome trace-event JSON
+(chrome://tracing, ui.perfetto.dev) when the process ends.
+
+Spans nest per thread. A span opened on a worker thread with nothing open
+there (thread pools: probing, scanning, concurrent installs) is shown in
+the tree under whatever the main thread had open at the time.
+"""
+import atexit
+import functools
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+class Span:
+    __slots__ = ("recorder", "name", "args", "start", "end", "tid", "parent", "children")
+
+    def __init__(self, recorder: "Recorder", name: str, args: Dict[str, Any]):
+        self.recorder = recorder
+        self.name = name
+        self.args = args
+        self.start = self.end = 0
+        self.tid = 0
+        self.parent: Optional[Span] = None
+        self.children: List[Span] = []
+
+    def set(self, **args):
+        """Adds details learnt while the span runs (sizes, counts, results)."""
+        self.args.update(args)
+
+    def __enter__(self):
+        self.recorder.open(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.recorder.close(self)
+        return False
+
+    @property
+    def duration(self) -> float:
+        """Seconds."""
+        return (self.end - self.start) / 1e9
+
+class Recorder:
+    """Collects finished spans from every thread."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.spans: List[Span] = []
+        self.roots: List[Span] = []
+        self.thread_names: Dict[int, str] = {}
+        self.started = time.perf_counter_ns()
+        self._local = threading.local()
+        self._main_stack: List[Span] = []
+        self._main_thread = threading.main_thread()
+
+    def _stack(self) -> List[Span]:
+        if threading.current_thread() is self._main_thread:
+            return self._main_stack
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def open(self, span: Span):
+        stack = self._stack()
+        thread = threading.current_thread()
+        span.tid = thread.ident or 0
+        span.start = time.perf_counter_ns()
+        if stack:
+            span.parent = stack[-1]
+        else:
+            try:
+                span.parent = self._main_stack[-1]
+            except IndexError:  # empty, or emptied by the main thread meanwhile
+                span.parent = None
+        stack.append(span)
+        with self.lock:
+            self.thread_names.setdefault(span.tid, thread.name)
+            (span.parent.children if span.parent else self.roots).append(span)
+
+    def close(self, span: Span):
+        span.end = time.perf_counter_ns()
+        stack = self._stack()
+        if stack and stack[-1] is span:
+            stack.pop()
+        elif span in stack:
+            stack.remove(span)
+        with self.lock:
+            self.spans.append(span)
+
+    # Output
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """Trace-event JSON: one complete ("X") event per span, plus thread names."""
+        pid = os.getpid()
+        events = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                  for tid, name in self.thread_names.items()]
+        for span in sorted(self.spans, key=lambda s: s.start):
+            events.append({"name": span.name, "cat": "coffeebar", "ph": "X", "pid": pid, "tid": span.tid,
+                           "ts": (span.start - self.started) / 1000, "dur": (span.end - span.start) / 1000,
+                           "args": {key: _jsonable(value) for key, value in span.args.items()}})
+        return {"traceEvents": events, "displayTimeUnit": "ms",
+                "otherData": {"argv": sys.argv, "python": sys.version.split()[0]}}
+
+    def format_tree(self) -> str:
+        """Indented timing tree. Siblings with the same name (one probe per JDK, ...) are folded into one line."""
+        lines = []
+        total = (time.perf_counter_ns() - self.started) / 1e9
+        lines.append(f"{total * 1000:9.1f}ms  total")
+        self._format(self._finished(self.roots), 1, lines)
+        return "\n".join(lines)
+
+    def _finished(self, spans: List[Span]) -> List[Span]:
+        return [span for span in spans if span.end]
+
+    def _format(self, spans: List[Span], depth: int, lines: List[str]):
+        groups: Dict[str, List[Span]] = {}
+        for span in sorted(spans, key=lambda s: s.start):
+            groups.setdefault(span.name, []).append(span)
+        indent = "  " * depth
+        for name, group in groups.items():
+            if len(group) == 1:
+                span = group[0]
+                details = " ".join(f"{key}={_short(value)}" for key, value in span.args.items())
+                lines.append(f"{span.duration * 1000:9.1f}ms  {indent}{name}" + (f"  [{details}]" if details else ""))
+                self._format(self._finished(span.children), depth + 1, lines)
+            else:
+                # Sum of durations: with a thread pool, more than the wall time they took together
+                summed = sum(span.duration for span in group)
+                slowest = max(group, key=lambda s: s.duration)
+                lines.append(f"{summed * 1000:9.1f}ms  {indent}{name} x{len(group)}  "
+                             f"[slowest {slowest.duration * 1000:.1f}ms"
+                             + "".join(f" {key}={_short(value)}" for key, value in slowest.args.items()) + "]")
+                children = [child for span in group for child in span.children]
+                self._format(self._finished(children), depth + 1, lines)
+
+def _jsonable(value):
+    return value if isinstance(value, (str, int, float, bool, type(None))) else str(value)
+
+def _short(value) -> str:
+    text = str(value)
+    return text if len(text) <= 60 else "..." + text[-57:]
+
+_recorder: Optional[Recorder] = None
+_outputs: Dict[str, Any] = {}
+
+def enabled() -> bool:
+    return _recorder is not None
+
+def span(name: str, **args):
+    """A context manager timing its block; a no-op unless tracing is enabled."""
+    if _recorder is None:
+        return _NULL_SPAN
+    return Span(_recorder, name, args)
+
+def traced(name: str):
+    """Decorator form of span(), for whole functions."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _recorder is None:
+                return func(*args, **kwargs)
+            with Span(_recorder, name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def enable(profile: bool = False, trace_file: Optional[str] = None) -> Recorder:
+    """Starts recording. The tree (profile) and/or the trace file are written by finish(), at exit at the latest."""
+    global _recorder
+    if _recorder is None:
+        _recorder = Recorder()
+        atexit.register(finish)
+    _outputs.update(profile=profile, trace_file=trace_file)
+    return _recorder
+
+def finish():
+    """Writes the requested outputs and stops recording. Called before exec() replaces the process, and at exit."""
+    global _recorder
+    recorder, _recorder = _recorder, None
+    if recorder is None:
+        return
+    if _outputs.get("trace_file"):
+        import json
+        try:
+            with open(_outputs["trace_file"], "w", encoding="utf-8") as f:
+                json.dump(recorder.chrome_trace(), f)
+        except OSError as e:
+            print(f"coffeebar: could not write trace file: {e}", file=sys.stderr)
+    if _outputs.get("profile"):
+        print(recorder.format_tree(), file=sys.stderr)
@@ -0,0 +1,112 @@
+"""
+When each JDK was last used, for `coffeebar prune`.
+
+usage.json maps JDK homes to the time they were last switched to (`use`,
+the GUI). The shell integration switches without starting Python, and
+`exec` should stay cheap, so they append the home to usage.log instead
+(one line, no timestamp: shell builtins can't portably tell the time).
+The log is folded into usage.json by the next load, with the log's mtime
+as the time of every line in it; that can make a JDK look more recently
+used than it was, which only ever keeps it longer.
+"""
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+from . import paths
+
+def usage_file() -> Path:
+    return paths.cache_dir() / "usage.json"
+
+def usage_log() -> Path:
+    """Appended to by the shell integration (see shell_init)."""
+    return paths.cache_dir() / "usage.log"
+
+class UsageLog:
+    """Last-used times of JDK homes."""
+
+    def __init__(self, usage_path: Optional[str] = None, log_path: Optional[str] = None):
+        self.usage_path = Path(usage_path) if usage_path else usage_file()
+        self.log_path = Path(log_path) if log_path else usage_log()
+        self.last_used: Dict[str, float] = {}
+        self.dirty = False
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.usage_path, "r", encoding="utf-8") as f:
+                self.last_used = {home: float(when) for home, when in json.load(f).items()}
+        except (OSError, ValueError, AttributeError):
+            self.last_used = {}
+        self._fold_log()
+
+    def _fold_log(self):
+        # Moved aside first: lines the shell appends meanwhile go to a new log, not lost
+        taken = self.log_path.with_name(f".{self.log_path.name}.{os.getpid()}")
+        try:
+            os.replace(self.log_path, taken)
+        except OSError:
+            return
+        try:
+            when = os.path.getmtime(taken)
+            with open(taken, "r", encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    home = line.strip()
+                    if home:
+                        self._touch(home, when)
+        except OSError:
+            pass
+        finally:
+            try:
+                os.remove(taken)
+            except OSError:
+                pass
+
+    def _touch(self, home: str, when: float):
+        home = os.path.normpath(home)
+        if when > self.last_used.get(home, 0):
+            self.last_used[home] = when
+            self.dirty = True
+
+    def get(self, home: str) -> Optional[float]:
+        return self.last_used.get(os.path.normpath(home))
+
+    def record(self, homes: Iterable[str], when: Optional[float] = None):
+        when = time.time() if when is None else when
+        for home in homes:
+            self._touch(home, when)
+
+    def forget(self, homes: Iterable[str]):
+        for home in homes:
+            if self.last_used.pop(os.path.normpath(home), None) is not None:
+                self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        try:
+            paths.atomic_write_text(self.usage_path, json.dumps(self.last_used, indent=1))
+        except OSError:
+            # Usage tracking must never break switching
+            return
+        self.dirty = False
+
+def append_use(*homes: str):
+    """Cheap form of record_use for hot paths (exec): one append to the log, folded in later. Never raises."""
+    try:
+        log = usage_log()
+        log.parent.mkdir(parents=True, exist_ok=True)
+        with open(log, "a", encoding="utf-8") as f:
+            f.write("".join(home + "\n" for home in homes))
+    except OSError:
+        pass
+
+def record_use(*homes: str):
+    """Marks homes as used now. Never raises."""
+    try:
+        usage = UsageLog()
+        usage.record(homes)
+        usage.save()
+    except OSError:
+        pass
@@ -0,0 +1,199 @@
+"""
+Version-aware JDK selection.
+
+Every JDK gets a sort key (feature.interim.update.patch+build, vendor, arch,
+path) and the index keeps them sorted, so a version query is two bisects
+over the keys plus a filter of the (small) slice in between. Matches come
+back newest first; ties on the version are broken by vendor, arch and path,
+so the same inventory always gives the same answer.
+
+Queries:
+
+    17, 17.0.9, 17.0.9+9, 1.8     that version and everything under it
+    >=17,<21                      comparisons (>=, >, <=, <, ==), all must hold
+    latest                        the newest JDK
+    lts                           the newest long-term-support release
+    vendor:temurin@21             any of the above, from one vendor
+    arch:aarch64@lts              ... or for one architecture
+
+Anything else (names, paths) isn't a version query: parse_query returns None.
+"""
+import bisect
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+from .jdk_probe import JdkInfo
+
+# Canonical vendor id -> words that identify it in IMPLEMENTOR or the folder name.
+# Checked in order: GraalVM builds report "Oracle Corporation" as implementor.
+_VENDORS = (
+    ("graalvm", ("graalvm", "graal")),
+    ("temurin", ("temurin", "adoptium", "adoptopenjdk")),
+    ("zulu", ("zulu", "azul")),
+    ("corretto", ("corretto", "amazon")),
+    ("liberica", ("liberica", "bellsoft")),
+    ("semeru", ("semeru", "ibm")),
+    ("sapmachine", ("sapmachine", "sap se")),
+    ("dragonwell", ("dragonwell", "alibaba")),
+    ("microsoft", ("microsoft",)),
+    ("redhat", ("red hat", "redhat")),
+    ("jetbrains", ("jetbrains", "jbr")),
+    ("oracle", ("oracle",)),
+)
+
+_ARCHES = {"amd64": "x64", "x86_64": "x64", "x86-64": "x64", "arm64": "aarch64", "i386": "x86", "i686": "x86"}
+
+_VERSION_TEXT_RE = re.compile(r"(\d+)(?:\.(\d+))?(?:\.(\d+))?(?:\.(\d+))?(?:_(\d+))?(?:(?:\+|-b)(\d+))?")
+_CONSTRAINT_RE = re.compile(r"(>=|<=|==|=|>|<)?\s*(\S+)")
+
+def vendor_id(jdk: JdkInfo) -> str:
+    """Short vendor name ('temurin', 'zulu', ...), or the lowercased implementor if unknown."""
+    text = f"{jdk.vendor} {jdk.name}".lower()
+    for vendor, words in _VENDORS:
+        if any(word in text for word in words):
+            return vendor
+    return jdk.vendor.lower() if jdk.vendor != "Unknown" else ""
+
+def normalize_arch(arch: str) -> str:
+    arch = arch.lower()
+    return _ARCHES.get(arch, arch)
+
+def is_lts(feature: int) -> bool:
+    # 8 and 11, then every fourth feature release from 17 on (21, 25, ...)
+    return feature in (8, 11) or (feature >= 17 and (feature - 17) % 4 == 0)
+
+def version_key(jdk: JdkInfo) -> Tuple[int, ...]:
+    return (jdk.feature, jdk.interim, jdk.update, jdk.patch, jdk.build or 0)
+
+def sort_key(jdk: JdkInfo):
+    return version_key(jdk) + (vendor_id(jdk), normalize_arch(jdk.arch), jdk.path)
+
+def version_prefix(text: str) -> Optional[Tuple[int, ...]]:
+    """
+    The version components spelled out in text, in sort-key order:
+    '17' -> (17,), '17.0.9' -> (17, 0, 9), '1.8.0_392' -> (8, 0, 392),
+    '17.0.9+9' -> (17, 0, 9, 0, 9). None if text isn't a version.
+    """
+    match = _VERSION_TEXT_RE.fullmatch(text)
+    if not match:
+        return None
+    major, minor, micro, patch, legacy_update, build = match.groups()
+    if major == "1" and minor:
+        # Legacy scheme: 1.<feature>.0_<update>
+        parts = [int(minor)]
+        if micro is not None:
+            parts.append(0)
+            if legacy_update is not None:
+                parts.append(int(legacy_update))
+    elif legacy_update is not None:
+        return None
+    else:
+        parts = [int(p) for p in (major, minor, micro, patch) if p is not None]
+    if build is not None:
+        parts += [0] * (4 - len(parts)) + [int(build)]
+    return tuple(parts)
+
+def _after(prefix: Tuple[int, ...]) -> Tuple[int, ...]:
+    """Smallest key past every version starting with prefix."""
+    return prefix[:-1] + (prefix[-1] + 1,)
+
+@dataclass
+class VersionQuery:
+    """A parsed query: sort keys in [low, high), optionally LTS releases only, one vendor or one arch."""
+    low: Tuple[int, ...] = (1,)  # feature 0 means the version couldn't be read
+    high: Optional[Tuple[int, ...]] = None
+    lts: bool = False
+    vendor: Optional[str] = None
+    arch: Optional[str] = None
+
+    def accepts(self, jdk: JdkInfo) -> bool:
+        if self.lts and not is_lts(jdk.feature):
+            return False
+        if self.vendor and self.vendor != vendor_id(jdk) and self.vendor not in f"{jdk.vendor} {jdk.name}".lower():
+            return False
+        if self.arch and self.arch != normalize_arch(jdk.arch):
+            return False
+        return True
+
+def parse_query(text: str) -> Optional[VersionQuery]:
+    """Parses a version query (see the module docstring), or returns None if text isn't one."""
+    query = VersionQuery()
+    parts = text.strip().lower().split("@")
+    for i, part in enumerate(parts):
+        field, sep, value = part.partition(":")
+        if sep and field in ("vendor", "arch"):
+            if not value:
+                return None
+            if field == "vendor":
+                query.vendor = value
+            else:
+                query.arch = normalize_arch(value)
+        elif i != len(parts) - 1:
+            return None  # only the last part may be a version
+        elif part == "latest":
+            pass
+        elif part == "lts":
+            query.lts = True
+        elif not _parse_constraints(part, query):
+            return None
+    return query
+
+def _parse_constraints(text: str, query: VersionQuery) -> bool:
+    for constraint in text.split(","):
+        match = _CONSTRAINT_RE.fullmatch(constraint.strip())
+        prefix = version_prefix(match.group(2)) if match else None
+        if prefix is None:
+            return False
+        op = match.group(1) or "=="
+        if op in (">=", "==", "="):
+            query.low = max(query.low, prefix)
+        if op == ">":
+            query.low = max(query.low, _after(prefix))
+        if op in ("<=", "==", "="):
+            query.high = min(query.high, _after(prefix)) if query.high else _after(prefix)
+        if op == "<":
+            query.high = min(query.high, prefix) if query.high else prefix
+    return True
+
+class VersionIndex:
+    """
+    JDKs sorted by sort_key; queries bisect the sorted keys instead of scanning
+    every JDK. Also maps exact paths, aliases and names (lowercased) to JDKs.
+    """
+
+    def __init__(self, jdks: Sequence[JdkInfo]):
+        self.source = jdks  # the list this was built from, so callers can tell when to rebuild
+        pairs = sorted(((sort_key(jdk), jdk) for jdk in jdks), key=lambda pair: pair[0])
+        self._keys = [key for key, _ in pairs]
+        self.jdks: List[JdkInfo] = [jdk for _, jdk in pairs]
+        self.by_path: Dict[str, JdkInfo] = {}
+        self.by_name: Dict[str, JdkInfo] = {}
+        for jdk in jdks:
+            # First one wins, as with a scan in list order
+            for path in [jdk.path] + jdk.aliases:
+                self.by_path.setdefault(path.lower(), jdk)
+            self.by_name.setdefault(jdk.name.lower(), jdk)
+
+    def __len__(self):
+        return len(self.jdks)
+
+    def newest_first(self) -> List[JdkInfo]:
+        return self.jdks[::-1]
+
+    def _range(self, query: VersionQuery) -> Tuple[int, int]:
+        start = bisect.bisect_left(self._keys, query.low)
+        end = bisect.bisect_left(self._keys, query.high) if query.high else len(self._keys)
+        return start, end
+
+    def select(self, query: VersionQuery) -> List[JdkInfo]:
+        """Every JDK matching the query, newest first."""
+        start, end = self._range(query)
+        return [jdk for jdk in reversed(self.jdks[start:end]) if query.accepts(jdk)]
+
+    def best(self, query: VersionQuery) -> Optional[JdkInfo]:
+        """The newest JDK matching the query."""
+        start, end = self._range(query)
+        for i in range(end - 1, start - 1, -1):
+            if query.accepts(self.jdks[i]):
+                return self.jdks[i]
+        return None
@@ -0,0 +1,297 @@
+"""
+Live inventory updates: watches the discovery roots and reports JDKs as
+they appear, disappear or change.
+
+The directories watched are exactly the ones whose signatures the discovery
+index checks (every directory visited while scanning a root, plus each
+home and its bin/), so any event there means find_jdks() has something to
+redo, and it only redoes that part. Linux uses inotify; everything else
+polls the signatures.
+"""
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set
+from .jdk_index import dir_signature, home_signature
+from .jdk_probe import JdkInfo
+
+# Quiet period before acting on events: an extraction is thousands of
+# events in a burst, and should cost one refresh
+DEFAULT_DEBOUNCE = 0.5
+# ...but a directory that never goes quiet still gets refreshed this often
+MAX_DELAY = 5.0
+POLL_INTERVAL = 2.0
+
+@dataclass
+class InventoryChange:
+    """Difference between two snapshots of the inventory."""
+    added: List[JdkInfo] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)     # paths of homes that are gone
+    changed: List[JdkInfo] = field(default_factory=list)  # re-probed with different results
+    jdks: List[JdkInfo] = field(default_factory=list)     # the whole inventory afterwards
+
+    @property
+    def empty(self) -> bool:
+        return not (self.added or self.removed or self.changed)
+
+def diff_inventory(before: Dict[str, dict], jdks: List[JdkInfo]) -> InventoryChange:
+    """Compares JDKs against a {path: to_dict()} snapshot."""
+    change = InventoryChange(jdks=jdks)
+    seen = set()
+    for jdk in jdks:
+        seen.add(jdk.path)
+        if jdk.path not in before:
+            change.added.append(jdk)
+        elif before[jdk.path] != jdk.to_dict():
+            change.changed.append(jdk)
+    change.removed = [path for path in before if path not in seen]
+    return change
+
+def _existing_ancestor(path: str) -> Optional[str]:
+    """The path itself if it's a directory, else its closest existing parent (a root may not exist yet)."""
+    while True:
+        if os.path.isdir(path):
+            return path
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+class _PollBackend:
+    """Compares directory signatures every `interval` seconds."""
+
+    def __init__(self, stop: threading.Event, interval: float = POLL_INTERVAL):
+        self.stop = stop
+        self.interval = interval
+        self.signatures: Dict[str, Optional[List[int]]] = {}
+        self.woken = threading.Event()
+
+    def set_dirs(self, dirs: Set[str]):
+        self.signatures = {path: dir_signature(path) for path in dirs}
+
+    def wait(self, timeout: Optional[float]) -> bool:
+        """Blocks up to timeout (None: until something changes). True if a watched directory changed."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.stop.is_set():
+            changed = False
+            for path, signature in self.signatures.items():
+                current = dir_signature(path)
+                if current != signature:
+                    self.signatures[path] = current
+                    changed = True
+            if changed:
+                return True
+            step = self.interval
+            if deadline is not None:
+                step = min(step, deadline - time.monotonic())
+                if step <= 0:
+                    return False
+            if self.woken.wait(step):
+                self.woken.clear()
+                return True
+        return False
+
+    def wake(self):
+        self.woken.set()
+
+    def close(self):
+        pass
+
+class _InotifyBackend:
+    """inotify(7) through ctypes: one non-recursive watch per directory."""
+
+    IN_MOVED_FROM = 0x40
+    IN_MOVED_TO = 0x80
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_DELETE_SELF = 0x400
+    IN_MOVE_SELF = 0x800
+    IN_IGNORED = 0x8000
+    IN_ONLYDIR = 0x1000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    # What changes a directory's mtime or identity, i.e. its index signature
+    MASK = IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+    # struct inotify_event: wd, mask, cookie, len, then len bytes of name
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self, stop: threading.Event):
+        import ctypes
+        import ctypes.util
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.stop = stop
+        # wake() writes here to interrupt a select()
+        self.wake_r, self.wake_w = os.pipe()
+        self.watches: Dict[str, int] = {}
+
+    def set_dirs(self, dirs: Set[str]):
+        for path in [p for p in self.watches if p not in dirs]:
+            self.libc.inotify_rm_watch(self.fd, self.watches.pop(path))
+        for path in dirs:
+            if path not in self.watches:
+                wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), self.MASK)
+                if wd >= 0:
+                    # Out of watches (fs.inotify.max_user_watches) just means this directory isn't live
+                    self.watches[path] = wd
+
+    def wait(self, timeout: Optional[float]) -> bool:
+        if self.stop.is_set():
+            return False
+        readable, _, _ = select.select([self.fd, self.wake_r], [], [], timeout)
+        if not readable:
+            return False
+        if self.wake_r in readable:
+            os.read(self.wake_r, 4096)
+        # Only watches that ended matter; any other event just means "refresh": drain them all
+        try:
+            while self.fd in readable:
+                data = os.read(self.fd, 64 * 1024)
+                if not data:
+                    break
+                self._forget_gone(data)
+        except BlockingIOError:
+            pass
+        return True
+
+    def _forget_gone(self, data: bytes):
+        """
+        Drops the watches of directories that were deleted or moved away, so the
+        next set_dirs() watches whatever now has their path (a recreated home).
+        The kernel has already removed a deleted directory's watch (IN_IGNORED);
+        a moved one still follows the directory to its new name.
+        """
+        offset = 0
+        while offset + self._EVENT.size <= len(data):
+            wd, mask, _, length = self._EVENT.unpack_from(data, offset)
+            offset += self._EVENT.size + length
+            if not mask & (self.IN_IGNORED | self.IN_DELETE_SELF | self.IN_MOVE_SELF):
+                continue
+            gone = [path for path, watch in self.watches.items() if watch == wd]
+            for path in gone:
+                del self.watches[path]
+            if gone and mask & self.IN_MOVE_SELF:
+                self.libc.inotify_rm_watch(self.fd, wd)
+
+    def wake(self):
+        os.write(self.wake_w, b"x")
+
+    def close(self):
+        for fd in (self.fd, self.wake_r, self.wake_w):
+            os.close(fd)
+
+class InventoryWatcher:
+    """
+    Keeps a JdkManager's inventory current while a process stays up (the GUI,
+    a resident agent). Changes are debounced, applied incrementally through
+    find_jdks() and reported as on_change(InventoryChange) on the watcher's
+    own thread, only when something actually differs.
+    """
+
+    def __init__(self, manager, on_change: Callable[[InventoryChange], None],
+                 debounce: float = DEFAULT_DEBOUNCE, use_inotify: Optional[bool] = None):
+        self.manager = manager
+        self.on_change = on_change
+        self.debounce = debounce
+        self.use_inotify = sys.platform.startswith("linux") if use_inotify is None else use_inotify
+        self.known: Dict[str, dict] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.backend = None
+
+    @property
+    def kind(self) -> str:
+        return "inotify" if isinstance(self.backend, _InotifyBackend) else "polling"
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self.backend = None
+        if self.use_inotify:
+            try:
+                self.backend = _InotifyBackend(self._stop)
+            except (OSError, AttributeError):
+                # No inotify (not Linux, seccomp, exotic libc): fall back to polling
+                self.backend = None
+        if self.backend is None:
+            self.backend = _PollBackend(self._stop)
+        self._thread = threading.Thread(target=self._run, name="coffeebar-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self.backend is not None:
+            self.backend.wake()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.backend is not None:
+            self.backend.close()
+
+    def poke(self):
+        """Asks for a refresh soon, e.g. after a search path was added (it needs watching too)."""
+        if self.backend is not None:
+            self.backend.wake()
+
+    def watched_dirs(self) -> Set[str]:
+        """Every directory the discovery index's signatures depend on (or the nearest existing parent)."""
+        index = self.manager.index
+        candidates = set()
+        with self.manager.lock:
+            for root in self.manager.common_paths:
+                entry = index.roots.get(root)
+                candidates.update(entry["dirs"] if entry else (root,))
+                for home in index.root_homes(root):
+                    candidates.update(home_signature(home))
+        dirs = set()
+        for path in candidates:
+            existing = _existing_ancestor(path)
+            if existing:
+                dirs.add(existing)
+        return dirs
+
+    def refresh(self) -> InventoryChange:
+        """Brings the inventory up to date now; returns what changed since the last refresh."""
+        jdks = self.manager.find_jdks()
+        change = diff_inventory(self.known, jdks)
+        self.known = {jdk.path: jdk.to_dict() for jdk in jdks}
+        return change
+
+    def _run(self):
+        # The baseline: later changes are reported relative to it
+        try:
+            self.refresh()
+        except Exception:
+            pass
+        self.backend.set_dirs(self.watched_dirs())
+        pending = False
+        while not self._stop.is_set():
+            if not pending and not self.backend.wait(None):
+                continue
+            # Debounce: wait for a quiet period, but not forever
+            deadline = time.monotonic() + MAX_DELAY
+            while not self._stop.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self.backend.wait(min(self.debounce, remaining)):
+                    break
+            if self._stop.is_set():
+                break
+            try:
+                change = self.refresh()
+            except Exception:
+                # A half-written tree can fail to probe; the next event retries
+                pending = False
+                continue
+            # The set of directories worth watching moves with the inventory
+            self.backend.set_dirs(self.watched_dirs())
+            # Something may have changed between the scan and the new watches
+            with self.manager.lock:
+                pending = not all(self.manager.index.root_is_fresh(root) for root in self.manager.common_paths)
+            if not change.empty:
+                self.on_change(change)
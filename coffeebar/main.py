@@ -1,19 +1,53 @@
 import sys
-from coffeebar.ui import cli, gui
+
+# Read-only commands (and exec) served by coffeebar.ui.fast without loading typer/rich/Tk
+FAST_COMMANDS = ("current", "which", "list", "shell-init", "resolve-dir", "exec")
+
+def _tracing_options(args):
+    """Strips the global --profile / --trace-file FILE options (before the command) and enables tracing."""
+    profile, trace_file = False, None
+    while args:
+        if args[0] == "--profile":
+            profile = True
+            args = args[1:]
+        elif args[0] == "--trace-file" and len(args) > 1:
+            trace_file = args[1]
+            args = args[2:]
+        elif args[0].startswith("--trace-file="):
+            trace_file = args[0].split("=", 1)[1]
+            args = args[1:]
+        else:
+            break
+    if profile or trace_file:
+        from coffeebar.core import trace
+        trace.enable(profile, trace_file)
+    return args
 
 def main():
-    if len(sys.argv) > 1:
+    args = _tracing_options(sys.argv[1:])
+    # Typer reads sys.argv itself
+    sys.argv[1:] = args
+    if args and args[0] in FAST_COMMANDS:
+        from coffeebar.ui import fast
+        exit_code = fast.run(args)
+        if exit_code is not None:
+            sys.exit(exit_code)
+
+    if args:
         # Pass control to Typer CLI
+        from coffeebar.ui import cli
         cli.app()
     else:
         # Launch GUI
         # Check if we can import customtkinter, else fail gracefully
         try:
+            from coffeebar.ui import gui
             app = gui.CoffeeBarApp()
             app.mainloop()
         except ImportError as e:
             print(f"Error starting GUI: {e}")
             print("Running in CLI mode instead.")
+            from coffeebar.ui import cli
             cli.app()
 
 if __name__ == "__main__":
@@ -1,148 +1,412 @@
 import typer
 from rich.console import Console
 import os
-from rich.table import Table
-from rich.panel import Panel
-from coffeebar.core.jdk_manager import JdkManager
-from coffeebar.core.jdk_downloader import JdkDownloader
-from coffeebar.core import registry_utils
+from coffeebar.core import paths
 from pathlib import Path
-from rich.progress import Progress
+from typing import List
 import sys
 
 app = typer.Typer()
 console = Console()
-manager = JdkManager()
-downloader = JdkDownloader()
+
+# Built on first use so that commands which don't need them (and --help)
+# skip discovery setup and the requests import
+_manager = None
+_downloader = None
+
+def get_manager():
+    global _manager
+    if _manager is None:
+        from coffeebar.core.jdk_manager import JdkManager
+        _manager = JdkManager()
+    return _manager
+
+def get_downloader():
+    global _downloader
+    if _downloader is None:
+        from coffeebar.core.jdk_downloader import JdkDownloader
+        _downloader = JdkDownloader()
+    return _downloader
 
 @app.command()
 def list():
     """List all available JDKs found in standard directories."""
-    jdks = manager.find_jdks()
-    current = manager.get_current_jdk()
+    from rich.table import Table
+    from coffeebar.core import agent
+    from coffeebar.core.jdk_probe import JdkInfo
+    response = agent.query({"op": "list"})
+    if response and response.get("ok"):
+        # Served from the resident agent's inventory
+        jdks = [JdkInfo.from_dict(data) for data in response["jdks"]]
+        current = (os.name != "nt" and os.environ.get("JAVA_HOME")) or response["current"]
+    else:
+        manager = get_manager()
+        jdks = manager.find_jdks()
+        current = manager.get_current_jdk()
     
     table = Table(title="Available JDKs")
     table.add_column("Status", style="cyan", no_wrap=True)
     table.add_column("Name", style="magenta")
     table.add_column("Version", style="green")
+    table.add_column("Vendor")
+    table.add_column("Type")
     table.add_column("Path", style="dim")
 
     for jdk in jdks:
-        is_active = (current and os.path.normpath(current) == os.path.normpath(jdk["path"]))
+        is_active = (current and os.path.normpath(current) == os.path.normpath(jdk.path))
         status = "-> (Current)" if is_active else ""
         style = "bold white" if is_active else None
         
-        table.add_row(status, jdk["name"], jdk["version"], jdk["path"], style=style)
+        table.add_row(status, jdk.name, jdk.version, jdk.vendor, jdk.image_type, jdk.path, style=style)
 
     console.print(table)
 
+@app.command()
+def rescan():
+    """Rebuild the JDK discovery index from a full scan of the search paths."""
+    jdks = get_manager().rescan()
+    console.print(f"[bold green]Discovery index rebuilt: {len(jdks)} JDK(s) found.[/bold green]")
+
+@app.command()
+def watch():
+    """Watch the search paths and print JDKs as they are added, removed or updated (Ctrl+C to stop)."""
+    import time
+    from coffeebar.core.watcher import InventoryWatcher
+
+    def on_change(change):
+        for jdk in change.added:
+            console.print(f"[green]+ {jdk.name}[/green] [dim]{jdk.path}[/dim]")
+        for path in change.removed:
+            console.print(f"[red]- {path}[/red]")
+        for jdk in change.changed:
+            console.print(f"[yellow]~ {jdk.name}[/yellow] [dim]{jdk.version_string}[/dim]")
+
+    watcher = InventoryWatcher(get_manager(), on_change)
+    watcher.start()
+    console.print(f"Watching {len(watcher.manager.common_paths)} search paths ({watcher.kind})...")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        watcher.stop()
+
+@app.command()
+def agent(
+    detach: bool = typer.Option(False, "--detach", "-d", help="Run in the background"),
+    stop: bool = typer.Option(False, "--stop", help="Stop the running agent"),
+    status: bool = typer.Option(False, "--status", help="Show whether an agent is running"),
+):
+    """Keep the JDK inventory in memory and answer `list`/`which`/`current` queries over a local socket."""
+    from coffeebar.core import agent as agent_client
+    if stop or status:
+        response = agent_client.query({"op": "shutdown" if stop else "ping"})
+        if response is None:
+            console.print("No agent is running.")
+            raise typer.Exit(1)
+        if status:
+            console.print(f"Agent running (pid {response['pid']}, {response['jdks']} JDKs, "
+                          f"{response['watcher'] or 'no'} watcher) on {agent_client.agent_address()}")
+        else:
+            console.print("Agent stopped.")
+        return
+    if detach:
+        pid = agent_client.spawn_detached()
+        console.print(f"Agent started in the background (pid {pid}).")
+        return
+
+    server = agent_client.AgentServer(get_manager())
+    console.print(f"Agent listening on {server.address} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except RuntimeError as e:
+        console.print(f"[red]{e}[/red]")
+        raise typer.Exit(1)
+    except KeyboardInterrupt:
+        pass
+
+@app.command()
+def add_root(path: str):
+    """Add a folder to search for JDKs (remembered across runs)."""
+    if not os.path.isdir(path):
+        console.print(f"[red]Not a directory: {path}[/red]")
+        return
+    get_manager().add_search_path(path)
+    console.print(f"[bold green]Added search path {os.path.abspath(path)}[/bold green]")
+
+@app.command()
+def remove_root(path: str):
+    """Remove a folder previously added with add-root."""
+    if get_manager().remove_search_path(path):
+        console.print(f"[bold green]Removed search path {os.path.abspath(path)}[/bold green]")
+    else:
+        console.print(f"[yellow]{path} is not a configured search path.[/yellow]")
+
 @app.command()
 def current():
     """Show the currently active JAVA_HOME."""
-    path = manager.get_current_jdk()
+    from rich.panel import Panel
+    path = get_manager().get_current_jdk()
     if path:
         console.print(Panel(f"[bold green]{path}[/bold green]", title="Current JAVA_HOME"))
     else:
         console.print("[yellow]JAVA_HOME is not set.[/yellow]")
 
+@app.command()
+def which(path_or_name: str = typer.Argument(None, help="JDK name or path (defaults to the active JDK)")):
+    """Print the java executable of the active JDK, or of the JDK matching a name."""
+    from coffeebar.ui import fast
+    raise typer.Exit(fast.which([path_or_name] if path_or_name else []))
+
+@app.command()
+def shell_init(shell: str = typer.Argument(..., help="bash, zsh or fish")):
+    """Print shell code that makes `coffeebar use` switch JDKs without starting Python.
+
+    Add `eval "$(coffeebar shell-init bash)"` to ~/.bashrc (or the zsh/fish equivalent).
+    """
+    from coffeebar.ui import fast
+    raise typer.Exit(fast.shell_init(shell))
+
+@app.command()
+def resolve_dir(directory: str = typer.Argument(None, help="Project directory (defaults to the current one)")):
+    """Print the JDK requested by a project's .java-version, .sdkmanrc, .tool-versions or pom.xml."""
+    from coffeebar.ui import fast
+    raise typer.Exit(fast.resolve_dir([directory] if directory else []))
+
 @app.command()
 def use(path_or_name: str):
     """Set the JDK. You can provide a partial name or full path."""
-    jdks = manager.find_jdks()
-    
-    # Try exact path match
-    target = None
-    for jdk in jdks:
-        if jdk["path"].lower() == path_or_name.lower():
-            target = jdk
-            break
-            
-    # Try exact name match
-    if not target:
-        for jdk in jdks:
-            if jdk["name"].lower() == path_or_name.lower():
-                target = jdk
-                break
-    
-    # Try partial name match
-    if not target:
-        matches = [jdk for jdk in jdks if path_or_name.lower() in jdk["name"].lower()]
-        if len(matches) == 1:
-            target = matches[0]
-        elif len(matches) > 1:
-            console.print(f"[red]Ambiguous name '{path_or_name}'. Matches: {', '.join(d['name'] for d in matches)}[/red]")
-            return
+    manager = get_manager()
+    matches = manager.resolve(path_or_name)
+    target = matches[0] if len(matches) == 1 else None
+    if len(matches) > 1:
+        console.print(f"[red]Ambiguous name '{path_or_name}'. Matches: {', '.join(d.name for d in matches)}[/red]")
+        return
 
     if target:
-        manager.set_jdk(target["path"])
-        console.print(f"[bold green]Successfully switched to {target['name']}[/bold green]")
+        manager.set_jdk(target.path)
+        console.print(f"[bold green]Successfully switched to {target.name}[/bold green]")
         # Verification hint
         console.print("[dim]Note: Open a NEW terminal to see changes take effect.[/dim]")
     else:
         # If looked like a path and it exists, maybe force it?
-        import os
         if os.path.exists(path_or_name) and manager._is_valid_jdk(path_or_name):
              manager.set_jdk(path_or_name)
              console.print(f"[bold green]Successfully set custom path to {path_or_name}[/bold green]")
         else:
             console.print(f"[red]Could not find JDK matching '{path_or_name}'[/red]")
 
+@app.command("exec", context_settings={"allow_extra_args": True, "ignore_unknown_options": True})
+def exec_(
+    args: List[str] = typer.Argument(..., help="JDK name, version or path (unless --matrix), then the command"),
+    matrix: str = typer.Option(None, "--matrix", "-m", help="Comma-separated JDKs to run the command under, e.g. 11,17,21"),
+    jobs: int = typer.Option(0, "--jobs", "-j", help="Matrix runs at the same time (default: CPU count)"),
+):
+    """Run a command under a JDK without changing the active one.
+
+    `coffeebar exec 17 -- mvn -q verify` sets JAVA_HOME and PATH for that
+    command only. With --matrix the command runs once per JDK, in parallel,
+    followed by a summary.
+    """
+    from coffeebar.ui import fast
+    if matrix:
+        queries, command = [q.strip() for q in matrix.split(",") if q.strip()], args
+    else:
+        queries, command = args[:1], args[1:]
+    if command and command[0] == "--":
+        command = command[1:]
+    if not queries or not command:
+        console.print("[red]Usage: coffeebar exec <jdk> -- <command>... or coffeebar exec --matrix 11,17 -- <command>...[/red]")
+        raise typer.Exit(2)
+    raise typer.Exit(fast.run_exec(queries, command, jobs or None, bool(matrix)))
+
 @app.command()
-def install(version: int = typer.Argument(..., help="Major Java version to install (e.g., 8, 11, 17, 21)")):
-    """Download and install a JDK from Eclipse Adoptium."""
-    
-    if version not in downloader.get_supported_versions():
-        console.print(f"[yellow]Version {version} is not in the LTS list {downloader.get_supported_versions()}. Trying anyway...[/yellow]")
-    
-    console.print(f"Fetching latest release info for Java {version} (Windows x64)...")
-    release = downloader.get_latest_release(version)
-    
-    if not release:
-        console.print("[red]Could not find release information![/red]")
-        return
-        
-    console.print(f"Found: [cyan]{release['name']}[/cyan] ({release['size'] / 1024 / 1024:.2f} MB)")
+def install(
+    versions: List[int] = typer.Argument(..., help="Major Java version(s) to install (e.g., 8 11 17 21)"),
+    jobs: int = typer.Option(3, "--jobs", "-j", help="Downloads running at the same time"),
+    extract_jobs: int = typer.Option(0, "--extract-jobs", help="Extractions running at the same time (default: based on CPU count)"),
+):
+    """Download and install one or more JDKs from Eclipse Adoptium, concurrently."""
+    from rich.progress import Progress, BarColumn, DownloadColumn, TransferSpeedColumn, TextColumn
+    from coffeebar.core.install_scheduler import InstallScheduler, InstallSlots
+    from coffeebar.core.progress import ProgressBus
+    manager = get_manager()
+    downloader = get_downloader()
+
+    supported = downloader.get_supported_versions()
+    for version in versions:
+        if version not in supported:
+            console.print(f"[yellow]Version {version} is not in the LTS list {supported}. Trying anyway...[/yellow]")
     
-    # Target directory: %UserProfile%/.jdks
-    target_root = os.path.join(os.environ["USERPROFILE"], ".jdks")
-    if not os.path.exists(target_root):
-        os.makedirs(target_root)
-        
-    archive_path = os.path.join(target_root, release["filename"])
+    console.print(f"Fetching latest release info for Java {', '.join(map(str, versions))} ({downloader.platform_label})...")
+    releases = downloader.get_latest_releases(versions)
+    for version in versions:
+        release = releases.get(version)
+        if release:
+            console.print(f"Found: [cyan]{release['name']}[/cyan] ({release['size'] / 1024 / 1024:.2f} MB)")
+        else:
+            console.print(f"[red]Could not find release information for Java {version}![/red]")
     
-    # Download
-    with Progress() as progress:
-        task = progress.add_task("[green]Downloading...", total=release['size'])
-        
-        def update_progress(downloaded, total):
-            progress.update(task, completed=downloaded)
-            
-        try:
-            downloader.download_file(release['url'], archive_path, update_progress)
-        except Exception as e:
-            console.print(f"[red]Download failed: {e}[/red]")
-            return
-
-    console.print("Extracting...")
-    # Use a specific folder name to avoid collisions or generic names
-    # e.g. temurin-17.0.x
-    folder_name = f"temurin-{release['name']}" # release['name'] often looks like 'jdk-17.0.10+7' which might be invalid chars for folder in some OS or just messy.
-    # Safe name:
-    import re
-    safe_name = re.sub(r'[^a-zA-Z0-9\-\.]', '_', release['name'])
-    folder_name = f"temurin-{safe_name}"
+    # Target directory: ~/.jdks (%UserProfile%\.jdks on Windows)
+    target_root = str(paths.jdks_dir())
 
-    try:
-        final_path = downloader.install_jdk(archive_path, target_root, folder_name)
-        console.print(f"[bold green]Installed successfully to: {final_path}[/bold green]")
-        
+    scheduler = InstallScheduler(downloader, InstallSlots(jobs, extract_jobs or None))
+    bus = ProgressBus(min_interval=0.1)
+    columns = (TextColumn("{task.description}"), BarColumn(), DownloadColumn(), TransferSpeedColumn(),
+               TextColumn("{task.fields[eta]}"))
+    # One view for all installs; each is downloaded and extracted in one pass
+    with Progress(*columns, console=console) as progress:
+        tasks = {v: progress.add_task(f"Java {v}", total=r['size'], eta="") for v, r in releases.items() if r}
+
+        def on_event(event):
+            task = tasks.get(event.key)
+            if task is None:
+                return
+            if event.phase in ("done", "failed"):
+                status = "[green]done[/green]" if event.phase == "done" else "[red]failed[/red]"
+                fields = {"completed": releases[event.key]['size']} if event.phase == "done" else {}
+                progress.update(task, description=f"Java {event.key} {status}", eta="", **fields)
+                return
+            eta = f"{event.eta:.0f}s left" if event.eta is not None else ""
+            fields = {"description": f"Java {event.key} [dim]{event.phase}[/dim]", "eta": eta}
+            if event.total:
+                fields.update(completed=event.done, total=event.total)
+            progress.update(task, **fields)
+
+        # Coalesced by the bus: at most ~10 redraw requests per second per install
+        bus.subscribe(on_event)
+        results = scheduler.install_many(versions, target_root, bus, releases=releases)
+
+    for result in results:
+        if result.ok:
+            console.print(f"[bold green]Java {result.version} installed successfully to: {result.path}[/bold green]")
+            dedupe = result.report.dedupe
+            if dedupe and dedupe.saved_bytes:
+                console.print(f"[dim]Shares {dedupe.linked} file(s) with other installed JDKs, "
+                              f"saving {dedupe.saved_bytes / 1024 / 1024:.0f} MB.[/dim]")
+            for warning in result.report.warnings:
+                console.print(f"[yellow]Java {result.version}: {warning}[/yellow]")
+        else:
+            console.print(f"[red]Java {result.version}: installation failed: {result.error}[/red]")
+
+    installed = [r for r in results if r.ok]
+    if installed:
+        from coffeebar.core.prune import auto_prune
+        plan = auto_prune(manager, target_root)
+        if plan and plan.remove:
+            console.print(f"[dim]Pruned {len(plan.remove)} old folder(s), freed {plan.freed_bytes / 1024 / 1024:.0f} MB "
+                          f"(prune_after_install).[/dim]")
+    if len(versions) == 1 and installed:
         if typer.confirm("Do you want to set this as the active JDK now?"):
-            manager.set_jdk(final_path)
-            console.print(f"[bold green]Active JDK updated![/bold green]")
-            console.print("[dim]Remember to restart your terminal.[/dim]")
-            
-    except Exception as e:
-        console.print(f"[red]Installation failed: {e}[/red]")
+            try:
+                manager.set_jdk(installed[0].path)
+                console.print(f"[bold green]Active JDK updated![/bold green]")
+                console.print("[dim]Remember to restart your terminal.[/dim]")
+            except Exception as e:
+                console.print(f"[red]Could not set the active JDK: {e}[/red]")
+
+    if len(installed) != len(results):
+        raise typer.Exit(1)
+
+def _print_prune_plan(plan, dry_run):
+    from rich.table import Table
+    table = Table(title="Prune" + (" (dry run)" if dry_run else ""))
+    table.add_column("Action", no_wrap=True)
+    table.add_column("JDK", style="magenta")
+    table.add_column("Frees", justify="right")
+    table.add_column("Why", style="dim")
+    for entry in plan.remove:
+        table.add_row("[red]remove[/red]", entry.path, f"{entry.freed_bytes / 1024 / 1024:.0f} MB", entry.reason)
+    for entry in plan.keep:
+        table.add_row("[green]keep[/green]", entry.path, "", entry.reason)
+    console.print(table)
+
+@app.command()
+def prune(
+    dry_run: bool = typer.Option(False, "--dry-run", help="Only report what would be removed"),
+    keep: int = typer.Option(None, "--keep", help="Newest builds kept per Java version (config: prune_keep_per_version)"),
+    days: float = typer.Option(None, "--days", help="Keep JDKs used within this many days (config: prune_keep_used_days)"),
+    max_mb: int = typer.Option(None, "--max-mb", help="Cap on the total size of installed JDKs, 0 for none (config: prune_max_total_mb)"),
+    yes: bool = typer.Option(False, "--yes", "-y", help="Don't ask for confirmation"),
+):
+    """Remove old JDK builds installed by CoffeeBar (never the active one) and leftovers of interrupted installs."""
+    from coffeebar.core.prune import RetentionPolicy, active_homes, apply_plan, plan_prune
+    from coffeebar.core.usage import UsageLog
+    manager = get_manager()
+    policy = RetentionPolicy.from_config(manager.config)
+    if keep is not None:
+        policy.keep_per_version = max(1, keep)
+    if days is not None:
+        policy.keep_used_days = days
+    if max_mb is not None:
+        policy.max_total_mb = max_mb
+
+    root = str(paths.jdks_dir())
+    usage = UsageLog()
+    plan = plan_prune(manager.find_jdks(), root, policy, usage, active_homes(manager))
+    usage.save()
+    if not plan.keep and not plan.remove:
+        console.print(f"[yellow]No JDKs installed in {root}.[/yellow]")
+        return
+    _print_prune_plan(plan, dry_run)
+    freed = plan.freed_bytes / 1024 / 1024
+    if not plan.remove:
+        console.print("[bold green]Nothing to remove.[/bold green]")
+        return
+    if dry_run:
+        console.print(f"[bold]Would remove {len(plan.remove)} folder(s), freeing {freed:.0f} MB.[/bold]")
+        return
+    if not yes and not typer.confirm(f"Remove {len(plan.remove)} folder(s), freeing {freed:.0f} MB?"):
+        raise typer.Exit(1)
+    errors = apply_plan(plan, usage)
+    for entry, error in errors:
+        console.print(f"[red]Could not remove {entry.path}: {error}[/red]")
+    # Refresh the index and the shell lookup tables
+    manager.find_jdks()
+    console.print(f"[bold green]Removed {len(plan.remove) - len(errors)} folder(s), freed {freed:.0f} MB.[/bold green]")
+    if errors:
+        raise typer.Exit(1)
+
+@app.command()
+def dedupe(
+    homes: List[str] = typer.Argument(None, help="JDK homes (defaults to every discovered JDK CoffeeBar can write to)"),
+    mode: str = typer.Option("auto", "--mode", help="auto (reflink, else hardlink), reflink or hardlink"),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Only report what would be saved"),
+):
+    """Share identical files between installed JDKs (reflinks or hardlinks) and report the space saved."""
+    from rich.table import Table
+    from coffeebar.core.dedupe import MODES, dedupe_homes
+    if mode not in MODES:
+        console.print(f"[red]Unknown mode '{mode}'. Choose one of: {', '.join(MODES)}[/red]")
+        raise typer.Exit(1)
+    if homes:
+        missing = [home for home in homes if not os.path.isdir(home)]
+        if missing:
+            console.print(f"[red]Not a directory: {', '.join(missing)}[/red]")
+            raise typer.Exit(1)
+    else:
+        # System JDKs (package managers own those) are left alone
+        homes = [jdk.path for jdk in get_manager().find_jdks()
+                 if os.access(jdk.path, os.W_OK) and os.access(os.path.dirname(jdk.path), os.W_OK)]
+    if not homes:
+        console.print("[yellow]No writable JDK homes to deduplicate.[/yellow]")
+        return
+
+    results = dedupe_homes(homes, mode, dry_run=dry_run)
+    table = Table(title="Deduplication" + (" (dry run)" if dry_run else ""))
+    table.add_column("Home", style="magenta")
+    table.add_column("Files", justify="right")
+    table.add_column("Linked", justify="right")
+    table.add_column("Saved", justify="right", style="green")
+    table.add_column("Already shared", justify="right", style="dim")
+    for stats in results:
+        table.add_row(stats.home, str(stats.files), str(stats.linked),
+                      f"{stats.saved_bytes / 1024 / 1024:.1f} MB", f"{stats.shared_bytes / 1024 / 1024:.1f} MB")
+    console.print(table)
+    saved = sum(stats.saved_bytes for stats in results)
+    methods = sorted({stats.method for stats in results if stats.method})
+    verb = "Would save" if dry_run else "Saved"
+    console.print(f"[bold green]{verb} {saved / 1024 / 1024:.1f} MB[/bold green]"
+                  + (f" [dim]({', '.join(methods)})[/dim]" if methods else ""))
 
 @app.command()
 def add_to_path():
@@ -159,7 +423,9 @@ def add_to_path():
     bin_path_str = str(bin_dir.absolute())
     
     try:
-        registry_utils.append_to_path(bin_path_str, user=True)
+        env = get_manager().env
+        with env.transaction() as tx:
+            tx.ensure_on_path(bin_path_str)
         console.print(f"[bold green]Successfully added '{bin_path_str}' to your User Path.[/bold green]")
         console.print("[yellow]Please restart your terminal (close and open again) to use the 'coffeebar' command directly.[/yellow]")
     except Exception as e:
@@ -0,0 +1,214 @@
+"""
+Fast path for read-only commands.
+
+Shell prompts and build scripts call `coffeebar current` / `which` / `list`
+/ `resolve-dir` / `exec` constantly (and every new shell runs `shell-init`), so these are
+answered here without importing typer, rich, requests or the GUI toolkit. Anything
+unusual (options, --help, an interactive `list`) returns None and falls
+through to the full Typer CLI. When `coffeebar agent` is running, answers
+come from its in-memory inventory instead of a discovery pass.
+"""
+import os
+import sys
+
+def run(args):
+    """Handles args if possible. Returns an exit code, or None to defer to the full CLI."""
+    if args[0] == "exec":
+        # The wrapped command has options of its own
+        return exec_command(args[1:])
+    if any(arg.startswith("-") for arg in args[1:]):
+        return None
+
+    command, rest = args[0], args[1:]
+    if command == "current" and not rest:
+        return current()
+    if command == "which" and len(rest) <= 1:
+        return which(rest)
+    if command == "shell-init" and len(rest) == 1:
+        return shell_init(rest[0])
+    if command == "resolve-dir" and len(rest) <= 1:
+        return resolve_dir(rest)
+    if command == "list" and not rest and not sys.stdout.isatty():
+        # Interactive users get the rich table; pipes and scripts get plain text
+        return list_jdks()
+    return None
+
+def _manager():
+    from coffeebar.core.jdk_manager import JdkManager
+    return JdkManager()
+
+def _agent(request):
+    """The resident agent's answer (see `coffeebar agent`), or None to do the work in-process."""
+    from coffeebar.core import agent
+    response = agent.query(request)
+    return response if response and response.get("ok") else None
+
+def _jdks(response_items):
+    from coffeebar.core.jdk_probe import JdkInfo
+    return [JdkInfo.from_dict(data) for data in response_items]
+
+def _current_jdk():
+    # JAVA_HOME of the calling shell wins, as in the shell env backend (the agent can't see it)
+    if os.name != "nt" and os.environ.get("JAVA_HOME"):
+        return os.environ["JAVA_HOME"]
+    response = _agent({"op": "current"})
+    if response is not None:
+        return response["current"]
+    return _manager().get_current_jdk()
+
+def current():
+    path = _current_jdk()
+    if not path:
+        print("JAVA_HOME is not set.", file=sys.stderr)
+        return 1
+    print(path)
+    return 0
+
+def which(args):
+    """Prints the java executable of the active JDK, or of the JDK matching args[0]."""
+    from coffeebar.core.jdk_probe import java_executable
+
+    if args:
+        response = _agent({"op": "resolve", "query": args[0]})
+        matches = _jdks(response["matches"]) if response else _manager().resolve(args[0])
+        if len(matches) != 1:
+            if matches:
+                print(f"Ambiguous name '{args[0]}'. Matches: {', '.join(jdk.name for jdk in matches)}", file=sys.stderr)
+            else:
+                print(f"Could not find JDK matching '{args[0]}'", file=sys.stderr)
+            return 1
+        home = matches[0].path
+    else:
+        home = _current_jdk()
+        if not home:
+            print("JAVA_HOME is not set.", file=sys.stderr)
+            return 1
+
+    java_exe = java_executable(home)
+    if not java_exe:
+        print(f"No java executable in {home}", file=sys.stderr)
+        return 1
+    print(java_exe)
+    return 0
+
+def list_jdks():
+    """Plain, tab-separated listing: marker, name, version, vendor, type, path."""
+    response = _agent({"op": "list"})
+    if response:
+        jdks = _jdks(response["jdks"])
+        current = os.environ.get("JAVA_HOME") if os.name != "nt" else None
+        current = current or response["current"]
+    else:
+        manager = _manager()
+        jdks = manager.find_jdks()
+        current = manager.get_current_jdk()
+    current = os.path.normpath(current) if current else None
+
+    for jdk in jdks:
+        marker = "*" if current == os.path.normpath(jdk.path) else " "
+        print("\t".join([marker, jdk.name, jdk.version, jdk.vendor, jdk.image_type, jdk.path]))
+    return 0
+
+def shell_init(shell):
+    """Prints the shell integration code, generating the lookup table on first use."""
+    from coffeebar.core import shell_init as generator
+    if shell not in generator.SHELLS:
+        print(f"Unsupported shell '{shell}'. Choose one of: {', '.join(generator.SHELLS)}", file=sys.stderr)
+        return 1
+    if not generator.table_file(shell).exists():
+        generator.write_tables(_manager().find_jdks())
+    print(generator.init_script(shell))
+    return 0
+
+def resolve_dir(args):
+    """Prints the JAVA_HOME requested by the project containing args[0] (default: cwd)."""
+    directory = os.path.abspath(args[0]) if args else os.getcwd()
+    response = _agent({"op": "resolve_project", "directory": directory})
+    if response:
+        home = response["jdk"] and response["jdk"]["path"]
+    else:
+        jdk = _manager().resolve_project(directory)
+        home = jdk and jdk.path
+    if not home:
+        return 1
+    print(home)
+    return 0
+
+def _parse_exec(args):
+    """`[--matrix 11,17,21] [-j N] [<jdk>] [--] cmd...` -> (queries, jobs, matrix, cmd), or None if it isn't that."""
+    queries, jobs = None, None
+    while args and args[0].startswith("-") and args[0] != "--":
+        option, _, value = args[0].partition("=")
+        if option not in ("--matrix", "-m", "--jobs", "-j"):
+            return None  # --help and friends
+        if not value:
+            if len(args) < 2:
+                return None
+            value, args = args[1], args[1:]
+        args = args[1:]
+        if option in ("--matrix", "-m"):
+            queries = [q.strip() for q in value.split(",") if q.strip()]
+        elif value.isdigit() and int(value) > 0:
+            jobs = int(value)
+        else:
+            return None
+    matrix = queries is not None
+    if not matrix:
+        if not args or args[0] == "--":
+            return None
+        queries, args = [args[0]], args[1:]
+    if args and args[0] == "--":
+        args = args[1:]
+    if not queries or not args:
+        return None
+    return queries, jobs, matrix, args
+
+def exec_command(args):
+    """Runs a command with JAVA_HOME and PATH pointing at the requested JDK(s), in the child only."""
+    parsed = _parse_exec(args)
+    if parsed is None:
+        return None
+    queries, jobs, matrix, command = parsed
+    return run_exec(queries, command, jobs, matrix)
+
+def run_exec(queries, command, jobs=None, matrix=False):
+    from coffeebar.core import jdk_exec
+    manager = _manager()
+    response = _agent({"op": "list"})
+    jdks = _jdks(response["jdks"]) if response else manager.find_jdks()
+
+    if not matrix:
+        try:
+            home = jdk_exec.resolve_home(manager, queries[0], jdks)
+        except LookupError as e:
+            print(e, file=sys.stderr)
+            return 1
+        sys.stdout.flush()
+        try:
+            jdk_exec.exec_in(home, command)
+        except OSError as e:
+            print(f"{command[0]}: {e.strerror}", file=sys.stderr)
+            return 127
+        return 0  # Windows: exec_in exits with the child's code
+
+    targets = {}
+    for query in queries:
+        try:
+            targets[query] = jdk_exec.resolve_home(manager, query, jdks)
+        except LookupError as e:
+            print(e, file=sys.stderr)
+            targets[query] = None
+
+    def on_done(result):
+        # Called from the worker threads; one print per job keeps the blocks whole
+        status = "ok" if result.ok else (result.error or f"exit {result.returncode}")
+        header = f"=== {result.query} ({result.home or '?'}): {status}, {result.seconds:.1f}s ==="
+        print(header + "\n" + result.output.rstrip("\n") if result.output else header, flush=True)
+
+    results = jdk_exec.run_matrix(targets, command, jobs, on_done)
+    width = max(len(r.query) for r in results)
+    print()
+    for r in results:
+        status = "ok" if r.ok else (r.error or f"exit {r.returncode}")
+        print(f"{r.query:<{width}}  {r.seconds:>7.1f}s  {status}")
+    return 0 if all(r.ok for r in results) else 1
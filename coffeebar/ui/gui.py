@@ -1,9 +1,15 @@
 import customtkinter as ctk
 from tkinter import filedialog, messagebox
 import os
+import queue
 import threading
 from coffeebar.core.jdk_manager import JdkManager
 from coffeebar.core.jdk_downloader import JdkDownloader
+from coffeebar.core.install_scheduler import InstallScheduler
+from coffeebar.core.progress import ProgressBus
+from coffeebar.core.watcher import InventoryWatcher
+from coffeebar.core import paths
+from coffeebar.ui.jdk_list import VirtualJdkList
 
 ctk.set_appearance_mode("Dark")
 ctk.set_default_color_theme("blue")
@@ -12,24 +18,33 @@ class DownloadWindow(ctk.CTkToplevel):
     def __init__(self, master, on_complete):
         super().__init__(master)
         self.title("Download JDK")
-        self.geometry("400x350")
+        self.geometry("420x420")
         self.on_complete = on_complete
         self.downloader = JdkDownloader()
+        # Shared by every install started from this window, so the limits hold across clicks
+        self.scheduler = InstallScheduler(self.downloader)
+        self.running = {}    # version -> (bytes done, bytes total)
+        self.states = {}     # version -> status text
         
         # Center the window
         self.update_idletasks()
-        width = 400
-        height = 350
+        width = 420
+        height = 420
         x = (self.winfo_screenwidth() // 2) - (width // 2)
         y = (self.winfo_screenheight() // 2) - (height // 2)
         self.geometry(f"{width}x{height}+{x}+{y}")
         
-        self.lbl = ctk.CTkLabel(self, text="Select Java Version (Eclipse Temurin):", font=("Roboto", 14))
+        self.lbl = ctk.CTkLabel(self, text="Select Java Versions (Eclipse Temurin):", font=("Roboto", 14))
         self.lbl.pack(pady=(20, 10))
         
-        self.version_var = ctk.StringVar(value="17")
-        self.combo = ctk.CTkComboBox(self, values=[str(v) for v in self.downloader.get_supported_versions()], variable=self.version_var)
-        self.combo.pack(pady=10)
+        # Labels come from cached metadata right away, then refreshed in the background
+        self.releases = self.downloader.get_cached_releases()
+        self.checks = {}
+        for version in self.downloader.get_supported_versions():
+            var = ctk.BooleanVar(value=(version == 17))
+            check = ctk.CTkCheckBox(self, text=self.version_label(version), variable=var)
+            check.pack(pady=4, padx=40, anchor="w")
+            self.checks[version] = (check, var)
         
         self.btn_download = ctk.CTkButton(self, text="Download & Install", command=self.start_download)
         self.btn_download.pack(pady=20)
@@ -38,95 +53,95 @@ class DownloadWindow(ctk.CTkToplevel):
         self.progress.pack(pady=10, padx=40, fill="x")
         self.progress.set(0)
         
-        self.status_lbl = ctk.CTkLabel(self, text="")
+        self.status_lbl = ctk.CTkLabel(self, text="", justify="left")
         self.status_lbl.pack(pady=5)
 
-    def start_download(self):
-        version = int(self.version_var.get())
-        self.btn_download.configure(state="disabled")
-        threading.Thread(target=self.run_download, args=(version,), daemon=True).start()
+        threading.Thread(target=self.refresh_releases, daemon=True).start()
 
-    def run_download(self, version):
-        self.update_status(f"Fetching info for Java {version}...", 0)
-        release = self.downloader.get_latest_release(version)
+    def version_label(self, version):
+        release = self.releases.get(version)
         if not release:
-            self.update_status("Error: Could not find release.", 0)
-            self.after(0, lambda: self.btn_download.configure(state="normal"))
+            return str(version)
+        return f"{version} · {release['name']} · {release['size'] / 1024 / 1024:.0f} MB"
+
+    def refresh_releases(self):
+        # One concurrent round of (mostly 304) requests for every version
+        releases = self.downloader.get_latest_releases()
+        self.after(0, lambda: self.apply_releases(releases))
+
+    def apply_releases(self, releases):
+        self.releases.update({v: r for v, r in releases.items() if r})
+        for version, (check, _) in self.checks.items():
+            check.configure(text=self.version_label(version))
+
+    def start_download(self):
+        versions = [v for v, (_, var) in self.checks.items() if var.get() and v not in self.running]
+        if not versions:
             return
-            
-        self.update_status(f"Downloading {release['name']}...", 0)
-        
-        target_root = os.path.join(os.environ["USERPROFILE"], ".jdks")
-        if not os.path.exists(target_root):
-            os.makedirs(target_root)
-        
-        # Ensure regex is imported or handled
-        import re
-        safe_name = re.sub(r'[^a-zA-Z0-9\-\.]', '_', release['name'])
-        filename = f"{safe_name}.zip"
-        archive_path = os.path.join(target_root, filename)
-        
-        def progress_cb(downloaded, total):
-            pct = downloaded / total
-            self.after(0, lambda: self.progress.set(pct))
-            
-        try:
-            self.downloader.download_file(release['url'], archive_path, progress_cb)
-            
-            self.update_status("Extracting...", 1.0)
-            
-            folder_name = f"temurin-{safe_name}"
-            
-            self.downloader.install_jdk(archive_path, target_root, folder_name)
-            
-            self.update_status("Done!", 1.0)
-            self.after(0, self.finish)
-        except Exception as e:
-            self.update_status(f"Error: {str(e)[:50]}...", 0)
-            self.after(0, lambda: self.btn_download.configure(state="normal"))
+        for version in versions:
+            self.checks[version][0].configure(state="disabled")
+            self.running[version] = (0, 0)
+            self.states[version] = "queued"
+        self.refresh_status()
+        threading.Thread(target=self.run_download, args=(versions,), daemon=True).start()
 
-    def update_status(self, text, progress_val=None):
-        self.after(0, lambda: self.status_lbl.configure(text=text))
-        if progress_val is not None:
-             self.after(0, lambda: self.progress.set(progress_val))
-        
-    def finish(self):
-        messagebox.showinfo("Success", "JDK Installed Successfully!")
-        self.destroy()
-        self.on_complete()
+    def run_download(self, versions):
+        target_root = str(paths.jdks_dir())
 
-class JdkFrame(ctk.CTkFrame):
-    def __init__(self, master, jdk, is_active, on_select):
-        super().__init__(master)
-        self.jdk = jdk
-        self.on_select = on_select
+        # The bus coalesces progress, so this is at most one Tk callback per 100ms per install
+        bus = ProgressBus(min_interval=0.1)
+        bus.subscribe(lambda event: self.after(0, lambda: self.on_progress(event)))
 
-        # Layout
-        self.grid_columnconfigure(0, weight=1)
-        
-        # Colors
-        bg_color = "transparent" if not is_active else ("#3B8ED0", "#1F6AA5") # Accent color if active
-        self.configure(fg_color=bg_color)
+        def on_done(result):
+            self.after(0, lambda: self.on_done(result))
 
-        self.lbl_name = ctk.CTkLabel(self, text=jdk["name"], font=("Roboto", 16, "bold"))
-        self.lbl_name.grid(row=0, column=0, sticky="w", padx=10, pady=(10,0))
+        # Installs run concurrently; one failing doesn't stop the others
+        results = self.scheduler.install_many(versions, target_root, bus, on_done)
+        if any(result.ok for result in results):
+            from coffeebar.core.prune import auto_prune
+            try:
+                auto_prune(JdkManager(), target_root)
+            except OSError as e:
+                print(f"Automatic prune failed: {e}")
 
-        self.lbl_version = ctk.CTkLabel(self, text=jdk["version"], font=("Roboto", 12))
-        self.lbl_version.grid(row=1, column=0, sticky="w", padx=10, pady=(0,10))
-        
-        self.lbl_path = ctk.CTkLabel(self, text=jdk["path"], font=("Roboto", 10), text_color="gray")
-        self.lbl_path.grid(row=2, column=0, sticky="w", padx=10, pady=(0,10))
+    def on_progress(self, event):
+        if event.key not in self.running or event.phase in ("done", "failed"):
+            return
+        if event.phase in ("download", "extract") and event.total:
+            self.running[event.key] = (event.done, event.total)
+        state = event.phase
+        if event.fraction is not None:
+            state += f" {event.fraction * 100:.0f}%"
+        if event.eta is not None:
+            state += f" · {event.eta:.0f}s left"
+        self.states[event.key] = state
+        self.refresh_status()
 
-        btn_text = "Active" if is_active else "Set Active"
-        state = "disabled" if is_active else "normal"
-        self.btn_action = ctk.CTkButton(self, text=btn_text, state=state, command=self.select_jdk)
-        self.btn_action.grid(row=0, column=1, rowspan=3, padx=10, sticky="e")
-        
-        # Corner radius for elegance
-        self.configure(corner_radius=10)
+    def on_done(self, result):
+        self.running.pop(result.version, None)
+        self.checks[result.version][0].configure(state="normal")
+        if result.ok:
+            self.states[result.version] = "done" + "".join(f" ({w[:40]})" for w in result.report.warnings)
+        else:
+            self.states[result.version] = f"error: {result.error[:40]}"
+        self.refresh_status()
+        if not self.running:
+            self.finish()
 
-    def select_jdk(self):
-        self.on_select(self.jdk["path"])
+    def refresh_status(self):
+        done = sum(d for d, _ in self.running.values())
+        total = sum(t for _, t in self.running.values())
+        self.progress.set(done / total if total else (0 if self.running else 1.0))
+        self.status_lbl.configure(text="\n".join(f"Java {v}: {state}" for v, state in sorted(self.states.items())))
+        
+    def finish(self):
+        failed = [v for v, state in self.states.items() if state.startswith("error")]
+        if failed:
+            messagebox.showwarning("Install", f"Some installs failed: {', '.join(map(str, sorted(failed)))}")
+        else:
+            messagebox.showinfo("Success", "JDK Installed Successfully!")
+        self.destroy()
+        self.on_complete()
 
 class CoffeeBarApp(ctk.CTk):
     def __init__(self):
@@ -149,42 +164,100 @@ class CoffeeBarApp(ctk.CTk):
         self.btn_download = ctk.CTkButton(self.header, text="⬇ Install JDK", command=self.open_download_window, width=120)
         self.btn_download.pack(side="right", padx=10, pady=15)
         
-        self.btn_refresh = ctk.CTkButton(self.header, text="Refresh", command=self.refresh_list, width=80)
+        self.btn_refresh = ctk.CTkButton(self.header, text="Refresh", command=self.rescan, width=80)
         self.btn_refresh.pack(side="right", padx=10, pady=15)
 
-        # Content
-        self.scroll_frame = ctk.CTkScrollableFrame(self, label_text="Available JDKs")
-        self.scroll_frame.pack(fill="both", expand=True, padx=20, pady=20)
+        # Content: only the rows on screen have widgets, so large inventories stay fast
+        self.jdk_list = VirtualJdkList(self, on_select=self.set_active_jdk)
+        self.jdk_list.pack(fill="both", expand=True, padx=20, pady=20)
 
         self.status_bar = ctk.CTkLabel(self, text="Ready", anchor="w")
         self.status_bar.pack(fill="x", side="bottom", padx=20, pady=5)
         
+        self.found = queue.Queue()  # batches of JdkInfo from the discovery worker
+        self.scan_running = False
+        self.scan_pending = None    # a refresh requested while a scan was running
+
+        # Paint what the index already knows right away, then check it in the background
+        self.jdk_list.set_jdks(self.manager.cached_jdks())
+        self.jdk_list.set_active(self.manager.get_current_jdk())
         self.refresh_list()
 
-    def refresh_list(self):
-        # Clear existing
-        for widget in self.scroll_frame.winfo_children():
-            widget.destroy()
-            
-        jdks = self.manager.find_jdks()
-        current_jdk = self.manager.get_current_jdk()
-        
-        if not jdks:
-            ctk.CTkLabel(self.scroll_frame, text="No JDKs found in standard locations.").pack(pady=20)
-        
-        for jdk in jdks:
-            is_active = False
-            if current_jdk and os.path.normpath(current_jdk) == os.path.normpath(jdk["path"]):
-                is_active = True
-                
-            frame = JdkFrame(self.scroll_frame, jdk, is_active, self.set_active_jdk)
-            frame.pack(fill="x", expand=True, padx=5, pady=5)
-            
+        # Installs, uninstalls and upgrades made outside the app show up without Refresh
+        self.watcher = None
+        if self.manager.config.get("watch_inventory", True):
+            self.watcher = InventoryWatcher(self.manager, lambda change: self.after(0, lambda: self.apply_change(change)))
+            self.watcher.start()
+
+    def refresh_list(self, rescan=False):
+        """Starts discovery on a worker thread; results stream in through after()."""
+        if self.scan_running:
+            self.scan_pending = bool(self.scan_pending) or rescan
+            return
+        self.scan_running = True
+        self.status_bar.configure(text="Scanning for JDKs...")
+        threading.Thread(target=self.discover, args=(rescan,), daemon=True).start()
+        self.after(50, self.poll_found)
+
+    def discover(self, rescan):
+        try:
+            if rescan:
+                jdks = self.manager.rescan(on_found=self.found.put)
+            else:
+                jdks = self.manager.find_jdks(on_found=self.found.put)
+            self.found.put(("done", jdks, self.manager.get_current_jdk()))
+        except Exception as e:
+            self.found.put(("error", str(e), None))
+
+    def poll_found(self):
+        # Drain everything the worker produced since the last tick as one batch
+        batch = []
+        finished = None
+        while True:
+            try:
+                item = self.found.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, tuple):
+                finished = item
+            else:
+                batch.extend(item)
+        if batch:
+            self.jdk_list.upsert(batch)
+
+        if finished is None:
+            self.after(50, self.poll_found)
+            return
+
+        kind, result, current = finished
+        self.scan_running = False
+        if kind == "done":
+            self.jdk_list.set_jdks(result)
+            self.jdk_list.set_active(current)
+            self.status_bar.configure(text=f"Found {len(result)} JDK{'s' if len(result) != 1 else ''}")
+        else:
+            self.status_bar.configure(text=f"Discovery failed: {result}")
+        if self.scan_pending is not None:
+            rescan, self.scan_pending = self.scan_pending, None
+            self.refresh_list(rescan)
+
+    def apply_change(self, change):
+        if change.removed:
+            self.jdk_list.set_jdks(change.jdks)
+        else:
+            self.jdk_list.upsert(change.added + change.changed)
+        parts = [f"{len(items)} {label}" for items, label in
+                 ((change.added, "added"), (change.removed, "removed"), (change.changed, "updated")) if items]
+        self.status_bar.configure(text=f"JDKs changed: {', '.join(parts)}")
+
+    def rescan(self):
+        self.refresh_list(rescan=True)
+
     def set_active_jdk(self, path):
         try:
             self.manager.set_jdk(path)
             self.status_bar.configure(text=f"Set JAVA_HOME to {path}")
-            self.refresh_list()
+            self.jdk_list.set_active(path)
             messagebox.showinfo("Success", "JAVA_HOME updated successfully!\nNote: Restart terminals to see changes.")
         except Exception as e:
             messagebox.showerror("Error", str(e))
@@ -197,6 +270,8 @@ class CoffeeBarApp(ctk.CTk):
         if path:
             self.manager.add_search_path(path)
             self.refresh_list()
+            if self.watcher:
+                self.watcher.poke()
             
 if __name__ == "__main__":
     app = CoffeeBarApp()
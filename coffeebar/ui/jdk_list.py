@@ -0,0 +1,343 @@
+import bisect
+import os
+from typing import Dict, List, Tuple
+import customtkinter as ctk
+from coffeebar.core.version_index import VersionIndex, parse_query
+
+ROW_HEIGHT = 96
+HEADER_HEIGHT = 32
+ROW_GAP = 6
+
+class JdkFrame(ctk.CTkFrame):
+    def __init__(self, master, jdk, is_active, on_select):
+        super().__init__(master)
+        self.on_select = on_select
+        self.is_active = None
+
+        # Layout
+        self.grid_columnconfigure(0, weight=1)
+
+        self.lbl_name = ctk.CTkLabel(self, font=("Roboto", 16, "bold"))
+        self.lbl_name.grid(row=0, column=0, sticky="w", padx=10, pady=(10,0))
+
+        self.lbl_version = ctk.CTkLabel(self, font=("Roboto", 12))
+        self.lbl_version.grid(row=1, column=0, sticky="w", padx=10, pady=(0,10))
+        
+        self.lbl_path = ctk.CTkLabel(self, font=("Roboto", 10), text_color="gray")
+        self.lbl_path.grid(row=2, column=0, sticky="w", padx=10, pady=(0,10))
+
+        self.btn_action = ctk.CTkButton(self, command=self.select_jdk)
+        self.btn_action.grid(row=0, column=1, rowspan=3, padx=10, sticky="e")
+        
+        # Corner radius for elegance
+        self.configure(corner_radius=10)
+
+        self.jdk = None
+        self.update_jdk(jdk)
+        self.set_active(is_active)
+
+    def update_jdk(self, jdk):
+        """Refreshes the labels in place (only the ones whose text changed)."""
+        old = self.jdk
+        self.jdk = jdk
+        if old is None or old.name != jdk.name:
+            self.lbl_name.configure(text=jdk.name)
+        if old is None or (old.version, old.vendor, old.image_type) != (jdk.version, jdk.vendor, jdk.image_type):
+            self.lbl_version.configure(text=f"{jdk.version} · {jdk.vendor} · {jdk.image_type}")
+        if old is None or old.path != jdk.path:
+            self.lbl_path.configure(text=jdk.path)
+
+    def set_active(self, is_active):
+        if is_active == self.is_active:
+            return
+        self.is_active = is_active
+        # Colors
+        bg_color = "transparent" if not is_active else ("#3B8ED0", "#1F6AA5") # Accent color if active
+        self.configure(fg_color=bg_color)
+        btn_text = "Active" if is_active else "Set Active"
+        state = "disabled" if is_active else "normal"
+        self.btn_action.configure(text=btn_text, state=state)
+
+    def select_jdk(self):
+        self.on_select(self.jdk.path)
+
+class JdkListModel:
+    """
+    What the JDK list shows: filtering, grouping and row geometry, no widgets.
+
+    Rows are fixed height, so the rows visible at any scroll offset are found
+    with a bisect over their start offsets instead of asking Tk about layout.
+    Version queries ('>=17,<21', 'lts', 'vendor:temurin@21') filter through
+    the same version index as `coffeebar use`; anything else is type-ahead text.
+    """
+
+    def __init__(self):
+        self.jdks = []
+        self._keys: Dict[str, str] = {}
+        self._index = None
+        self.query = ""
+        self.grouped = False
+        self._matches = []
+        self.items: List[Tuple[str, object]] = []  # ("header", (feature, count)) or ("jdk", JdkInfo)
+        self.starts: List[int] = []
+        self.total_height = 0
+
+    def set_jdks(self, jdks):
+        self.jdks = list(jdks)
+        self._keys = {jdk.path: _search_key(jdk) for jdk in self.jdks}
+        self._index = None
+        self._refilter(self.jdks)
+
+    def upsert(self, jdks):
+        """Adds new JDKs at the end and updates known ones in place (keeps the order)."""
+        index = {jdk.path: i for i, jdk in enumerate(self.jdks)}
+        for jdk in jdks:
+            if jdk.path in index:
+                self.jdks[index[jdk.path]] = jdk
+            else:
+                index[jdk.path] = len(self.jdks)
+                self.jdks.append(jdk)
+            self._keys[jdk.path] = _search_key(jdk)
+        self._index = None
+        self._refilter(self.jdks)
+
+    def set_query(self, query: str):
+        query = query.strip().casefold()
+        if query == self.query:
+            return
+        # Typing narrows the previous result, so only re-check what still matched
+        narrowing = self.query and query.startswith(self.query) and _version_query(self.query) is None
+        self.query = query
+        self._refilter(self._matches if narrowing else self.jdks)
+
+    def set_grouped(self, grouped: bool):
+        if grouped != self.grouped:
+            self.grouped = grouped
+            self._layout()
+
+    def _refilter(self, candidates):
+        version_query = _version_query(self.query)
+        if version_query is not None:
+            if self._index is None:
+                self._index = VersionIndex(self.jdks)
+            selected = {jdk.path for jdk in self._index.select(version_query)}
+            self._matches = [jdk for jdk in self.jdks if jdk.path in selected]
+            self._layout()
+            return
+        terms = self.query.split()
+        self._matches = [jdk for jdk in candidates if all(t in self._keys[jdk.path] for t in terms)]
+        self._layout()
+
+    def _layout(self):
+        items = []
+        if self.grouped:
+            groups: Dict[int, list] = {}
+            for jdk in self._matches:
+                groups.setdefault(jdk.feature, []).append(jdk)
+            # Newest major version first, unknown versions (feature 0) last
+            for feature in sorted(groups, key=lambda f: (not f, -f)):
+                items.append(("header", (feature, len(groups[feature]))))
+                items.extend(("jdk", jdk) for jdk in groups[feature])
+        else:
+            items = [("jdk", jdk) for jdk in self._matches]
+
+        starts = []
+        y = 0
+        for kind, _ in items:
+            starts.append(y)
+            y += (HEADER_HEIGHT if kind == "header" else ROW_HEIGHT) + ROW_GAP
+        self.items, self.starts, self.total_height = items, starts, y
+
+    @property
+    def match_count(self) -> int:
+        return len(self._matches)
+
+    def visible(self, top: int, height: int) -> List[Tuple[int, str, object]]:
+        """(y, kind, payload) for the rows intersecting [top, top + height)."""
+        first = max(0, bisect.bisect_right(self.starts, top) - 1)
+        rows = []
+        for i in range(first, len(self.items)):
+            if self.starts[i] >= top + height:
+                break
+            kind, payload = self.items[i]
+            rows.append((self.starts[i], kind, payload))
+        return rows
+
+def _version_query(text: str):
+    # Bare numbers stay type-ahead ('1' on the way to '17' shouldn't empty the list)
+    if text in ("latest", "lts") or any(c in text for c in "<>=,:@"):
+        return parse_query(text)
+    return None
+
+def _search_key(jdk) -> str:
+    return " ".join(str(part) for part in (
+        jdk.name, jdk.version, jdk.version_string, jdk.vendor, jdk.image_type, jdk.path,
+    )).casefold()
+
+class VirtualJdkList(ctk.CTkFrame):
+    """
+    Scrollable JDK list that only creates widgets for the rows on screen.
+
+    Row widgets are pooled and re-pointed at other JDKs as the list scrolls, so
+    a few hundred JDKs cost the same number of widgets as a screenful. Includes
+    a type-ahead filter box and optional grouping by major version.
+    """
+
+    def __init__(self, master, on_select, empty_text="No JDKs found in standard locations."):
+        super().__init__(master)
+        self.on_select = on_select
+        self.empty_text = empty_text
+        self.model = JdkListModel()
+        self.active_path = None
+        self.top = 0
+        self._render_pending = False
+        self._filter_job = None
+        self._jdk_rows: List[JdkFrame] = []
+        self._header_rows: List[ctk.CTkLabel] = []
+
+        # Toolbar: type-ahead filter + grouping toggle
+        self.toolbar = ctk.CTkFrame(self, fg_color="transparent")
+        self.toolbar.pack(fill="x", padx=5, pady=(5, 0))
+        self.filter_var = ctk.StringVar()
+        self.filter_entry = ctk.CTkEntry(self.toolbar, textvariable=self.filter_var,
+                                         placeholder_text="Filter (e.g. 17 temurin)")
+        self.filter_entry.pack(side="left", fill="x", expand=True)
+        self.filter_var.trace_add("write", lambda *_: self._schedule_filter())
+        self.group_var = ctk.BooleanVar(value=False)
+        self.group_check = ctk.CTkCheckBox(self.toolbar, text="Group by version", variable=self.group_var,
+                                           command=self._on_group_toggle)
+        self.group_check.pack(side="right", padx=(10, 0))
+
+        # Viewport: rows are placed at absolute offsets, the scrollbar is driven by hand
+        self.body = ctk.CTkFrame(self, fg_color="transparent")
+        self.body.pack(fill="both", expand=True, padx=5, pady=5)
+        self.scrollbar = ctk.CTkScrollbar(self.body, command=self.yview)
+        self.scrollbar.pack(side="right", fill="y")
+        self.viewport = ctk.CTkFrame(self.body, fg_color="transparent")
+        self.viewport.pack(side="left", fill="both", expand=True)
+        self.empty_label = ctk.CTkLabel(self.viewport, text=empty_text)
+
+        self.viewport.bind("<Configure>", lambda e: self.schedule_render())
+        # Wheel events only while the pointer is over the list
+        self.viewport.bind("<Enter>", lambda e: self._bind_wheel(True))
+        self.viewport.bind("<Leave>", lambda e: self._bind_wheel(False))
+
+    # Data
+
+    def set_jdks(self, jdks):
+        self.model.set_jdks(jdks)
+        self.schedule_render()
+
+    def upsert(self, jdks):
+        self.model.upsert(jdks)
+        self.schedule_render()
+
+    def set_active(self, path):
+        self.active_path = path
+        for row in self._jdk_rows:
+            if row.jdk is not None:
+                row.set_active(self.is_active(row.jdk.path))
+
+    def is_active(self, path):
+        return bool(self.active_path) and os.path.normpath(self.active_path) == os.path.normpath(path)
+
+    # Filtering
+
+    def _schedule_filter(self):
+        # Debounced: a burst of keystrokes refilters once
+        if self._filter_job is not None:
+            self.after_cancel(self._filter_job)
+        self._filter_job = self.after(80, self._apply_filter)
+
+    def _apply_filter(self):
+        self._filter_job = None
+        self.model.set_query(self.filter_var.get())
+        self.top = 0
+        self.schedule_render()
+
+    def _on_group_toggle(self):
+        self.model.set_grouped(self.group_var.get())
+        self.top = 0
+        self.schedule_render()
+
+    # Scrolling
+
+    def yview(self, *args):
+        height = max(1, self.viewport.winfo_height())
+        if args and args[0] == "moveto":
+            self.scroll_to(float(args[1]) * self.model.total_height)
+        elif args and args[0] == "scroll":
+            step = height if args[2] == "pages" else ROW_HEIGHT // 2
+            self.scroll_to(self.top + int(args[1]) * step)
+
+    def scroll_to(self, top):
+        height = max(1, self.viewport.winfo_height())
+        top = int(max(0, min(top, self.model.total_height - height)))
+        if top != self.top:
+            self.top = top
+            self.render()
+
+    def _bind_wheel(self, active):
+        if active:
+            self.bind_all("<MouseWheel>", self._on_wheel)
+            self.bind_all("<Button-4>", lambda e: self.scroll_to(self.top - ROW_HEIGHT))
+            self.bind_all("<Button-5>", lambda e: self.scroll_to(self.top + ROW_HEIGHT))
+        else:
+            for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+                self.unbind_all(sequence)
+
+    def _on_wheel(self, event):
+        # Windows reports multiples of 120, macOS small deltas
+        delta = event.delta if abs(event.delta) < 120 else event.delta // 120
+        self.scroll_to(self.top - delta * ROW_HEIGHT)
+
+    # Rendering
+
+    def schedule_render(self):
+        """Coalesces many updates (e.g. streamed discovery batches) into one render."""
+        if not self._render_pending:
+            self._render_pending = True
+            self.after_idle(self.render)
+
+    def render(self):
+        self._render_pending = False
+        height = max(1, self.viewport.winfo_height())
+        total = self.model.total_height
+        self.top = max(0, min(self.top, total - height))
+        rows = self.model.visible(self.top, height)
+
+        used_jdk = used_header = 0
+        for y, kind, payload in rows:
+            if kind == "header":
+                if used_header == len(self._header_rows):
+                    self._header_rows.append(ctk.CTkLabel(self.viewport, anchor="w", font=("Roboto", 14, "bold")))
+                label = self._header_rows[used_header]
+                used_header += 1
+                feature, count = payload
+                label.configure(text=f"Java {feature} · {count}" if feature else f"Unknown version · {count}")
+                label.place(x=0, y=y - self.top, relwidth=1, height=HEADER_HEIGHT)
+            else:
+                if used_jdk == len(self._jdk_rows):
+                    self._jdk_rows.append(JdkFrame(self.viewport, payload, self.is_active(payload.path), self.on_select))
+                row = self._jdk_rows[used_jdk]
+                used_jdk += 1
+                row.update_jdk(payload)
+                row.set_active(self.is_active(payload.path))
+                row.place(x=0, y=y - self.top, relwidth=1, height=ROW_HEIGHT)
+
+        # Pooled rows that aren't needed at this offset are hidden, not destroyed
+        for row in self._jdk_rows[used_jdk:]:
+            row.place_forget()
+        for label in self._header_rows[used_header:]:
+            label.place_forget()
+
+        if self.model.items:
+            self.empty_label.place_forget()
+        else:
+            self.empty_label.configure(text="No matches." if self.model.query else self.empty_text)
+            self.empty_label.place(relx=0.5, y=20, anchor="n")
+
+        if total > height:
+            self.scrollbar.set(self.top / total, (self.top + height) / total)
+        else:
+            self.scrollbar.set(0, 1)
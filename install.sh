@@ -19,31 +19,23 @@ PROJECT_ROOT="$(pwd)"
 WRAPPER_PATH="$PROJECT_ROOT/bin/coffeebar"
 chmod +x "$WRAPPER_PATH"
 
+SHELL_NAME="bash"
 SHELL_RC="$HOME/.bashrc"
 if [[ "$SHELL" == *"zsh"* ]]; then
+    SHELL_NAME="zsh"
     SHELL_RC="$HOME/.zshrc"
 fi
 
-if ! grep -q "alias coffeebar=" "$SHELL_RC"; then
+if ! grep -q "shell-init $SHELL_NAME" "$SHELL_RC" 2>/dev/null; then
     echo "" >> "$SHELL_RC"
     echo "# CoffeeBar" >> "$SHELL_RC"
-    # We use a function or alias that sources the output env?
-    # Simpler: just run the wrapper. But wrapper can't update env of parent.
-    # BEST PRACTICE for NVM/SDKMAN style:
-    # Use a shell function.
-    
-    cat <<EOT >> "$SHELL_RC"
-coffeebar() {
-    "$WRAPPER_PATH" "\$@"
-    local EXIT_CODE=\$?
-    if [ "\$1" = "use" ] && [ \$EXIT_CODE -eq 0 ]; then
-        source "\$HOME/.coffeebar_env"
-    fi
-}
-EOT
-    echo "Added 'coffeebar' function to $SHELL_RC"
+    # shell-init defines a 'coffeebar' shell function (NVM/SDKMAN style) so that
+    # 'coffeebar use' can change JAVA_HOME in the current shell, usually
+    # without starting Python at all.
+    echo "eval \"\$(\"$WRAPPER_PATH\" shell-init $SHELL_NAME)\"" >> "$SHELL_RC"
+    echo "Added CoffeeBar shell integration to $SHELL_RC"
 else
-    echo "'coffeebar' alias/function already exists in $SHELL_RC"
+    echo "CoffeeBar shell integration already present in $SHELL_RC"
 fi
 
 echo ""
@@ -0,0 +1,16 @@
+"""
+Shared setup for the tests: puts the repository and benchmarks/ on sys.path,
+so tests can import coffeebar and the synthetic fixtures (fake JDK trees,
+throwaway HOME, local HTTP server) that the benchmarks use.
+
+    python -m unittest discover tests      (or: python -m pytest tests)
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARKS = os.path.join(ROOT, "benchmarks")
+
+for path in (BENCHMARKS, ROOT):
+    if path not in sys.path:
+        sys.path.insert(0, path)
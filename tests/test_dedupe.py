@@ -0,0 +1,128 @@
+"""
+dedupe.Deduplicator and ContentStore on real files: identical content is
+hardlinked to one stored copy, and the files JDK tools edit are left alone.
+Hardlink mode, so the tests don't depend on the filesystem cloning.
+"""
+import os
+import tempfile
+import unittest
+
+import support
+from synthetic import isolated_home, write_tar_gz
+from coffeebar.core.dedupe import STORE_DIR, ContentStore, Deduplicator, dedupe_homes
+
+FILES = {
+    os.path.join("lib", "modules"): b"m" * 50000,
+    os.path.join("lib", "server", "libjvm.so"): b"j" * 20000,
+    os.path.join("lib", "security", "cacerts"): b"c" * 8000,
+    os.path.join("conf", "net.properties"): b"n" * 8000,
+    "release": b'JAVA_VERSION="21"\n',
+}
+
+def make_home(path, files=FILES):
+    for name, data in files.items():
+        os.makedirs(os.path.dirname(os.path.join(path, name)), exist_ok=True)
+        with open(os.path.join(path, name), "wb") as f:
+            f.write(data)
+    return path
+
+def inode(path):
+    st = os.stat(path)
+    return st.st_ino, st.st_dev
+
+class DeduplicatorTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.first = make_home(os.path.join(self.root, "jdk-a"))
+        self.second = make_home(os.path.join(self.root, "jdk-b"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def deduplicator(self, **kwargs):
+        return Deduplicator(ContentStore(self.root), "hardlink", **kwargs)
+
+    def test_identical_files_share_an_inode(self):
+        deduplicator = self.deduplicator()
+        first = deduplicator.run(self.first)
+        self.assertEqual((first.files, first.linked, first.saved_bytes), (2, 0, 0))
+        second = deduplicator.run(self.second)
+        self.assertEqual((second.linked, second.saved_bytes, second.method), (2, 70000, "hardlink"))
+        for name in (os.path.join("lib", "modules"), os.path.join("lib", "server", "libjvm.so")):
+            self.assertEqual(inode(os.path.join(self.first, name)), inode(os.path.join(self.second, name)))
+        # Running again finds them shared already
+        again = deduplicator.run(self.second)
+        self.assertEqual((again.linked, again.shared_bytes), (0, 70000))
+
+    def test_small_and_mutable_files_are_left_alone(self):
+        deduplicator = self.deduplicator()
+        deduplicator.run(self.first)
+        deduplicator.run(self.second)
+        for name in ("release", os.path.join("lib", "security", "cacerts"), os.path.join("conf", "net.properties")):
+            with self.subTest(name=name):
+                self.assertNotEqual(inode(os.path.join(self.first, name)), inode(os.path.join(self.second, name)))
+
+    def test_different_permissions_are_not_hardlinked(self):
+        os.chmod(os.path.join(self.second, "lib", "modules"), 0o600)
+        deduplicator = self.deduplicator()
+        deduplicator.run(self.first)
+        stats = deduplicator.run(self.second)
+        self.assertEqual(stats.linked, 1)
+        self.assertNotEqual(inode(os.path.join(self.first, "lib", "modules")),
+                            inode(os.path.join(self.second, "lib", "modules")))
+
+    def test_dry_run_changes_nothing(self):
+        deduplicator = self.deduplicator(dry_run=True)
+        deduplicator.run(self.first)
+        stats = deduplicator.run(self.second)
+        self.assertEqual((stats.linked, stats.saved_bytes), (2, 70000))
+        self.assertFalse(os.path.exists(os.path.join(self.root, STORE_DIR)))
+        self.assertEqual(os.stat(os.path.join(self.second, "lib", "modules")).st_nlink, 1)
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            Deduplicator(ContentStore(self.root), "copy")
+
+    def test_prune_removes_unreferenced_objects(self):
+        results = dedupe_homes([self.first, self.second], "hardlink")
+        self.assertEqual(sum(r.saved_bytes for r in results), 70000)
+        store = ContentStore(self.root)
+        self.assertEqual(len(list(store.objects())), 2)
+        for home in (self.first, self.second):
+            os.remove(os.path.join(home, "lib", "modules"))
+        self.assertEqual(store.prune(), (1, 50000))
+        self.assertEqual(len(list(store.objects())), 1)
+
+class InstallDedupeTest(unittest.TestCase):
+    def test_off_by_default(self):
+        from coffeebar.core.jdk_downloader import InstallReport, JdkDownloader
+        with tempfile.TemporaryDirectory() as home, isolated_home(home):
+            root = os.path.join(home, "jdks")
+            os.makedirs(root)
+            for folder in ("first", "second"):
+                archive = os.path.join(home, "jdk.tar.gz")
+                write_tar_gz(archive, 20, 200000)
+                report = InstallReport()
+                JdkDownloader().install_jdk(archive, root, folder, report=report)
+                self.assertIsNone(report.dedupe)
+            self.assertFalse(os.path.exists(os.path.join(root, STORE_DIR)))
+
+    def test_opted_in_install_shares_with_installed_jdks(self):
+        from coffeebar.core.jdk_downloader import InstallReport, JdkDownloader
+        with tempfile.TemporaryDirectory() as home, isolated_home(home):
+            root = os.path.join(home, "jdks")
+            os.makedirs(root)
+            reports = []
+            for folder in ("first", "second"):
+                archive = os.path.join(home, "jdk.tar.gz")
+                write_tar_gz(archive, 20, 200000)
+                reports.append(InstallReport())
+                JdkDownloader(dedupe="hardlink").install_jdk(archive, root, folder, report=reports[-1])
+            self.assertEqual(reports[0].dedupe.linked, 0)
+            self.assertEqual(reports[1].dedupe.linked, reports[1].dedupe.files)
+            self.assertGreater(reports[1].dedupe.saved_bytes, 0)
+            self.assertEqual(reports[1].dedupe.home, os.path.join(root, "second"))
+
+if __name__ == "__main__":
+    unittest.main()
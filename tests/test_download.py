@@ -0,0 +1,119 @@
+"""
+SegmentedDownloader and JdkDownloader.download_file against the local
+stand-in server (synthetic.file_server): with and without Range support,
+dropped connections, resuming an interrupted download from its .part.json
+state, and a checksum mismatch.
+"""
+import hashlib
+import json
+import os
+import random
+import tempfile
+import unittest
+
+import support
+from synthetic import file_server
+from coffeebar.core.download import ChecksumMismatch, SegmentedDownloader
+from coffeebar.core.jdk_downloader import InstallReport, JdkDownloader
+
+SIZE = 3 * 1024 * 1024 + 12345  # not a multiple of the segment or chunk size
+
+class Interrupted(Exception):
+    pass
+
+def downloader(**kwargs):
+    # Small segments, so a few MB are fetched as four ranges
+    return SegmentedDownloader(segments=4, min_segment_size=256 * 1024, chunk_size=64 * 1024, **kwargs)
+
+class DownloadTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.served = os.path.join(self.tmp.name, "served")
+        os.makedirs(self.served)
+        self.data = random.Random(7).randbytes(SIZE)
+        with open(os.path.join(self.served, "jdk.tar.gz"), "wb") as f:
+            f.write(self.data)
+        self.sha256 = hashlib.sha256(self.data).hexdigest()
+        self.dest = os.path.join(self.tmp.name, "jdk.tar.gz")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def assertDownloaded(self, stats):
+        with open(self.dest, "rb") as f:
+            self.assertTrue(f.read() == self.data, "downloaded file differs from the served one")
+        self.assertEqual(stats.sha256, self.sha256)
+        self.assertEqual(stats.total_bytes, SIZE)
+        self.assertGreater(stats.seconds, 0)
+        self.assertGreater(stats.throughput, 0)
+        for leftover in (self.dest + ".part", self.dest + ".part.json"):
+            self.assertFalse(os.path.exists(leftover), leftover)
+
+    def test_segmented_when_ranges_are_supported(self):
+        with file_server(self.served) as url:
+            stats = downloader().download(f"{url}/jdk.tar.gz", self.dest)
+        self.assertDownloaded(stats)
+        self.assertTrue(stats.ranged)
+        self.assertEqual(stats.segments, 4)
+        self.assertEqual(stats.fetched_bytes, SIZE)
+        self.assertEqual(stats.retries, 0)
+
+    def test_single_stream_when_ranges_are_refused(self):
+        with file_server(self.served, ranges=False) as url:
+            stats = downloader().download(f"{url}/jdk.tar.gz", self.dest)
+        self.assertDownloaded(stats)
+        self.assertFalse(stats.ranged)
+        self.assertEqual(stats.segments, 1)
+        self.assertEqual(stats.fetched_bytes, SIZE)
+        self.assertEqual(stats.retries, 0)
+
+    def test_dropped_connections_are_retried(self):
+        with file_server(self.served, flaky=2) as url:
+            stats = downloader().download(f"{url}/jdk.tar.gz", self.dest)
+        self.assertDownloaded(stats)
+        self.assertEqual(stats.retries, 2)
+        # The halves that did arrive are kept, not fetched again
+        self.assertEqual(stats.fetched_bytes, SIZE)
+
+    def test_resumes_an_interrupted_download(self):
+        def interrupt(done, total):
+            if done >= SIZE // 3:
+                raise Interrupted()
+
+        with file_server(self.served) as url:
+            with self.assertRaises(Interrupted):
+                downloader().download(f"{url}/jdk.tar.gz", self.dest, interrupt)
+            with open(self.dest + ".part.json", "r", encoding="utf-8") as f:
+                saved = sum(done for _, _, done in json.load(f)["segments"])
+            self.assertGreater(saved, 0)
+            self.assertLess(saved, SIZE)
+
+            stats = downloader().download(f"{url}/jdk.tar.gz", self.dest)
+        self.assertDownloaded(stats)
+        self.assertEqual(stats.resumed_bytes, saved)
+        self.assertEqual(stats.fetched_bytes, SIZE - saved)
+        self.assertEqual(stats.retries, 0)
+
+    def test_empty_file(self):
+        # The probe's Content-Range then says the size is 0: nothing to split into segments
+        open(os.path.join(self.served, "empty.bin"), "wb").close()
+        dest = os.path.join(self.tmp.name, "empty.bin")
+        with file_server(self.served) as url:
+            stats = downloader().download(f"{url}/empty.bin", dest)
+        self.assertEqual(os.path.getsize(dest), 0)
+        self.assertFalse(stats.ranged)
+        self.assertEqual(stats.sha256, hashlib.sha256(b"").hexdigest())
+
+    def test_checksum_mismatch_deletes_the_file(self):
+        report = InstallReport()
+        with file_server(self.served) as url:
+            with self.assertRaises(ChecksumMismatch):
+                JdkDownloader().download_file(f"{url}/jdk.tar.gz", self.dest, checksum="0" * 64, report=report)
+            self.assertFalse(os.path.exists(self.dest))
+            self.assertIsNone(report.download)
+
+            JdkDownloader().download_file(f"{url}/jdk.tar.gz", self.dest, checksum=self.sha256.upper(), report=report)
+        self.assertDownloaded(report.download)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+"""
+Environment transactions (core.env_backend) on the in-memory backend: one
+write and one notification per commit, none when nothing changed, nothing
+at all when the block raises.
+"""
+import unittest
+
+import support
+from coffeebar.core.env_backend import EnvBackend, MemoryEnvBackend
+
+class TransactionTest(unittest.TestCase):
+    def test_one_write_and_one_notification(self):
+        backend = MemoryEnvBackend()
+        with backend.transaction() as tx:
+            tx.set("JAVA_HOME", "/jdks/17")
+            tx.ensure_on_path(backend.java_bin_entry)
+            tx.ensure_on_path(backend.java_bin_entry)
+        self.assertTrue(tx.committed)
+        self.assertEqual(backend.get("JAVA_HOME"), "/jdks/17")
+        self.assertEqual(backend.path, ["$JAVA_HOME/bin"])
+        self.assertEqual((backend.writes, backend.notifications), (1, 1))
+
+    def test_no_change_is_not_announced(self):
+        backend = MemoryEnvBackend({"JAVA_HOME": "/jdks/17"})
+        with backend.transaction() as tx:
+            tx.set("JAVA_HOME", "/jdks/17")
+        self.assertFalse(tx.commit())  # already committed: a second commit does nothing
+        self.assertEqual((backend.writes, backend.notifications), (0, 0))
+
+    def test_unset(self):
+        backend = MemoryEnvBackend({"JAVA_HOME": "/jdks/17", "JDK_HOME": "/jdks/17"})
+        with backend.transaction() as tx:
+            tx.unset("JDK_HOME")
+        self.assertIsNone(backend.get("JDK_HOME"))
+        self.assertEqual(backend.get("JAVA_HOME"), "/jdks/17")
+        self.assertEqual(backend.notifications, 1)
+
+    def test_error_discards_the_transaction(self):
+        backend = MemoryEnvBackend({"JAVA_HOME": "/jdks/11"})
+        with self.assertRaises(RuntimeError):
+            with backend.transaction() as tx:
+                tx.set("JAVA_HOME", "/jdks/17")
+                raise RuntimeError("probe failed")
+        self.assertEqual(backend.get("JAVA_HOME"), "/jdks/11")
+        self.assertEqual((backend.writes, backend.notifications), (0, 0))
+
+    def test_incomplete_backend_fails_when_created(self):
+        class NoApply(EnvBackend):
+            def get(self, name):
+                return None
+
+        with self.assertRaises(TypeError):
+            NoApply()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+"""
+JdkDownloader.install_streaming against the local stand-in server
+(synthetic.file_server): streamed installs, the archive cache, damaged
+cache entries, checksum mismatches and dropped connections.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import unittest
+
+import support
+from synthetic import file_server, write_tar_gz, write_zip
+from coffeebar.core import stream_extract
+from coffeebar.core.archive_cache import ArchiveCache
+from coffeebar.core.download import ChecksumMismatch, DownloadError
+from coffeebar.core.jdk_downloader import InstallReport, JdkDownloader
+
+def sha256_of(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+class InstallTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.served = os.path.join(self.tmp.name, "served")
+        self.root = os.path.join(self.tmp.name, "jdks")
+        os.makedirs(self.served)
+        os.makedirs(self.root)
+        write_tar_gz(os.path.join(self.served, "jdk.tar.gz"), 300, 2 * 1024 * 1024)
+        write_zip(os.path.join(self.served, "jdk.zip"), 300, 2 * 1024 * 1024)
+        self.cache = ArchiveCache(os.path.join(self.tmp.name, "archives"), max_bytes=1 << 30)
+        self.downloader = JdkDownloader(archive_cache=self.cache, dedupe="off")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def install(self, url, filename, checksum=None, report=None):
+        checksum = checksum or sha256_of(os.path.join(self.served, filename))
+        return self.downloader.install_streaming(f"{url}/{filename}", self.root, "temurin-test", filename,
+                                                 checksum=checksum, report=report)
+
+    def assertInstalled(self, home):
+        self.assertEqual(home, os.path.join(self.root, "temurin-test"))
+        self.assertTrue(os.access(os.path.join(home, "bin", "java"), os.X_OK))
+        self.assertEqual(len(os.listdir(os.path.join(home, "lib", "module2"))), 100)
+        self.assertEqual(os.listdir(self.root), ["temurin-test"])  # no staging left behind
+
+    def count_extractions(self):
+        calls = []
+        for name in ("extract_tar_stream", "extract_zip_stream"):
+            original = getattr(stream_extract, name)
+
+            def counted(*args, _original=original, **kwargs):
+                calls.append(1)
+                return _original(*args, **kwargs)
+            setattr(stream_extract, name, counted)
+            self.addCleanup(setattr, stream_extract, name, original)
+        return calls
+
+    def test_streamed_install_is_cached(self):
+        for filename in ("jdk.tar.gz", "jdk.zip"):
+            with self.subTest(filename=filename):
+                checksum = sha256_of(os.path.join(self.served, filename))
+                with file_server(self.served) as url:
+                    self.assertInstalled(self.install(url, filename))
+                self.assertEqual(sha256_of(self.cache.get(checksum)), checksum)
+                os.rename(os.path.join(self.root, "temurin-test"), os.path.join(self.tmp.name, "old"))
+                # Served from the cache: the server is gone
+                self.assertInstalled(self.install("http://127.0.0.1:9", filename, checksum))
+                os.rename(os.path.join(self.root, "temurin-test"), os.path.join(self.tmp.name, "old2"))
+                for leftover in ("old", "old2"):
+                    shutil.rmtree(os.path.join(self.tmp.name, leftover))
+
+    def test_damaged_cache_entry_is_not_extracted(self):
+        checksum = sha256_of(os.path.join(self.served, "jdk.tar.gz"))
+        # A readable archive, but not the one the checksum names
+        os.makedirs(self.cache.root)
+        write_tar_gz(self.cache.path_for(checksum), 10, 1024)
+        extractions = self.count_extractions()
+        with file_server(self.served) as url:
+            self.assertInstalled(self.install(url, "jdk.tar.gz"))
+        self.assertEqual(len(extractions), 1)  # the download only
+        self.assertEqual(sha256_of(self.cache.get(checksum)), checksum)
+
+    def test_damaged_cache_entry_offline(self):
+        checksum = sha256_of(os.path.join(self.served, "jdk.tar.gz"))
+        os.makedirs(self.cache.root)
+        write_tar_gz(self.cache.path_for(checksum), 10, 1024)
+        extractions = self.count_extractions()
+        with self.assertRaises(Exception):
+            self.install("http://127.0.0.1:9", "jdk.tar.gz", checksum)
+        self.assertEqual(extractions, [])
+        self.assertIsNone(self.cache.get(checksum))
+        self.assertEqual(os.listdir(self.root), [])
+
+    def test_checksum_mismatch_installs_nothing(self):
+        report = InstallReport()
+        with file_server(self.served) as url:
+            with self.assertRaises(ChecksumMismatch):
+                self.install(url, "jdk.tar.gz", "0" * 64, report)
+        self.assertEqual(os.listdir(self.root), [])
+        self.assertEqual(self.cache.entries(), [])
+
+    def test_dropped_connection_is_resumed(self):
+        for filename in ("jdk.tar.gz", "jdk.zip"):
+            with self.subTest(filename=filename):
+                report = InstallReport()
+                size = os.path.getsize(os.path.join(self.served, filename))
+                with file_server(self.served, flaky=1) as url:
+                    self.assertInstalled(self.install(url, filename, report=report))
+                self.assertEqual(report.download.retries, 1)
+                self.assertEqual(report.download.fetched_bytes, size)
+                shutil.rmtree(os.path.join(self.root, "temurin-test"))
+                self.cache.clear()
+
+    def test_dropped_connection_without_ranges_fails_cleanly(self):
+        with file_server(self.served, ranges=False, flaky=1) as url:
+            with self.assertRaises(DownloadError):
+                self.install(url, "jdk.tar.gz")
+        self.assertEqual(os.listdir(self.root), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+"""
+jdk_exec: the child environment that runs a command under one JDK, and
+run_matrix running a command under several at once.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import support
+from synthetic import home_spec, isolated_home, make_home
+from coffeebar.core.jdk_exec import child_env, run_matrix
+
+SEP = os.pathsep
+
+class ChildEnvTest(unittest.TestCase):
+    def test_sets_java_home_and_path(self):
+        env = child_env("/jdks/21", {"PATH": SEP.join(["/usr/bin", "/bin"]), "LANG": "C"})
+        self.assertEqual(env["JAVA_HOME"], "/jdks/21")
+        self.assertEqual(env["PATH"].split(SEP), [os.path.join("/jdks/21", "bin"), "/usr/bin", "/bin"])
+        self.assertEqual(env["LANG"], "C")
+
+    def test_replaces_the_parents_jdk(self):
+        base = {"JAVA_HOME": "/jdks/17",
+                "PATH": SEP.join([os.path.join("/jdks/17", "bin"), "/usr/bin", os.path.join("/jdks/21", "bin"), ""])}
+        env = child_env("/jdks/21", base)
+        self.assertEqual(env["PATH"].split(SEP), [os.path.join("/jdks/21", "bin"), "/usr/bin"])
+        self.assertEqual(base["JAVA_HOME"], "/jdks/17")  # the base mapping is copied, not changed
+
+    def test_no_path(self):
+        self.assertEqual(child_env("/jdks/21", {})["PATH"], os.path.join("/jdks/21", "bin"))
+
+    def test_defaults_to_this_process(self):
+        with mock.patch.dict(os.environ, {"JAVA_HOME": "/jdks/17", "COFFEEBAR_TEST": "1"}):
+            env = child_env("/jdks/21")
+            self.assertEqual(os.environ["JAVA_HOME"], "/jdks/17")
+        self.assertEqual((env["JAVA_HOME"], env["COFFEEBAR_TEST"]), ("/jdks/21", "1"))
+
+@unittest.skipUnless(os.name == "posix" and shutil.which("sh"), "needs sh")
+class RunMatrixTest(unittest.TestCase):
+    def test_each_run_gets_its_jdk(self):
+        with tempfile.TemporaryDirectory() as root, isolated_home(root):
+            homes = {}
+            for i, query in enumerate(("8", "11", "17")):
+                homes[query] = os.path.join(root, "jdks", query)
+                make_home(homes[query], home_spec(i))
+            targets = dict(homes, missing=None)
+            finished = []
+            results = run_matrix(targets, ["sh", "-c", 'echo "$JAVA_HOME"; command -v java; exit 3'], jobs=2,
+                                 on_done=finished.append)
+            self.assertEqual([r.query for r in results], ["8", "11", "17", "missing"])
+            self.assertEqual(sorted(r.query for r in finished), sorted(targets))
+            for result in results[:3]:
+                with self.subTest(query=result.query):
+                    self.assertEqual(result.returncode, 3)
+                    self.assertFalse(result.ok)
+                    self.assertEqual(result.output.split(), [result.home, os.path.join(result.home, "bin", "java")])
+            self.assertEqual((results[3].returncode, results[3].error), (None, "no matching JDK"))
+
+    def test_command_not_found(self):
+        with tempfile.TemporaryDirectory() as root, isolated_home(root):
+            results = run_matrix({"17": root}, ["coffeebar-no-such-command"])
+            self.assertIsNone(results[0].returncode)
+            self.assertTrue(results[0].error)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+"""
+ProgressBus and ProgressTracker (core.progress): coalescing of updates,
+phase changes always delivered, and finished trackers released.
+"""
+import unittest
+
+import support
+from coffeebar.core.progress import ProgressBus
+
+class ProgressBusTest(unittest.TestCase):
+    def test_updates_are_coalesced_but_phases_are_not(self):
+        bus = ProgressBus(min_interval=3600)
+        events = []
+        bus.subscribe(events.append)
+        tracker = bus.tracker(17)
+        tracker.phase("download", 1000)
+        for done in range(0, 1001, 10):
+            tracker.update(done)
+        tracker.phase("extract", 500)
+        # The phase change, then the last pending download update, then the new phase
+        self.assertEqual([(e.phase, e.done) for e in events], [("download", 0), ("download", 1000), ("extract", 0)])
+
+    def test_unsubscribe(self):
+        bus = ProgressBus(min_interval=0)
+        events = []
+        unsubscribe = bus.subscribe(events.append)
+        bus.tracker(1).phase("download")
+        unsubscribe()
+        bus.tracker(1).phase("extract")
+        self.assertEqual([e.phase for e in events], ["download"])
+
+    def test_finished_trackers_are_released(self):
+        bus = ProgressBus()
+        events = []
+        bus.subscribe(events.append)
+        for version, ok in ((17, True), (21, False)):
+            tracker = bus.tracker(version)
+            tracker.phase("download", 10)
+            tracker.finish(ok, "" if ok else "boom")
+        self.assertEqual(bus._trackers, {})
+        self.assertEqual([(e.key, e.phase) for e in events if e.phase in ("done", "failed")],
+                         [(17, "done"), (21, "failed")])
+        # Installing the same version again starts from scratch
+        self.assertEqual(bus.tracker(17).phase_name, "metadata")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+"""
+Per-directory JDK selection: project_version's walk up to the marker file
+and ResolutionCache, and the prompt hook from shell_init doing the same walk
+with builtins. Plain Maven modules (a pom.xml without toolchains) must not
+stop either walk, or every cd between modules would start Python.
+"""
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import unittest
+
+import support
+from synthetic import isolated_home, make_monorepo
+from coffeebar.core.project_version import ResolutionCache, find_project_spec, read_spec, spec_candidates
+
+TOOLCHAINS_POM = """<project>
+  <build><plugins><plugin>
+    <artifactId>maven-toolchains-plugin</artifactId>
+    <configuration><toolchains>
+      <jdk>
+        <version>21</version>
+      </jdk>
+    </toolchains></configuration>
+  </plugin></plugins></build>
+</project>
+"""
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+def touch_later(path, seconds):
+    """Moves path's mtime `seconds` ahead, past the filesystem's timestamp granularity."""
+    later = time.time() + seconds
+    os.utime(path, (later, later))
+
+class ProjectVersionTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.deep = make_monorepo(self.root, 8, modules=4, depth=3)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def leaf(self, module):
+        return next(d for d in self.deep if os.sep + f"m{module}" + os.sep in d)
+
+    def test_read_spec(self):
+        cases = {
+            ".java-version": ("17.0.9\n", "17.0.9"),
+            ".sdkmanrc": ("# comment\njava = 21.0.1-tem\n", "21.0.1-tem"),
+            ".tool-versions": ("nodejs 20\njava temurin-17.0.9+9\n", "temurin-17.0.9+9"),
+            "pom.xml": (TOOLCHAINS_POM, "21"),
+        }
+        for name, (text, spec) in cases.items():
+            with self.subTest(name=name):
+                path = os.path.join(self.root, "specs", name)
+                write(path, text)
+                self.assertEqual(read_spec(path), spec)
+        self.assertIsNone(read_spec(os.path.join(self.root, "pom.xml")))  # plain module pom
+        self.assertIsNone(read_spec(os.path.join(self.root, "missing", ".java-version")))
+
+    def test_spec_candidates(self):
+        self.assertEqual(spec_candidates("17.0.9-tem"), ["17.0.9-tem", "17.0.9"])
+        self.assertEqual(spec_candidates("temurin-17.0.9+9"), ["temurin-17.0.9+9", "17.0.9+9"])
+        self.assertEqual(spec_candidates("21"), ["21"])
+
+    def test_plain_poms_do_not_stop_the_walk(self):
+        marker, spec, walked = find_project_spec(self.leaf(3))
+        self.assertEqual((marker, spec), (os.path.join(self.root, ".java-version"), "17"))
+        # The skipped pom.xml is tracked, so adding toolchains to it invalidates cached lookups
+        self.assertIn(os.path.join(self.root, "services", "m3", "pom.xml"), walked)
+        marker, spec, _ = find_project_spec(self.leaf(1))
+        self.assertEqual((marker, spec), (os.path.join(self.root, "services", "m1", ".java-version"), "11"))
+
+    def test_cache_hits_and_invalidation(self):
+        # Not in self.root, which the walk tracks: saving would change its mtime
+        os.makedirs(os.path.join(self.root, "cache"))
+        cache_file = os.path.join(self.root, "cache", "projects.json")
+        cache = ResolutionCache(cache_file)
+        leaf = self.leaf(3)
+        self.assertEqual(cache.lookup(leaf)[1], "17")
+        cache.save()
+
+        reloaded = ResolutionCache(cache_file)
+        self.assertEqual(reloaded.lookup(leaf)[1], "17")
+        self.assertFalse(reloaded.dirty)  # served from the saved entry
+
+        # Adding toolchains to the module's pom.xml
+        pom = os.path.join(self.root, "services", "m3", "pom.xml")
+        write(pom, TOOLCHAINS_POM)
+        touch_later(pom, 5)
+        self.assertEqual(reloaded.lookup(leaf), (pom, "21"))
+
+        # Editing the marker found
+        write(pom, TOOLCHAINS_POM.replace("21", "22"))
+        touch_later(pom, 10)
+        self.assertEqual(reloaded.lookup(leaf)[1], "22")
+
+        # Creating a marker closer to the directory
+        write(os.path.join(leaf, ".java-version"), "8\n")
+        self.assertEqual(reloaded.lookup(leaf)[1], "8")
+
+@unittest.skipUnless(shutil.which("bash"), "needs bash")
+class PromptHookTest(unittest.TestCase):
+    """_coffeebar_auto in bash, with a stand-in lookup table and Python CLI."""
+
+    def run_hook(self, root, directories):
+        from coffeebar.core.shell_init import init_script
+        calls = os.path.join(root, "calls")
+        script = init_script("bash") + f"""
+_coffeebar_lookup() {{
+    case "$1" in
+        17) _coffeebar_home=/jdk17 ;;
+        11) _coffeebar_home=/jdk11 ;;
+        21.0.0) _coffeebar_home=/jdk21 ;;
+        *) return 1 ;;
+    esac
+}}
+_coffeebar_py() {{ printf '%s\\n' "$*" >> '{calls}'; echo /from-python; }}
+_coffeebar_auto_key=
+"""
+        for directory in directories:
+            script += f"cd '{directory}'; _coffeebar_auto; echo \"$JAVA_HOME\"\n"
+        result = subprocess.run(["bash", "--noprofile", "--norc", "-c", script], capture_output=True,
+                                text=True, check=True, cwd=root)
+        python_calls = open(calls).read().splitlines() if os.path.exists(calls) else []
+        return result.stdout.split(), python_calls
+
+    def test_plain_poms_stay_in_the_shell(self):
+        with tempfile.TemporaryDirectory() as root, isolated_home(root):
+            deep = make_monorepo(root, 8, modules=4, depth=3)
+            homes, calls = self.run_hook(root, deep)
+            self.assertEqual(calls, [])
+            by_module = {"m0": "/jdk21", "m1": "/jdk11", "m2": "/jdk17", "m3": "/jdk17"}
+            self.assertEqual(homes, [by_module[d.split(os.sep + "services" + os.sep)[1].split(os.sep)[0]] for d in deep])
+
+    def test_toolchains_pom_goes_to_python(self):
+        with tempfile.TemporaryDirectory() as root, isolated_home(root):
+            deep = make_monorepo(root, 8, modules=4, depth=3)
+            write(os.path.join(root, "services", "m3", "pom.xml"), TOOLCHAINS_POM)
+            leaf = next(d for d in deep if os.sep + "m3" + os.sep in d)
+            homes, calls = self.run_hook(root, [leaf])
+            self.assertEqual(homes, ["/from-python"])
+            self.assertEqual(calls, ["resolve-dir " + os.path.join(root, "services", "m3")])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+"""
+prune.plan_prune on a synthetic install root: the retention policy (active,
+recently used, newest per version, size cap) and leftover staging folders,
+which are only removed once the install that made them has ended.
+"""
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+import support
+from synthetic import write_tar_gz
+from coffeebar.core import prune
+from coffeebar.core.jdk_probe import JdkInfo
+from coffeebar.core.prune import RetentionPolicy, apply_plan, make_staging_dir, plan_prune
+from coffeebar.core.usage import UsageLog
+
+DAY = prune.DAY
+NOW = 1_800_000_000.0
+
+class PlanPruneTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, "jdks")
+        os.makedirs(self.root)
+        self.usage = UsageLog(os.path.join(self.tmp.name, "usage.json"), os.path.join(self.tmp.name, "usage.log"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def jdk(self, name, feature, update, size=1000, under_root=True):
+        path = os.path.join(self.root if under_root else self.tmp.name, name)
+        os.makedirs(path)
+        with open(os.path.join(path, "lib.bin"), "wb") as f:
+            f.write(b"x" * size)
+        return JdkInfo(name, path, feature=feature, update=update)
+
+    def plan(self, jdks, policy=None, active=()):
+        return plan_prune(jdks, self.root, policy or RetentionPolicy(), self.usage, list(active), now=NOW)
+
+    def removed(self, plan):
+        return sorted(os.path.basename(entry.path) for entry in plan.remove)
+
+    def test_keeps_newest_per_version(self):
+        jdks = [self.jdk(f"jdk-17.0.{u}", 17, u) for u in (1, 2, 3)] + [self.jdk("jdk-21.0.1", 21, 1)]
+        plan = self.plan(jdks)
+        self.assertEqual(self.removed(plan), ["jdk-17.0.1"])
+        self.assertEqual(plan.freed_bytes, 1000)
+        reasons = {os.path.basename(entry.path): entry.reason for entry in plan.keep}
+        self.assertEqual(reasons["jdk-17.0.3"], "newest 1 of Java 17")
+        self.assertEqual(reasons["jdk-21.0.1"], "newest 1 of Java 21")
+
+    def test_active_used_unknown_and_outside_root_are_kept(self):
+        jdks = [self.jdk(f"jdk-17.0.{u}", 17, u) for u in (1, 2, 3, 4, 5)]
+        jdks.append(self.jdk("mystery", 0, 0))
+        jdks.append(self.jdk("system-17.0.0", 17, 0, under_root=False))
+        self.usage.record([jdks[1].path], when=NOW - 2 * DAY)
+        self.usage.record([jdks[2].path], when=NOW - 60 * DAY)  # too long ago to count
+        plan = self.plan(jdks, active=[jdks[0].path])
+        self.assertEqual(self.removed(plan), ["jdk-17.0.3"])
+        reasons = {os.path.basename(entry.path): entry.reason for entry in plan.keep}
+        self.assertEqual(reasons["jdk-17.0.1"], "active")
+        self.assertTrue(reasons["jdk-17.0.2"].startswith("used "))
+        self.assertEqual(reasons["mystery"], "unknown version")
+        self.assertNotIn("system-17.0.0", reasons)
+
+    def test_size_cap_evicts_least_recently_used(self):
+        mb = 1024 * 1024
+        jdks = [self.jdk("jdk-11.0.1", 11, 1, mb), self.jdk("jdk-17.0.1", 17, 1, mb), self.jdk("jdk-21.0.1", 21, 1, mb)]
+        self.usage.record([jdks[0].path], when=NOW - 40 * DAY)
+        self.usage.record([jdks[1].path], when=NOW - 50 * DAY)
+        plan = self.plan(jdks, RetentionPolicy(max_total_mb=2), active=[jdks[2].path])
+        self.assertEqual(self.removed(plan), ["jdk-17.0.1"])
+        self.assertIn("over the 2 MB cap", plan.remove[0].reason)
+
+    def test_apply_plan_deletes(self):
+        jdks = [self.jdk(f"jdk-17.0.{u}", 17, u) for u in (1, 2, 3)]
+        self.usage.record([jdks[0].path], when=NOW - 90 * DAY)
+        plan = self.plan(jdks)
+        self.assertEqual(apply_plan(plan, self.usage), [])
+        self.assertEqual(sorted(os.listdir(self.root)), ["jdk-17.0.2", "jdk-17.0.3"])
+        self.assertIsNone(self.usage.get(jdks[0].path))
+
+class StagingTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.usage = UsageLog(os.path.join(self.root, "usage.json"), os.path.join(self.root, "usage.log"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def staging(self, owner=None, age=0):
+        """A staging folder; owner (pid, host) rewrites the mark, False removes it."""
+        path = make_staging_dir(self.root)
+        with open(os.path.join(path, "lib.bin"), "wb") as f:
+            f.write(b"x" * 100)
+        if owner is False:
+            os.remove(os.path.join(path, prune.OWNER_FILE))
+        elif owner:
+            with open(os.path.join(path, prune.OWNER_FILE), "w", encoding="utf-8") as f:
+                f.write("%d %s\n" % owner)
+        then = time.time() - age
+        os.utime(path, (then, then))
+        return path
+
+    def removed(self):
+        plan = plan_prune([], self.root, RetentionPolicy(), self.usage, [])
+        return sorted(entry.path for entry in plan.remove)
+
+    def dead_pid(self):
+        process = subprocess.Popen([sys.executable, "-c", "pass"])
+        process.wait()
+        return process.pid
+
+    def test_running_install_is_kept_however_old(self):
+        # Extracting for hours: the folder's own mtime stops changing early on
+        self.staging(age=5 * 3600)
+        self.assertEqual(self.removed(), [])
+
+    def test_crashed_install_is_removed_at_once(self):
+        crashed = self.staging((self.dead_pid(), socket.gethostname()))
+        self.assertEqual(self.removed(), [crashed])
+
+    def test_unknown_owner_goes_by_age(self):
+        old = self.staging(False, age=2 * 3600)
+        self.staging(False)
+        self.staging((12345, "another-host"))
+        other_host_old = self.staging((12345, "another-host"), age=2 * 3600)
+        self.assertEqual(self.removed(), sorted([old, other_host_old]))
+
+    def test_installed_jdk_has_no_mark(self):
+        from coffeebar.core.jdk_downloader import JdkDownloader
+        archive = os.path.join(self.root, "jdk.tar.gz")
+        write_tar_gz(archive, 20, 20000)
+        home = JdkDownloader(dedupe="off").install_jdk(archive, self.root, "installed")
+        self.assertFalse(os.path.exists(os.path.join(home, prune.OWNER_FILE)))
+        self.assertEqual(sorted(os.listdir(self.root)), ["installed"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+"""
+AdoptiumClient's metadata cache against a local stub of the Adoptium v3
+API (synthetic.adoptium_stub): TTL, revalidation with ETag or
+Last-Modified, and falling back to the cache when the API is unreachable.
+"""
+import os
+import tempfile
+import unittest
+
+import requests
+
+import support
+from synthetic import adoptium_stub
+from coffeebar.core.release_metadata import AdoptiumClient, MetadataCache
+
+RELEASES = {17: "jdk-17.0.10+7", 21: "jdk-21.0.2+13"}
+LATEST = "/v3/assets/latest/{}/hotspot"
+
+class MetadataCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_file = os.path.join(self.tmp.name, "adoptium.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def client(self, stub_or_url, ttl=3600):
+        url = getattr(stub_or_url, "url", stub_or_url)
+        return AdoptiumClient(url, MetadataCache(self.cache_file), ttl=ttl, os_name="linux", arch="x64",
+                              timeout=(2, 5))
+
+    def test_fresh_entries_skip_the_network(self):
+        with adoptium_stub(RELEASES) as stub:
+            client = self.client(stub)
+            first = client.latest_release(17)
+            second = client.latest_release(17)
+        self.assertEqual(first["name"], "jdk-17.0.10+7")
+        self.assertTrue(first["url"].endswith(".tar.gz"))
+        self.assertEqual(second, first)
+        self.assertEqual([status for _, status, _ in stub.log], [200])
+
+    def test_stale_entry_revalidated_with_etag(self):
+        with adoptium_stub(RELEASES) as stub:
+            client = self.client(stub, ttl=0)
+            first = client.latest_release(17)
+            second = client.latest_release(17)
+        self.assertEqual(second, first)
+        self.assertEqual([status for _, status, _ in stub.log], [200, 304])
+        _, _, headers = stub.log[1]
+        self.assertEqual(headers.get("If-None-Match"), stub.document(17)["etag"])
+
+    def test_stale_entry_revalidated_with_last_modified(self):
+        with adoptium_stub(RELEASES, etags=False) as stub:
+            client = self.client(stub, ttl=0)
+            first = client.latest_release(21)
+            second = client.latest_release(21)
+        self.assertEqual(second, first)
+        self.assertEqual([status for _, status, _ in stub.log], [200, 304])
+        _, _, headers = stub.log[1]
+        self.assertNotIn("If-None-Match", headers)
+        self.assertEqual(headers.get("If-Modified-Since"), stub.document(21)["last_modified"])
+
+    def test_304_keeps_the_cached_body_across_processes(self):
+        with adoptium_stub(RELEASES) as stub:
+            client = self.client(stub)
+            expected = client.latest_releases([17, 21])
+            # A later run, after the TTL: a new cache object read from disk
+            later = self.client(stub)
+            self.assertEqual(later.latest_releases([17, 21], max_age=0), expected)
+        self.assertEqual(sorted(status for _, status, _ in stub.log), [200, 200, 304, 304])
+
+    def test_new_release_replaces_the_cached_one(self):
+        with adoptium_stub(RELEASES) as stub:
+            client = self.client(stub, ttl=0)
+            client.latest_release(17)
+            stub.releases[17] = "jdk-17.0.11+9"
+            updated = client.latest_release(17)
+        self.assertEqual(updated["name"], "jdk-17.0.11+9")
+        self.assertEqual([status for _, status, _ in stub.log], [200, 200])
+
+    def test_offline_uses_the_cache(self):
+        with adoptium_stub(RELEASES) as stub:
+            self.client(stub).latest_releases([17])
+        # The stub has stopped: its port refuses connections
+        offline = self.client(stub, ttl=0)
+        self.assertEqual(offline.latest_release(17)["name"], "jdk-17.0.10+7")
+        self.assertEqual(offline.cached_releases([17, 21]), {17: offline.latest_release(17), 21: None})
+        with self.assertRaises(requests.ConnectionError):
+            offline.latest_release(21)
+        self.assertEqual(offline.latest_releases([17, 21])[21], None)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+The `coffeebar use` fast path of the bash integration (shell_init): it
+rewrites ~/.coffeebar_env without starting Python, and must leave exactly
+what shell_utils.render_env_file would have written.
+"""
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+import support
+from synthetic import isolated_home
+from coffeebar.core import shell_utils
+from coffeebar.core.shell_init import init_script
+
+# Every character _dq escapes, and a space
+AWKWARD_HOME = '/opt/my "jdks"/$HOME/`21` \\ back'
+
+@unittest.skipUnless(shutil.which("bash"), "needs bash")
+class UseFastPathTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.isolated = isolated_home(self.tmp.name)
+        self.env = self.isolated.__enter__()
+        self.env_file = str(shell_utils.env_file())
+        self.calls = os.path.join(self.tmp.name, "calls")
+
+    def tearDown(self):
+        self.isolated.__exit__(None, None, None)
+        self.tmp.cleanup()
+
+    def use(self, home):
+        """Runs `coffeebar use 21` with a lookup table mapping 21 to home; returns what the shell then has."""
+        init = os.path.join(self.tmp.name, "init.bash")
+        with open(init, "w", encoding="utf-8") as f:
+            f.write(init_script("bash"))
+        script = (f'. "{init}"\n'
+                  f'_coffeebar_lookup() {{ [ "$1" = 21 ] && _coffeebar_home="$HOME_FOR_21"; }}\n'
+                  f'_coffeebar_py() {{ printf "%s\\n" "$*" >> "{self.calls}"; }}\n'
+                  'coffeebar use 21 >/dev/null\n'
+                  'printf "%s" "$JAVA_HOME"\n')
+        env = dict(self.env, HOME_FOR_21=home)
+        result = subprocess.run(["bash", "--noprofile", "--norc", "-c", script], env=env, cwd=self.tmp.name,
+                                capture_output=True, text=True, check=True)
+        return result.stdout
+
+    def python_calls(self):
+        if not os.path.exists(self.calls):
+            return []
+        with open(self.calls, encoding="utf-8") as f:
+            return f.read().splitlines()
+
+    def sourced_java_home(self):
+        result = subprocess.run(["sh", "-c", f'. "{self.env_file}"; printf "%s" "$JAVA_HOME"'],
+                                env=self.env, capture_output=True, text=True, check=True)
+        return result.stdout
+
+    def read(self):
+        with open(self.env_file, encoding="utf-8") as f:
+            return f.read()
+
+    def test_other_variables_and_path_entries_are_kept(self):
+        shell_utils.set_env_variables({"JAVA_HOME": "/old/jdk", "MAVEN_OPTS": "-Xmx1g -Dx=\"$y\""},
+                                      ["/opt/tools/bin"])
+        self.assertEqual(self.use(AWKWARD_HOME), AWKWARD_HOME)
+        self.assertEqual(self.python_calls(), [])
+        expected = shell_utils.render_env_file({"MAVEN_OPTS": "-Xmx1g -Dx=\"$y\"", "JAVA_HOME": AWKWARD_HOME},
+                                               ["/opt/tools/bin"])
+        self.assertEqual(self.read(), expected)
+        self.assertEqual(self.sourced_java_home(), AWKWARD_HOME)
+
+    def test_no_env_file_yet(self):
+        self.use(AWKWARD_HOME)
+        self.assertEqual(self.read(), shell_utils.render_env_file({"JAVA_HOME": AWKWARD_HOME}))
+        self.assertEqual(shell_utils.read_env_file()[0], {"JAVA_HOME": AWKWARD_HOME})
+
+    def test_env_file_without_java_home_goes_to_python(self):
+        shell_utils.set_env_variables({"MAVEN_OPTS": "-Xmx1g"})
+        before = self.read()
+        self.use("/opt/jdk-21")
+        self.assertEqual(self.python_calls(), ["use 21"])
+        self.assertEqual(self.read(), before)
+        leftovers = [name for name in os.listdir(self.tmp.name) if name.startswith(".coffeebar_env.")]
+        self.assertEqual(leftovers, [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+"""
+~/.coffeebar_env as shell_utils writes and reads it: render_env_file and
+read_env_file round-trip any value, sh sourcing the file gets the same
+values, and set_env_variables merges changes into what is there.
+"""
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+
+import support
+from synthetic import isolated_home
+from coffeebar.core import shell_utils
+from coffeebar.core.shell_utils import read_env_file, render_env_file, set_env_variables
+
+VALUES = ["/usr/lib/jvm/java-21", "/opt/with space", 'quote"d', "dollar$HOME", "back`tick`", "back\\slash", ""]
+
+class EnvFileTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "env"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, text):
+        self.path.write_text(text, encoding="utf-8")
+
+    def test_round_trip(self):
+        for value in VALUES:
+            with self.subTest(value=value):
+                variables = {"MAVEN_OPTS": value, "JAVA_HOME": value or "/jdk"}
+                entries = [value or "/bin", "/opt/tools/bin"]
+                self.write(render_env_file(variables, entries))
+                self.assertEqual(read_env_file(self.path), (variables, entries))
+
+    def test_java_home_snippet_is_one_export(self):
+        # The PATH rebuild in the snippet is not read back as a variable
+        self.write(render_env_file({"JAVA_HOME": "/jdk"}))
+        self.assertEqual(read_env_file(self.path), ({"JAVA_HOME": "/jdk"}, []))
+
+    def test_missing_file(self):
+        self.assertEqual(read_env_file(self.path), ({}, []))
+
+    def test_foreign_lines_are_ignored(self):
+        self.write('# edited by hand\nexport EDITOR=vim\nalias ll="ls -l"\nexport OK="yes"\n')
+        self.assertEqual(read_env_file(self.path), ({"OK": "yes"}, []))
+
+    @unittest.skipUnless(shutil.which("sh"), "needs sh")
+    def test_sourcing_gives_the_same_values(self):
+        home = '/opt/my "jdk"/$x/`y` \\ z'
+        self.write(render_env_file({"JAVA_HOME": home, "MAVEN_OPTS": "-Dv=$1"}, ["/opt/a b/bin"]))
+        script = f'PATH=/usr/bin:/bin; . "{self.path}"; printf "%s\\n%s\\n%s" "$JAVA_HOME" "$MAVEN_OPTS" "$PATH"'
+        java_home, maven_opts, path = subprocess.run(["sh", "-c", script], capture_output=True, text=True,
+                                                     check=True).stdout.split("\n")
+        self.assertEqual((java_home, maven_opts), (home, "-Dv=$1"))
+        self.assertEqual(path.split(":"), [home + "/bin", "/usr/bin", "/bin", "/opt/a b/bin"])
+
+    @unittest.skipUnless(shutil.which("sh"), "needs sh")
+    def test_switching_replaces_the_old_jdk_on_path(self):
+        self.write(render_env_file({"JAVA_HOME": "/new"}))
+        script = f'JAVA_HOME=/old; PATH=/old/bin:/usr/bin:/usr/bin; . "{self.path}"; printf "%s" "$PATH"'
+        path = subprocess.run(["sh", "-c", script], capture_output=True, text=True, check=True).stdout
+        self.assertEqual(path, "/new/bin:/usr/bin")
+
+class SetEnvVariablesTest(unittest.TestCase):
+    def test_merges_and_unsets(self):
+        with tempfile.TemporaryDirectory() as home, isolated_home(home):
+            self.assertTrue(set_env_variables({"JAVA_HOME": "/a", "MAVEN_OPTS": "-Xmx1g"}, ["/tools"]))
+            self.assertFalse(set_env_variables({"JAVA_HOME": "/a"}))  # nothing to change
+            self.assertTrue(set_env_variables({"JAVA_HOME": "/b", "MAVEN_OPTS": None}, ["/tools", "/more"]))
+            self.assertEqual(read_env_file(), ({"JAVA_HOME": "/b"}, ["/tools", "/more"]))
+            # Sourced from the shell's rc file, once
+            rc = shell_utils.get_shell_config_file()
+            sourcing = [line for line in rc.read_text().splitlines() if str(shell_utils.env_file()) in line]
+            self.assertEqual(len(sourcing), 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+"""
+Startup regression guard for the read-only fast path (see main.py): the
+commands below must not import any heavy module, and what they import on
+top of a bare `python -c pass` must stay within IMPORT_BUDGET_MS, going by
+python -X importtime. Run against a synthetic JDK tree with a warm index.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import support
+from synthetic import isolated_home, make_jdk_tree
+
+COMMANDS = [["current"], ["which", "17"], ["list"]]
+HEAVY_MODULES = ("typer", "rich", "requests", "tkinter", "customtkinter")
+# Sum of the self times of the modules a command adds to a bare interpreter.
+# About 25ms on a slow single-core VM; the heavy modules alone cost over 100ms.
+IMPORT_BUDGET_MS = 60
+
+def import_times(argv, env, cwd):
+    """{module: self time in microseconds} from python -X importtime."""
+    process = subprocess.run([sys.executable, "-X", "importtime"] + argv, env=env, cwd=cwd,
+                             stdin=subprocess.DEVNULL, capture_output=True, text=True)
+    if process.returncode != 0:
+        raise AssertionError(f"{argv} failed: {process.stderr.strip()[-500:]}")
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = [part.strip() for part in line[len("import time:"):].split("|")]
+        times[name] = int(self_us)
+    return times
+
+class StartupTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        home = cls.tmp.name
+        cls.isolated = isolated_home(home)
+        cls.env = cls.isolated.__enter__()
+        cls.env["PYTHONPATH"] = support.ROOT
+        cls.env["JAVA_HOME"] = make_jdk_tree(os.path.join(home, ".jdks"), 20)[2]
+        cls.cwd = home
+        # Builds the discovery index, so `list` below is the cached case
+        subprocess.run([sys.executable, "-m", "coffeebar.main", "list"], env=cls.env, cwd=home,
+                       stdin=subprocess.DEVNULL, capture_output=True, check=True)
+        cls.baseline = import_times(["-c", "pass"], cls.env, home)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.isolated.__exit__(None, None, None)
+        cls.tmp.cleanup()
+
+    def test_no_heavy_imports(self):
+        for args in COMMANDS:
+            with self.subTest(command=" ".join(args)):
+                times = import_times(["-m", "coffeebar.main"] + args, self.env, self.cwd)
+                heavy = sorted({name.split(".")[0] for name in times} & set(HEAVY_MODULES))
+                self.assertEqual(heavy, [], f"`coffeebar {' '.join(args)}` imported {', '.join(heavy)}")
+
+    def test_import_budget(self):
+        for args in COMMANDS:
+            with self.subTest(command=" ".join(args)):
+                # Best of three: the budget is about what gets imported, not a noisy neighbour
+                added_ms = min(
+                    sum(us for name, us in import_times(["-m", "coffeebar.main"] + args, self.env, self.cwd).items()
+                        if name not in self.baseline) / 1000
+                    for _ in range(3))
+                self.assertLessEqual(added_ms, IMPORT_BUDGET_MS,
+                                     f"`coffeebar {' '.join(args)}` spent {added_ms:.1f}ms importing "
+                                     f"(budget {IMPORT_BUDGET_MS}ms)")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+"""
+Path and symlink safety in stream_extract: members that would land outside
+the destination are refused, by the helpers and by both extractors.
+"""
+import io
+import os
+import tarfile
+import tempfile
+import unittest
+import zipfile
+
+import support
+from coffeebar.core import stream_extract
+from coffeebar.core.stream_extract import PrefetchReader, link_stays_inside, safe_join
+
+def tar_with(*members):
+    """A tar.gz in memory; members are (TarInfo, data-or-None)."""
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w:gz") as tar:
+        for info, data in members:
+            if data is not None:
+                info.size = len(data)
+            tar.addfile(info, io.BytesIO(data) if data is not None else None)
+    buf.seek(0)
+    return buf
+
+def symlink_info(name, target):
+    info = tarfile.TarInfo(name)
+    info.type = tarfile.SYMTYPE
+    info.linkname = target
+    return info
+
+class SafeJoinTest(unittest.TestCase):
+    def test_relative_names_are_joined(self):
+        self.assertEqual(safe_join("/dest", "jdk/bin/java"), os.path.join("/dest", "jdk", "bin", "java"))
+        self.assertEqual(safe_join("/dest", "./jdk//lib/"), os.path.join("/dest", "jdk", "lib"))
+        self.assertEqual(safe_join("/dest", "jdk\\bin\\java.exe"), os.path.join("/dest", "jdk", "bin", "java.exe"))
+
+    def test_escapes_are_refused(self):
+        for name in ("/etc/passwd", "../outside", "jdk/../../outside", "jdk\\..\\..\\outside", "C:/Windows", "\\\\host\\share"):
+            with self.subTest(name=name):
+                with self.assertRaises(ValueError):
+                    safe_join("/dest", name)
+
+class LinkStaysInsideTest(unittest.TestCase):
+    def test_links_inside_root(self):
+        self.assertTrue(link_stays_inside("/dest", "/dest/jdk/bin/java", "../lib/java"))
+        self.assertTrue(link_stays_inside("/dest", "/dest/jdk/legal", "."))
+        self.assertTrue(link_stays_inside("/dest", "/dest/jdk", "."))
+
+    def test_links_outside_root(self):
+        self.assertFalse(link_stays_inside("/dest", "/dest/jdk/bin/java", "/usr/bin/java"))
+        self.assertFalse(link_stays_inside("/dest", "/dest/jdk/bin/java", "../../../etc/passwd"))
+        self.assertFalse(link_stays_inside("/dest", "/dest/jdk", ".."))
+        # A sibling whose name merely starts with the root's
+        self.assertFalse(link_stays_inside("/dest", "/dest/jdk", "../../dest-other/x"))
+
+class ExtractorSafetyTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dest = os.path.join(self.tmp.name, "dest")
+        os.makedirs(self.dest)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def outside(self):
+        return sorted(os.listdir(self.tmp.name))
+
+    def test_tar_refuses_escaping_members(self):
+        cases = {
+            "dotdot": [(tarfile.TarInfo("jdk/../../evil"), b"x")],
+            "absolute": [(tarfile.TarInfo("/tmp/evil"), b"x")],
+            "symlink": [(symlink_info("jdk/escape", "../../"), None)],
+            "absolute symlink": [(symlink_info("jdk/escape", "/etc"), None)],
+        }
+        for label, members in cases.items():
+            with self.subTest(label):
+                with self.assertRaises(ValueError):
+                    stream_extract.extract_tar_stream(tar_with(*members), self.dest)
+                self.assertEqual(self.outside(), ["dest"])
+
+    def test_tar_keeps_inner_symlinks(self):
+        archive = tar_with((tarfile.TarInfo("jdk/lib/libjvm.so"), b"elf"),
+                           (symlink_info("jdk/bin/libjvm.so", "../lib/libjvm.so"), None))
+        stream_extract.extract_tar_stream(archive, self.dest)
+        link = os.path.join(self.dest, "jdk", "bin", "libjvm.so")
+        self.assertTrue(os.path.islink(link))
+        with open(link, "rb") as f:
+            self.assertEqual(f.read(), b"elf")
+
+    def test_zip_refuses_escaping_members(self):
+        for name in ("../evil", "jdk/../../evil", "/evil"):
+            with self.subTest(name=name):
+                buf = io.BytesIO()
+                with zipfile.ZipFile(buf, "w") as zf:
+                    zf.writestr(zipfile.ZipInfo(name), b"x")
+                reader = PrefetchReader(iter([buf.getvalue()]))
+                with self.assertRaises(ValueError):
+                    stream_extract.extract_zip_stream(reader, self.dest)
+                self.assertEqual(self.outside(), ["dest"])
+
+    def test_zip_refuses_escaping_symlink(self):
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w") as zf:
+            info = zipfile.ZipInfo("jdk/escape")
+            info.create_system = 3
+            info.external_attr = (0o120777 << 16)
+            zf.writestr(info, "../../etc")
+        path = os.path.join(self.tmp.name, "evil.zip")
+        with open(path, "wb") as f:
+            f.write(buf.getvalue())
+        with self.assertRaises(ValueError):
+            stream_extract.extract_zip_stream(PrefetchReader(iter([buf.getvalue()])), self.dest)
+        with self.assertRaises(ValueError):
+            stream_extract.extract_zip_file(path, os.path.join(self.tmp.name, "dest2"))
+        # The streamed member body may be on disk, but never as a link
+        self.assertFalse(os.path.islink(os.path.join(self.dest, "jdk", "escape")))
+
+if __name__ == "__main__":
+    unittest.main()
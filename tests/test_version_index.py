@@ -0,0 +1,116 @@
+"""
+version_index: query parsing (version_prefix, parse_query) and selection
+from a VersionIndex, against a scan of every JDK as the reference.
+"""
+import itertools
+import unittest
+
+import support
+from coffeebar.core.jdk_probe import JdkInfo
+from coffeebar.core.version_index import VersionIndex, is_lts, parse_query, version_prefix
+
+def jdk(name, feature, interim=0, update=0, build=None, vendor="Eclipse Adoptium", arch="x86_64"):
+    return JdkInfo(name, f"/jdks/{name}", feature=feature, interim=interim, update=update, build=build,
+                   vendor=vendor, arch=arch)
+
+JDKS = [
+    jdk("temurin-8", 8, update=392, build=8),
+    jdk("temurin-11", 11, update=21, build=9),
+    jdk("temurin-17.0.8", 17, update=8, build=7),
+    jdk("temurin-17.0.9", 17, update=9, build=9),
+    jdk("zulu-17.0.10", 17, update=10, build=7, vendor="Azul Systems, Inc."),
+    jdk("zulu-17.0.10-arm", 17, update=10, build=7, vendor="Azul Systems, Inc.", arch="aarch64"),
+    jdk("temurin-21", 21, update=1, build=12),
+    jdk("corretto-22", 22, update=2, build=9, vendor="Amazon.com Inc."),
+    jdk("unknown", 0),
+]
+
+class VersionPrefixTest(unittest.TestCase):
+    def test_versions(self):
+        cases = {
+            "17": (17,),
+            "17.0.9": (17, 0, 9),
+            "17.0.9.1": (17, 0, 9, 1),
+            "17.0.9+9": (17, 0, 9, 0, 9),
+            "21+35": (21, 0, 0, 0, 35),
+            "1.8": (8,),
+            "1.8.0_392": (8, 0, 392),
+            "1.8.0_392-b08": (8, 0, 392, 0, 8),
+        }
+        for text, prefix in cases.items():
+            with self.subTest(text=text):
+                self.assertEqual(version_prefix(text), prefix)
+
+    def test_not_versions(self):
+        for text in ("", "jdk17", "17.x", "17_1", "temurin", "17.0.9+"):
+            with self.subTest(text=text):
+                self.assertIsNone(version_prefix(text))
+
+class ParseQueryTest(unittest.TestCase):
+    def test_fields(self):
+        query = parse_query("Vendor:Zulu@arch:ARM64@lts")
+        self.assertEqual((query.vendor, query.arch, query.lts), ("zulu", "aarch64", True))
+        query = parse_query("17.0.9")
+        self.assertEqual((query.low, query.high), ((17, 0, 9), (17, 0, 10)))
+        query = parse_query(">=17, <21")
+        self.assertEqual((query.low, query.high), ((17,), (21,)))
+        query = parse_query(">17.0.8,<=17.0.10")
+        self.assertEqual((query.low, query.high), ((17, 0, 9), (17, 0, 11)))
+        self.assertEqual(parse_query("latest").high, None)
+
+    def test_not_queries(self):
+        for text in ("temurin-17", "/usr/lib/jvm/java-17", "17@vendor:zulu", "vendor:", ">=17,banana", "17@18"):
+            with self.subTest(text=text):
+                self.assertIsNone(parse_query(text))
+
+class SelectTest(unittest.TestCase):
+    def setUp(self):
+        self.index = VersionIndex(JDKS)
+
+    def names(self, text):
+        return [j.name for j in self.index.select(parse_query(text))]
+
+    def test_queries(self):
+        cases = {
+            "17": ["zulu-17.0.10", "zulu-17.0.10-arm", "temurin-17.0.9", "temurin-17.0.8"],
+            "17.0.9": ["temurin-17.0.9"],
+            "17.0.9+9": ["temurin-17.0.9"],
+            "17.0.9+7": [],
+            "1.8": ["temurin-8"],
+            ">=21": ["corretto-22", "temurin-21"],
+            ">=11,<17": ["temurin-11"],
+            "lts": ["temurin-21", "zulu-17.0.10", "zulu-17.0.10-arm", "temurin-17.0.9", "temurin-17.0.8",
+                    "temurin-11", "temurin-8"],
+            "vendor:zulu@17": ["zulu-17.0.10", "zulu-17.0.10-arm"],
+            "vendor:amazon@latest": ["corretto-22"],
+            "arch:amd64@17": ["zulu-17.0.10", "temurin-17.0.9", "temurin-17.0.8"],
+        }
+        for text, names in cases.items():
+            with self.subTest(query=text):
+                self.assertEqual(self.names(text), names)
+
+    def test_unknown_versions_never_match(self):
+        self.assertNotIn("unknown", self.names("latest"))
+        self.assertNotIn("unknown", self.names("<8"))
+
+    def test_best_and_select_agree_with_a_scan(self):
+        queries = ["17", "11", "21", "22", "8", "latest", "lts", ">=17", "<17", ">17.0.9", "vendor:temurin@lts",
+                   "arch:aarch64@latest", "vendor:zulu@>=18"]
+        for order in itertools.islice(itertools.permutations(JDKS), 0, None, 40000):
+            index = VersionIndex(list(order))
+            for text in queries:
+                with self.subTest(query=text):
+                    selected = index.select(parse_query(text))
+                    self.assertEqual(index.best(parse_query(text)), selected[0] if selected else None)
+                    self.assertEqual([j.name for j in selected], self.names(text))  # input order doesn't matter
+
+    def test_lookup_tables(self):
+        self.assertIs(self.index.by_name["temurin-21"], JDKS[6])
+        self.assertIs(self.index.by_path["/jdks/temurin-21"], JDKS[6])
+        self.assertEqual(self.index.newest_first()[0].name, "corretto-22")
+
+    def test_is_lts(self):
+        self.assertEqual([f for f in range(8, 30) if is_lts(f)], [8, 11, 17, 21, 25, 29])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+"""
+InventoryWatcher with both backends (inotify, polling): fake JDK homes
+(synthetic.make_home) appear and disappear under a temp root, and each
+batch of changes must arrive as one InventoryChange, including a burst of
+thousands of files written into a new home, and a home removed and put
+back under the same path.
+"""
+import os
+import queue
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+import support
+from synthetic import FEATURES, VENDORS, home_spec, isolated_home, make_home, make_jdk_tree
+from coffeebar.core.jdk_manager import JdkManager
+from coffeebar.core.watcher import POLL_INTERVAL, InventoryWatcher
+
+DEBOUNCE = 0.2
+BURST_FILES = 3000
+
+class WatcherTestMixin:
+    use_inotify = False
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.isolated = isolated_home(self.tmp.name)
+        self.isolated.__enter__()
+        self.root = os.path.join(self.tmp.name, "jdks")
+        self.existing = make_jdk_tree(self.root, 3)
+        manager = JdkManager(config={})
+        manager.common_paths = [self.root]
+        self.changes = queue.Queue()
+        self.watcher = InventoryWatcher(manager, self.changes.put, debounce=DEBOUNCE, use_inotify=self.use_inotify)
+        self.watcher.start()
+        self.assertEqual(self.watcher.kind, "inotify" if self.use_inotify else "polling")
+        # Started once the baseline is taken and the directories are watched
+        backend = self.watcher.backend
+        self.wait_for(lambda: self.watcher.known and (getattr(backend, "watches", None)
+                                                      or getattr(backend, "signatures", None)))
+
+    def tearDown(self):
+        self.watcher.stop()
+        self.isolated.__exit__(None, None, None)
+        self.tmp.cleanup()
+
+    def wait_for(self, predicate, timeout=10.0):
+        deadline = time.monotonic() + timeout
+        while not predicate():
+            if time.monotonic() > deadline:
+                self.fail("timed out")
+            time.sleep(0.02)
+
+    def next_change(self):
+        try:
+            return self.changes.get(timeout=10 + POLL_INTERVAL)
+        except queue.Empty:
+            self.fail("no InventoryChange arrived")
+
+    def settle(self):
+        """Waits long enough for another poll, debounce and refresh; returns the changes reported meanwhile."""
+        time.sleep(POLL_INTERVAL + DEBOUNCE * 3 if not self.use_inotify else DEBOUNCE * 5)
+        reported = []
+        while not self.changes.empty():
+            reported.append(self.changes.get_nowait())
+        return reported
+
+    def assertNoMoreChanges(self):
+        self.assertEqual(self.settle(), [], "expected a single InventoryChange")
+
+    def new_home(self, i):
+        spec = home_spec(i)
+        return os.path.join(self.root, spec["name"]), spec
+
+    def test_added_and_removed(self):
+        added = []
+        for i in (10, 11):
+            home, spec = self.new_home(i)
+            make_home(home, spec)
+            added.append(home)
+        change = self.next_change()
+        self.assertEqual(sorted(jdk.path for jdk in change.added), sorted(added))
+        self.assertEqual(change.removed, [])
+        self.assertEqual(len(change.jdks), 5)
+        self.assertNoMoreChanges()
+
+        shutil.rmtree(self.existing[0])
+        change = self.next_change()
+        self.assertEqual(change.added, [])
+        self.assertEqual(change.removed, [self.existing[0]])
+        self.assertEqual(len(change.jdks), 4)
+        self.assertNoMoreChanges()
+
+    def test_recreated_home_is_watched(self):
+        # Removed and put back under the same path before the watcher refreshes, so
+        # the home never leaves the watched set: the new directory needs a new watch
+        home = self.existing[0]
+        shutil.rmtree(home)
+        make_home(home, home_spec(0))
+        for change in self.settle():
+            self.assertEqual(change.removed, [])
+
+        # Upgraded in place, as a package manager does: only the home itself changes
+        upgraded = home_spec(len(FEATURES) * len(VENDORS))  # the same JDK, next update
+        staging = os.path.join(self.tmp.name, "staging")
+        make_home(staging, upgraded)
+        for name in ("release", os.path.join("bin", "java")):
+            os.replace(os.path.join(staging, name), os.path.join(home, name))
+        change = self.next_change()
+        self.assertEqual([jdk.path for jdk in change.changed], [home])
+        self.assertEqual((change.changed[0].feature, change.changed[0].update), (8, 1))
+        self.assertNoMoreChanges()
+
+    def test_burst_is_one_change(self):
+        # Like an extraction in place: thousands of files, the release file among the last
+        home, spec = self.new_home(12)
+        for i in range(BURST_FILES):
+            directory = os.path.join(home, "lib", f"module{i // 100}")
+            os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, f"file{i}.bin"), "wb") as f:
+                f.write(b"x" * 64)
+        make_home(home, spec)
+        change = self.next_change()
+        self.assertEqual([jdk.path for jdk in change.added], [home])
+        self.assertEqual(change.removed, [])
+        self.assertNoMoreChanges()
+
+class PollingWatcherTest(WatcherTestMixin, unittest.TestCase):
+    use_inotify = False
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "inotify is Linux-only")
+class InotifyWatcherTest(WatcherTestMixin, unittest.TestCase):
+    use_inotify = True
+
+if __name__ == "__main__":
+    unittest.main()